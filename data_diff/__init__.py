@@ -6,7 +6,10 @@ from data_diff.tracking import disable_tracking
 from data_diff.databases._connect import connect
 from data_diff.diff_tables import Algorithm
 from data_diff.hashdiff_tables import HashDiffer, DEFAULT_BISECTION_THRESHOLD, DEFAULT_BISECTION_FACTOR
+from data_diff.hybriddiff_tables import HybridDiffer, DEFAULT_MAX_LOCAL_ROWS
 from data_diff.joindiff_tables import JoinDiffer, TABLE_WRITE_LIMIT
+from data_diff.progress import DiffProgress
+from data_diff.result_store import DEFAULT_MAX_ROWS_IN_MEMORY
 from data_diff.table_segment import TableSegment
 from data_diff.utils import eval_name_template, Vector
 
@@ -58,17 +61,48 @@ def diff_tables(
     max_update: DbTime = None,
     # Enable/disable threaded diffing. Needed to take advantage of database threads.
     threaded: bool = True,
-    # Maximum size of each threadpool. None = auto. Only relevant when threaded is True.
-    # There may be many pools, so number of actual threads can be a lot higher.
+    # Maximum number of threads of the differ, shared by all of its tasks. None = auto.
+    # Only relevant when threaded is True. Database connections have threads of their own.
     max_threadpool_size: Optional[int] = 1,
+    # How many diff rows to keep in memory, before spilling them to a temporary file. None = never spill.
+    max_rows_in_memory: Optional[int] = DEFAULT_MAX_ROWS_IN_MEMORY,
+    # Keep the diff rows of every segment in the info tree. Disable when only streaming the results.
+    retain_diffs: bool = True,
+    # Track the progress of the diff in this object (key-space covered, rows and queries per second). None = disabled.
+    progress: Optional[DiffProgress] = None,
     # Algorithm
     algorithm: Algorithm = Algorithm.AUTO,
     # An additional 'where' expression to restrict the search space.
     where: str = None,
+    # Only compare the key columns, to find which keys are missing on either side
+    keys_only: bool = None,
+    # Diff each distinct value of this column separately, so that every query prunes to a single partition
+    partition_column: str = None,
+    # Partition by the column reported by the database catalog (e.g. BigQuery or Postgres partitioning)
+    table_partitions: bool = False,
     # Into how many segments to bisect per iteration (hashdiff only)
     bisection_factor: int = DEFAULT_BISECTION_FACTOR,
     # When should we stop bisecting and compare locally (in row count; hashdiff only)
     bisection_threshold: int = DEFAULT_BISECTION_THRESHOLD,
+    # Use the database's native hash function when both tables are in the same kind of database (hashdiff only)
+    native_checksum: bool = True,
+    # Checksum each column separately, to find which columns differ without downloading rows (hashdiff only)
+    column_checksums: bool = False,
+    # Ignore a column once it mismatched in this many segments. None = never. (hashdiff only)
+    auto_ignore_columns_after: Optional[int] = None,
+    # Compare the downloaded rows in an in-process DuckDB, instead of in Python (hashdiff only)
+    duckdb_leaf_diff: bool = False,
+    # Record each completed segment in this file, to be able to resume the diff. None = disabled. (hashdiff only)
+    checkpoint_path: Optional[str] = None,
+    # Resume from the segments recorded in checkpoint_path, and only diff the unfinished ones (hashdiff only)
+    resume: bool = False,
+    # Compare the downloaded rows in a pool of this many processes. None = in the querying threads. (hashdiff only)
+    leaf_processes: Optional[int] = None,
+    # Download the rows of expected leaves along with their checksum, while at least this fraction of them
+    # mismatched. None = never. (hashdiff only)
+    prefetch_leaves: Optional[float] = None,
+    # Join locally when both tables combined have up to this many rows (hybrid only)
+    max_local_rows: int = DEFAULT_MAX_LOCAL_ROWS,
     # Enable/disable validating that the key columns are unique. (joindiff only)
     validate_unique_key: bool = True,
     # Enable/disable sampling of exclusive rows. Creates a temporary table. (joindiff only)
@@ -94,14 +128,51 @@ def diff_tables(
         min_update (:data:`DbTime`, optional): Lowest update_column value, used to restrict the segment
         max_update (:data:`DbTime`, optional): Highest update_column value, used to restrict the segment
         threaded (bool): Enable/disable threaded diffing. Needed to take advantage of database threads.
-        max_threadpool_size (int): Maximum size of each threadpool. ``None`` means auto.
-                                   Only relevant when `threaded` is ``True``.
-                                   There may be many pools, so number of actual threads can be a lot higher.
+        max_threadpool_size (int): Maximum number of threads of the differ, shared by all of its tasks.
+                                   ``None`` means auto. Only relevant when `threaded` is ``True``.
+                                   Database connections have threads of their own (see `thread_count`).
+        max_rows_in_memory (int, optional): How many diff rows to keep in memory, before spilling them to a
+                                            temporary file on disk. ``None`` means never spill.
+        retain_diffs (bool): Keep the diff rows of every segment in `info_tree`. Disable when the results are only
+                             streamed, to save memory. (default: True)
+        progress (DiffProgress, optional): Track the progress of the diff in this object, as segments complete.
+                                           Call its `snapshot()` from another thread, or report it with
+                                           :class:`ProgressReporter`. (default: None)
         where (str, optional): An additional 'where' expression to restrict the search space.
-        algorithm (:class:`Algorithm`): Which diffing algorithm to use (`HASHDIFF` or `JOINDIFF`. Default=`AUTO`)
+        keys_only (bool, optional): Only checksum, download and compare the key columns. The diff then only
+                                    reports keys that are exclusive to either table.
+        partition_column (str, optional): Align the first-level segments with the distinct values of this column,
+                                          so that every query prunes to a single partition.
+        table_partitions (bool): Take `partition_column` from the database catalog, when the table is partitioned
+                                 by a single column. (default: False)
+        algorithm (:class:`Algorithm`): Which diffing algorithm to use (`HASHDIFF`, `JOINDIFF` or `HYBRID`. Default=`AUTO`)
         bisection_factor (int): Into how many segments to bisect per iteration. (Used when algorithm is `HASHDIFF`)
         bisection_threshold (Number): Minimal row count of segment to bisect, otherwise download
                                       and compare locally. (Used when algorithm is `HASHDIFF`).
+        native_checksum (bool): Checksum using the database's native hash function, when both tables
+                                are in the same kind of database. Faster than md5. (Used when algorithm is `HASHDIFF`. default: True)
+        column_checksums (bool): Checksum each column separately, and report how many leaf segments mismatch per column.
+                                 (Used when algorithm is `HASHDIFF`. default: False)
+        auto_ignore_columns_after (int, optional): Ignore a column from now on, once it mismatched in this many leaf segments,
+                                    and skip segments that differ only in ignored columns. Requires `column_checksums`.
+                                    (Used when algorithm is `HASHDIFF`. default: None)
+        duckdb_leaf_diff (bool): Compare the downloaded rows in an in-process DuckDB, instead of in Python.
+                                 Faster from about 20K rows per leaf, so pair it with a higher `bisection_threshold`.
+                                 (Used when algorithm is `HASHDIFF`. default: False)
+        checkpoint_path (str, optional): Record each completed segment (key bounds, counts, checksums and diff) in this
+                                         file, as the diff runs. (Used when algorithm is `HASHDIFF`. default: None)
+        resume (bool): Resume an interrupted diff from `checkpoint_path`. Recorded segments are replayed, and only
+                       the unfinished ones are queried. (Used when algorithm is `HASHDIFF`. default: False)
+        leaf_processes (int, optional): Compare the downloaded rows of each leaf segment in a pool of this many
+                                        processes, so the comparison can use more than one core.
+                                        (Used when algorithm is `HASHDIFF`. default: None)
+        prefetch_leaves (float, optional): Download the rows of a segment that is expected to be a leaf at the
+                                           same time as its checksum, while at least this fraction of the expected
+                                           leaves mismatched. Saves a round-trip per leaf, at the cost of some
+                                           wasted downloads. (Used when algorithm is `HASHDIFF`. default: None)
+        max_local_rows (int): Download both tables into a local DuckDB and join them there, when they have up to
+                              this many rows combined, or in chunks when their row counts diverge and the smaller
+                              one has up to this many rows. Otherwise bisect like `HASHDIFF`. (Used when algorithm is `HYBRID`)
         validate_unique_key (bool): Enable/disable validating that the key columns are unique. (used for `JOINDIFF`. default: True)
                                     Single query, and can't be threaded, so it's very slow on non-cloud dbs.
                                     Future versions will detect UNIQUE constraints in the schema.
@@ -113,7 +184,8 @@ def diff_tables(
 
     Note:
         The following parameters are used to override the corresponding attributes of the given :class:`TableSegment` instances:
-        `key_columns`, `update_column`, `extra_columns`, `min_key`, `max_key`, `where`.
+        `key_columns`, `update_column`, `extra_columns`, `min_key`, `max_key`, `where`, `keys_only`,
+        `partition_column`.
         If different values are needed per table, it's possible to omit them here, and instead set
         them directly when creating each :class:`TableSegment`.
 
@@ -143,6 +215,8 @@ def diff_tables(
             min_update=min_update,
             max_update=max_update,
             where=where,
+            keys_only=keys_only,
+            partition_column=partition_column,
         ).items()
         if v is not None
     }
@@ -153,13 +227,29 @@ def diff_tables(
     if algorithm == Algorithm.AUTO:
         algorithm = Algorithm.JOINDIFF if table1.database is table2.database else Algorithm.HASHDIFF
 
-    if algorithm == Algorithm.HASHDIFF:
-        differ = HashDiffer(
+    if algorithm in (Algorithm.HASHDIFF, Algorithm.HYBRID):
+        hashdiff_options = dict(
             bisection_factor=bisection_factor,
             bisection_threshold=bisection_threshold,
+            native_checksum=native_checksum,
+            column_checksums=column_checksums,
+            auto_ignore_columns_after=auto_ignore_columns_after,
+            duckdb_leaf_diff=duckdb_leaf_diff,
+            checkpoint_path=checkpoint_path,
+            resume=resume,
+            leaf_processes=leaf_processes,
+            prefetch_leaves=prefetch_leaves,
+            table_partitions=table_partitions,
+            max_rows_in_memory=max_rows_in_memory,
+            retain_diffs=retain_diffs,
+            progress=progress,
             threaded=threaded,
             max_threadpool_size=max_threadpool_size,
         )
+        if algorithm == Algorithm.HYBRID:
+            differ = HybridDiffer(max_local_rows=max_local_rows, **hashdiff_options)
+        else:
+            differ = HashDiffer(**hashdiff_options)
     elif algorithm == Algorithm.JOINDIFF:
         if isinstance(materialize_to_table, str):
             table_name = eval_name_template(materialize_to_table)
@@ -173,6 +263,10 @@ def diff_tables(
             materialize_all_rows=materialize_all_rows,
             table_write_limit=table_write_limit,
             skip_null_keys=skip_null_keys,
+            table_partitions=table_partitions,
+            max_rows_in_memory=max_rows_in_memory,
+            retain_diffs=retain_diffs,
+            progress=progress,
         )
     else:
         raise ValueError(f"Unknown algorithm: {algorithm}")
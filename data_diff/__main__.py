@@ -3,25 +3,42 @@ import logging
 import os
 import sys
 import time
+from contextlib import nullcontext
 from copy import deepcopy
+from functools import partial
 from datetime import datetime
 from itertools import islice
-from typing import Dict, Optional, Tuple, Union, List, Set
+from typing import Callable, Dict, Hashable, Iterator, Optional, Tuple, Union, List, Set
 
+import attrs
 import click
 import rich
 from rich.logging import RichHandler
 
 from data_diff import Database, DbPath
-from data_diff.config import apply_config_from_file
+from data_diff.batch import (
+    DEFAULT_MAX_CONCURRENT_DIFFS,
+    DEFAULT_MAX_DIFFS_PER_DATABASE,
+    BatchScheduler,
+    BatchTask,
+    DatabasePool,
+    database_key,
+)
+from data_diff.config import apply_batch_config_from_files, apply_config, apply_config_from_file, load_config_file
 from data_diff.databases._connect import connect
 from data_diff.dbt import dbt_diff
-from data_diff.diff_tables import Algorithm, TableDiffer
+from data_diff.diff_tables import Algorithm, DiffResultWrapper, TableDiffer
+from data_diff.distributed import DEFAULT_WORK_UNITS, DistributedDiffer, WorkQueue, run_worker
 from data_diff.hashdiff_tables import HashDiffer, DEFAULT_BISECTION_THRESHOLD, DEFAULT_BISECTION_FACTOR
+from data_diff.hybriddiff_tables import HybridDiffer
 from data_diff.joindiff_tables import TABLE_WRITE_LIMIT, JoinDiffer
 from data_diff.parse_time import parse_time_before, UNITS_STR, ParseError
+from data_diff.plan import DiffPlan, plan_diff
+from data_diff.progress import DiffProgress, ProgressReporter, progress_bar_printer, progress_event_printer
 from data_diff.queries.api import current_timestamp
 from data_diff.schema import RawColumnInfo, create_schema
+from data_diff.server import DEFAULT_SCHEMA_TTL, BadRequest, DiffServer, parse_address
+from data_diff.sinks import SinkWriter, make_sink
 from data_diff.table_segment import TableSegment
 from data_diff.tracking import disable_tracking, set_entrypoint_name
 from data_diff.utils import eval_name_template, remove_password_from_url, safezip, match_like, LogStatusHandler
@@ -155,6 +172,59 @@ click.Context.formatter_class = MyHelpFormatter
     metavar="TABLE_NAME",
     help="(joindiff only) Materialize the diff results into a new table in the database. If a table exists by that name, it will be replaced.",
 )
+@click.option(
+    "--sink",
+    default=None,
+    metavar="TARGET",
+    help="Write the diff rows to a file (.csv, .ndjson, .parquet or .arrow), or to a table in the first database, "
+    "given as 'table:<name>' (replaced if it exists). Works with every algorithm, and writes in bulk from a "
+    "background thread.",
+)
+@click.option(
+    "--checkpoint",
+    default=None,
+    metavar="PATH",
+    help="(hashdiff only) Record each completed segment in this file as the diff runs, so that it can be resumed "
+    "with --resume if it's interrupted.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="(hashdiff only) Resume an interrupted diff from the --checkpoint file. Completed segments are replayed "
+    "(their rows are printed again), and only the unfinished ones are diffed.",
+)
+@click.option(
+    "--leaf-processes",
+    default=None,
+    type=int,
+    help="(hashdiff only) Compare the downloaded rows of each segment in a pool of this many processes, so that "
+    "the comparison isn't limited to a single core. Useful with many --threads, or a high --bisection-threshold.",
+    metavar="COUNT",
+)
+@click.option(
+    "--prefetch-leaves",
+    default=None,
+    type=click.FloatRange(0, 1),
+    help="(hashdiff only) Download the rows of a segment small enough to be a leaf at the same time as its checksum, "
+    "while at least this fraction of such segments mismatched. Saves a round-trip per leaf on high-latency "
+    "connections, at the cost of downloading some segments that turn out equal.",
+    metavar="RATIO",
+)
+@click.option(
+    "--progress",
+    type=click.Choice(["bar", "json"]),
+    default=None,
+    help="Report the progress of the diff to stderr, every second: the key-space covered, the estimated time left, "
+    "and the queries and rows per second of each database. 'bar' prints a progress line, and 'json' prints "
+    "a JSON object per line.",
+)
+@click.option(
+    "--plan",
+    is_flag=True,
+    help="(hashdiff only) Don't diff. Instead, print the estimated bisection levels, checksum queries, scanned bytes "
+    "and downloaded rows, for the given --bisection-factor and --bisection-threshold. Only queries the key ranges "
+    "and the catalog. Scanned bytes are estimated with dry runs on BigQuery, and EXPLAIN on Snowflake.",
+)
 @click.option(
     "--min-age",
     default=None,
@@ -169,6 +239,12 @@ click.Context.formatter_class = MyHelpFormatter
 @click.option("-s", "--stats", is_flag=True, help="Print stats instead of a detailed diff")
 @click.option("-d", "--debug", is_flag=True, help="Print debug info")
 @click.option("--json", "json_output", is_flag=True, help="Print JSONL output for machine readability")
+@click.option(
+    "--json-stream",
+    is_flag=True,
+    help="Print NDJSON output, writing each row as soon as it's found, followed by the summary. "
+    "Unlike --json with --dbt, the diff is never held in memory. Same as --json otherwise.",
+)
 @click.option("-v", "--verbose", is_flag=True, help="Print extra info")
 @click.option("--version", is_flag=True, help="Print version info and exit")
 @click.option("-i", "--interactive", is_flag=True, help="Confirm queries, implies --debug")
@@ -215,6 +291,22 @@ click.Context.formatter_class = MyHelpFormatter
     help="An additional 'where' expression to restrict the search space. Beware of SQL Injection!",
     metavar="EXPR",
 )
+@click.option(
+    "--keys-only",
+    is_flag=True,
+    help="Only compare the key columns, and report keys that are missing on either side. Ignores --columns.",
+)
+@click.option(
+    "--partition-column",
+    default=None,
+    help="Diff each distinct value of this column separately, so that every query prunes to a single partition.",
+    metavar="NAME",
+)
+@click.option(
+    "--table-partitions",
+    is_flag=True,
+    help="Partition the diff by the column that the tables are partitioned by, according to the database catalog.",
+)
 @click.option("-a", "--algorithm", default=Algorithm.AUTO.value, type=click.Choice([i.value for i in Algorithm]))
 @click.option(
     "--conf",
@@ -228,6 +320,67 @@ click.Context.formatter_class = MyHelpFormatter
     help="Name of run-configuration to run. If used, CLI arguments for database and table must be omitted.",
     metavar="NAME",
 )
+@click.option(
+    "--batch",
+    is_flag=True,
+    help="Diff every run of the --conf file (except 'default') in a single process, sharing the database connections "
+    "between them, and print the stats of each run as it finishes.",
+)
+@click.option(
+    "--manifest",
+    default=None,
+    help="Path to a JSON file that lists the runs to diff in batch mode, in the same structure as the --conf file. "
+    "Implies --batch.",
+    metavar="PATH",
+)
+@click.option(
+    "--serve",
+    default=None,
+    help="Run as a server, that diffs on request over a local HTTP/JSON API, keeping the database connections and "
+    "table schemas warm between requests. Listens on ADDRESS, given as 'host:port' or 'port'. "
+    "Requests can only use the databases of the --conf file, by name.",
+    metavar="ADDRESS",
+)
+@click.option(
+    "--queue",
+    default=None,
+    help="(hashdiff only) Coordinate a distributed diff: split the key range into work units, on a queue in this "
+    "SQLite file, and merge the results of the worker processes that diff them. See --workers and --work.",
+    metavar="PATH",
+)
+@click.option(
+    "--work-units",
+    default=DEFAULT_WORK_UNITS,
+    help=f"(--queue only) Into how many work units to split the key range. Default={DEFAULT_WORK_UNITS}.",
+    metavar="COUNT",
+)
+@click.option(
+    "--workers",
+    default=0,
+    help="(--queue only) Number of worker processes to start on this host. Default=0, meaning only the workers "
+    "started separately with --work.",
+    metavar="COUNT",
+)
+@click.option(
+    "--work",
+    default=None,
+    help="Run as a worker of the distributed diff whose queue is in this file. Diffs work units until none are "
+    "left. The queue must be on a filesystem shared with the coordinator.",
+    metavar="PATH",
+)
+@click.option(
+    "--max-concurrent-diffs",
+    default=DEFAULT_MAX_CONCURRENT_DIFFS,
+    help=f"(batch only) Maximum number of runs to diff at once. Default={DEFAULT_MAX_CONCURRENT_DIFFS}.",
+    metavar="COUNT",
+)
+@click.option(
+    "--max-diffs-per-database",
+    default=DEFAULT_MAX_DIFFS_PER_DATABASE,
+    help="(batch only) Maximum number of runs to diff at once against the same database. "
+    f"Default={DEFAULT_MAX_DIFFS_PER_DATABASE}.",
+    metavar="COUNT",
+)
 @click.option(
     "--dbt",
     is_flag=True,
@@ -290,8 +443,19 @@ def main(conf, run, **kw) -> None:
         print(f"v{__version__}")
         return
 
-    if conf:
+    batch_runs = None
+    batch_options = {k: kw.pop(k) for k in ("max_concurrent_diffs", "max_diffs_per_database")}
+    manifest = kw.pop("manifest")
+    batch = kw.pop("batch") or manifest
+    serve = kw.pop("serve")
+    work = kw.pop("work")
+    if serve:
+        server_config = load_config_file(conf) if conf else {}
+    elif batch:
+        batch_runs = apply_batch_config_from_files(conf, manifest, kw)
+    elif conf:
         kw = apply_config_from_file(conf, run, kw)
+        kw.pop("priority", None)  # Only used in batch mode
 
     if kw["no_tracking"]:
         disable_tracking()
@@ -337,7 +501,14 @@ def main(conf, run, **kw) -> None:
                 columns_flag=kw["columns"],
                 production_database_flag=kw["prod_database"],
                 production_schema_flag=kw["prod_schema"],
+                json_stream=kw["json_stream"],
             )
+        elif serve:
+            _serve(serve, server_config, kw)
+        elif work:
+            _work(work)
+        elif batch_runs is not None:
+            _batch_diff(batch_runs, json_output=kw["json_output"], **batch_options)
         else:
             _data_diff(dbt_project_dir=project_dir_override, dbt_profiles_dir=profiles_dir_override, state=state, **kw)
     except Exception as e:
@@ -386,6 +557,12 @@ def _get_table_differ(
     materialize_to_table: Optional[str],
     bisection_factor: Optional[int],
     bisection_threshold: Optional[int],
+    table_partitions: bool = False,
+    checkpoint: Optional[str] = None,
+    resume: bool = False,
+    progress: Optional[DiffProgress] = None,
+    leaf_processes: Optional[int] = None,
+    prefetch_leaves: Optional[float] = None,
 ) -> TableDiffer:
     algorithm = Algorithm(algorithm)
     if algorithm == Algorithm.AUTO:
@@ -394,6 +571,11 @@ def _get_table_differ(
     logging.info(f"Using algorithm '{algorithm.name.lower()}'.")
 
     if algorithm == Algorithm.JOINDIFF:
+        if checkpoint or resume or leaf_processes or prefetch_leaves is not None:
+            raise ValueError(
+                "--checkpoint, --resume, --leaf-processes and --prefetch-leaves are only supported by hashdiff "
+                "and hybrid. Use -a hashdiff."
+            )
         return JoinDiffer(
             threaded=threaded,
             max_threadpool_size=threads and threads * 2,
@@ -404,14 +586,25 @@ def _get_table_differ(
             materialize_to_table=(
                 materialize_to_table and db1.dialect.parse_table_name(eval_name_template(materialize_to_table))
             ),
+            table_partitions=table_partitions,
+            retain_diffs=False,  # Only the yielded rows are printed
+            progress=progress,
         )
 
-    assert algorithm == Algorithm.HASHDIFF
-    return HashDiffer(
+    assert algorithm in (Algorithm.HASHDIFF, Algorithm.HYBRID)
+    differ_cls = HybridDiffer if algorithm == Algorithm.HYBRID else HashDiffer
+    return differ_cls(
         bisection_factor=DEFAULT_BISECTION_FACTOR if bisection_factor is None else bisection_factor,
         bisection_threshold=DEFAULT_BISECTION_THRESHOLD if bisection_threshold is None else bisection_threshold,
         threaded=threaded,
         max_threadpool_size=threads and threads * 2,
+        table_partitions=table_partitions,
+        retain_diffs=False,
+        checkpoint_path=checkpoint,
+        resume=resume,
+        progress=progress,
+        leaf_processes=leaf_processes,
+        prefetch_leaves=prefetch_leaves,
     )
 
 
@@ -483,6 +676,111 @@ def _get_threads(threads: Union[int, str, None], threads1: Optional[int], thread
     return threaded, threads
 
 
+def _prepare_diff(
+    db1: Database,
+    db2: Database,
+    table1: str,
+    table2: str,
+    key_columns: Tuple[str, ...],
+    update_column: Optional[str],
+    columns: Tuple[str, ...],
+    *,
+    algorithm: str,
+    bisection_factor: Optional[int],
+    bisection_threshold: Optional[int],
+    min_age: Optional[str],
+    max_age: Optional[str],
+    threaded: bool,
+    threads: int,
+    case_sensitive: bool,
+    where: Optional[str],
+    keys_only: bool,
+    partition_column: Optional[str],
+    table_partitions: bool,
+    assume_unique_key: bool,
+    sample_exclusive_rows: bool,
+    materialize_all_rows: bool,
+    table_write_limit: int,
+    materialize_to_table: Optional[str],
+    checkpoint: Optional[str] = None,
+    resume: bool = False,
+    progress: Optional[DiffProgress] = None,
+    leaf_processes: Optional[int] = None,
+    prefetch_leaves: Optional[float] = None,
+    get_schema: Callable[[Tuple[Database, DbPath]], Dict[str, RawColumnInfo]] = _get_schema,
+) -> Tuple[TableDiffer, List[TableSegment]]:
+    "Creates the differ and the table segments of a diff, querying only the schemas"
+    options = {
+        "case_sensitive": case_sensitive,
+        "where": where,
+        "keys_only": keys_only,
+        "partition_column": partition_column,
+    }
+
+    _set_age(options, min_age, max_age, db1)
+    dbs: Tuple[Database, Database] = db1, db2
+
+    differ = _get_table_differ(
+        algorithm,
+        db1,
+        db2,
+        threaded,
+        threads,
+        assume_unique_key,
+        sample_exclusive_rows,
+        materialize_all_rows,
+        table_write_limit,
+        materialize_to_table,
+        bisection_factor,
+        bisection_threshold,
+        table_partitions,
+        checkpoint,
+        resume,
+        progress,
+        leaf_processes,
+        prefetch_leaves,
+    )
+
+    table_names = table1, table2
+    table_paths = [db.dialect.parse_table_name(t) for db, t in safezip(dbs, table_names)]
+
+    schemas = list(differ._thread_map(get_schema, safezip(dbs, table_paths)))
+    schema1, schema2 = schemas = [
+        create_schema(db.name, table_path, schema, case_sensitive)
+        for db, table_path, schema in safezip(dbs, table_paths, schemas)
+    ]
+
+    mutual = schema1.keys() & schema2.keys()  # Case-aware, according to case_sensitive
+    logging.debug(f"Available mutual columns: {mutual}")
+
+    expanded_columns = _get_expanded_columns(
+        columns, case_sensitive, mutual, db1, schema1, table1, db2, schema2, table2
+    )
+    columns = tuple(expanded_columns - {*key_columns, update_column})
+
+    if db1 == db2:
+        diff_schemas(
+            table_names[0],
+            table_names[1],
+            schema1,
+            schema2,
+            (
+                *key_columns,
+                update_column,
+                *columns,
+            ),
+        )
+
+    logging.info(f"Diffing using columns: key={key_columns} update={update_column} extra={columns}.")
+
+    segments = [
+        TableSegment(db, table_path, key_columns, update_column, columns, **options)._with_raw_schema(raw_schema)
+        for db, table_path, raw_schema in safezip(dbs, table_paths, schemas)
+    ]
+
+    return differ, segments
+
+
 def _data_diff(
     database1,
     table1,
@@ -506,12 +804,26 @@ def _data_diff(
     threads,
     case_sensitive,
     json_output,
+    json_stream,
     where,
+    keys_only,
+    partition_column,
+    table_partitions,
     assume_unique_key,
     sample_exclusive_rows,
     materialize_all_rows,
     table_write_limit,
     materialize_to_table,
+    sink,
+    checkpoint,
+    resume,
+    leaf_processes,
+    prefetch_leaves,
+    progress,
+    plan,
+    queue,
+    work_units,
+    workers,
     dbt,
     cloud,
     dbt_profiles_dir,
@@ -529,6 +841,7 @@ def _data_diff(
         return
 
     key_columns = key_columns or ("id",)
+    json_output = json_output or json_stream  # Without dbt, the JSONL output is already streamed
     threaded, threads = _get_threads(threads, threads1, threads2)
     start = time.monotonic()
 
@@ -541,78 +854,351 @@ def _data_diff(
     db1: Database
     db2: Database
     db1, db2 = _get_dbs(threads, database1, threads1, database2, threads2, interactive)
+    diff_progress = DiffProgress() if progress else None
     with db1, db2:
-        options = {
-            "case_sensitive": case_sensitive,
-            "where": where,
-        }
-
-        _set_age(options, min_age, max_age, db1)
-        dbs: Tuple[Database, Database] = db1, db2
-
-        differ = _get_table_differ(
-            algorithm,
+        differ, segments = _prepare_diff(
             db1,
             db2,
-            threaded,
-            threads,
-            assume_unique_key,
-            sample_exclusive_rows,
-            materialize_all_rows,
-            table_write_limit,
-            materialize_to_table,
-            bisection_factor,
-            bisection_threshold,
+            table1,
+            table2,
+            key_columns,
+            update_column,
+            columns,
+            algorithm=algorithm,
+            bisection_factor=bisection_factor,
+            bisection_threshold=bisection_threshold,
+            min_age=min_age,
+            max_age=max_age,
+            threaded=threaded,
+            threads=threads,
+            case_sensitive=case_sensitive,
+            where=where,
+            keys_only=keys_only,
+            partition_column=partition_column,
+            table_partitions=table_partitions,
+            assume_unique_key=assume_unique_key,
+            sample_exclusive_rows=sample_exclusive_rows,
+            materialize_all_rows=materialize_all_rows,
+            table_write_limit=table_write_limit,
+            materialize_to_table=materialize_to_table,
+            checkpoint=checkpoint,
+            resume=resume,
+            progress=diff_progress,
+            leaf_processes=leaf_processes,
+            prefetch_leaves=prefetch_leaves,
         )
 
-        table_names = table1, table2
-        table_paths = [db.dialect.parse_table_name(t) for db, t in safezip(dbs, table_names)]
-
-        schemas = list(differ._thread_map(_get_schema, safezip(dbs, table_paths)))
-        schema1, schema2 = schemas = [
-            create_schema(db.name, table_path, schema, case_sensitive)
-            for db, table_path, schema in safezip(dbs, table_paths, schemas)
-        ]
-
-        mutual = schema1.keys() & schema2.keys()  # Case-aware, according to case_sensitive
-        logging.debug(f"Available mutual columns: {mutual}")
-
-        expanded_columns = _get_expanded_columns(
-            columns, case_sensitive, mutual, db1, schema1, table1, db2, schema2, table2
-        )
-        columns = tuple(expanded_columns - {*key_columns, update_column})
-
-        if db1 == db2:
-            diff_schemas(
-                table_names[0],
-                table_names[1],
-                schema1,
-                schema2,
-                (
-                    *key_columns,
-                    update_column,
-                    *columns,
-                ),
+        if plan:
+            if not isinstance(differ, HashDiffer):
+                raise ValueError("--plan is only supported by hashdiff and hybrid. Use -a hashdiff.")
+            _print_plan(plan_diff(differ, *segments), json_output)
+            return
+
+        if queue:
+            if not isinstance(differ, HashDiffer):
+                raise ValueError("--queue is only supported by hashdiff and hybrid. Use -a hashdiff.")
+            if checkpoint or progress:
+                raise ValueError("--checkpoint and --progress are not supported with --queue")
+            # The workers diff the same tables and columns, at the same point in time
+            config = {
+                "database1": database1,
+                "table1": table1,
+                "database2": database2,
+                "table2": table2,
+                "key_columns": key_columns,
+                "update_column": update_column,
+                "columns": segments[0].extra_columns,
+                "algorithm": algorithm,
+                "bisection_factor": bisection_factor,
+                "bisection_threshold": bisection_threshold,
+                "min_update": segments[0].min_update,
+                "max_update": segments[0].max_update,
+                "threads": threads,
+                "threads1": threads1,
+                "threads2": threads2,
+                "case_sensitive": case_sensitive,
+                "where": where,
+                "keys_only": keys_only,
+                "partition_column": partition_column,
+                "table_partitions": table_partitions,
+                "assume_unique_key": assume_unique_key,
+                "sample_exclusive_rows": sample_exclusive_rows,
+                "materialize_all_rows": materialize_all_rows,
+                "table_write_limit": table_write_limit,
+                "materialize_to_table": materialize_to_table,
+                "leaf_processes": leaf_processes,
+                "prefetch_leaves": prefetch_leaves,
+                "no_tracking": no_tracking,
+            }
+            differ = DistributedDiffer(
+                threaded=threaded,
+                max_threadpool_size=threads,
+                queue=WorkQueue(queue),
+                config=config,
+                work_units=int(work_units),
+                local_workers=int(workers),
             )
 
-        logging.info(f"Diffing using columns: key={key_columns} update={update_column} extra={columns}.")
-
-        segments = [
-            TableSegment(db, table_path, key_columns, update_column, columns, **options)._with_raw_schema(raw_schema)
-            for db, table_path, raw_schema in safezip(dbs, table_paths, schemas)
-        ]
-
         diff_iter = differ.diff_tables(*segments)
+        sink_writer = None
+        if sink:
+            sink_writer = SinkWriter(make_sink(sink, db1), segments[0].relevant_columns)
+            diff_iter = attrs.evolve(diff_iter, diff=sink_writer.passthrough(diff_iter.diff))
 
         if limit:
             assert not stats
             diff_iter = islice(diff_iter, int(limit))
 
-        _print_result(stats, json_output, diff_iter)
+        progress_reporter = None
+        if progress:
+            printer = progress_event_printer() if progress == "json" else progress_bar_printer()
+            progress_reporter = ProgressReporter(diff_progress, printer)
+
+        with sink_writer or nullcontext(), progress_reporter or nullcontext():
+            _print_result(stats, json_output, diff_iter)
 
     end = time.monotonic()
     logging.info(f"Duration: {end-start:.2f} seconds.")
 
 
+def _print_plan(diff_plan: DiffPlan, json_output: bool) -> None:
+    if json_output:
+        print(json.dumps(diff_plan.as_dict(), default=str))
+    else:
+        print(diff_plan)
+
+
+def _prepare_pooled_differ(pool: DatabasePool, run_kw: dict) -> Tuple[TableDiffer, List[TableSegment]]:
+    "Creates the differ and the table segments of a run (as returned by the config), with connections from the pool"
+    threaded, threads = _get_threads(run_kw["threads"], run_kw.get("threads1"), run_kw.get("threads2"))
+    differ, segments = _prepare_diff(
+        pool.get(run_kw["database1"]),
+        pool.get(run_kw["database2"]),
+        run_kw["table1"],
+        run_kw["table2"],
+        run_kw["key_columns"] or ("id",),
+        run_kw["update_column"],
+        run_kw["columns"],
+        algorithm=run_kw["algorithm"],
+        bisection_factor=run_kw["bisection_factor"],
+        bisection_threshold=run_kw["bisection_threshold"],
+        min_age=run_kw.get("min_age"),
+        max_age=run_kw.get("max_age"),
+        threaded=threaded,
+        threads=threads,
+        case_sensitive=run_kw["case_sensitive"],
+        where=run_kw["where"],
+        keys_only=run_kw["keys_only"],
+        partition_column=run_kw["partition_column"],
+        table_partitions=run_kw["table_partitions"],
+        assume_unique_key=run_kw["assume_unique_key"],
+        sample_exclusive_rows=run_kw["sample_exclusive_rows"],
+        materialize_all_rows=run_kw["materialize_all_rows"],
+        table_write_limit=run_kw["table_write_limit"],
+        materialize_to_table=run_kw["materialize_to_table"],
+        checkpoint=run_kw.get("checkpoint"),
+        resume=run_kw.get("resume", False),
+        leaf_processes=run_kw.get("leaf_processes"),
+        prefetch_leaves=run_kw.get("prefetch_leaves"),
+        get_schema=pool.get_schema,
+    )
+    return differ, segments
+
+
+def _prepare_pooled_diff(pool: DatabasePool, run_kw: dict) -> Tuple[DiffResultWrapper, List[TableSegment]]:
+    "Prepares the diff of a run (as returned by the config), with connections from the pool"
+    differ, segments = _prepare_pooled_differ(pool, run_kw)
+    return differ.diff_tables(*segments), segments
+
+
+def _diff_batch_run(pool: DatabasePool, run_kw: dict) -> Tuple[dict, str]:
+    if run_kw["limit"]:
+        raise ValueError("Cannot specify a limit in batch mode")
+
+    diff_iter, segments = _prepare_pooled_diff(pool, run_kw)
+
+    sink_writer = None
+    if run_kw["sink"]:
+        sink_writer = SinkWriter(make_sink(run_kw["sink"], segments[0].database), segments[0].relevant_columns)
+        diff_iter = attrs.evolve(diff_iter, diff=sink_writer.passthrough(diff_iter.diff))
+
+    with sink_writer or nullcontext():
+        stats = diff_iter.get_stats_dict()
+    return stats, diff_iter.get_stats_string()
+
+
+def _get_batch_thread_counts(runs: Dict[str, dict]) -> Dict[Hashable, int]:
+    "Size the threadpool of each database for the most demanding run that uses it, as in a single run"
+    thread_counts = {}
+    for run_kw in runs.values():
+        _threaded, threads = _get_threads(run_kw["threads"], run_kw.get("threads1"), run_kw.get("threads2"))
+        for i in "12":
+            key = database_key(run_kw[f"database{i}"])
+            thread_counts[key] = max(thread_counts.get(key, 1), run_kw.get(f"threads{i}") or threads)
+    return thread_counts
+
+
+def _batch_diff(
+    runs: Dict[str, dict], json_output: bool, max_concurrent_diffs: int, max_diffs_per_database: int
+) -> None:
+    """Diff all the runs in one process, with a connection pool shared between them.
+
+    Each database gets a single pool of connections, sized for the most demanding run that uses it,
+    and the scheduler bounds how many runs use each database at once.
+    """
+    start = time.monotonic()
+    if any(run_kw["interactive"] for run_kw in runs.values()):
+        raise ValueError("Interactive mode is not supported in batch mode")
+    checkpoints = [run_kw["checkpoint"] for run_kw in runs.values() if run_kw["checkpoint"]]
+    if len(set(checkpoints)) < len(checkpoints):
+        raise ValueError("Each run must have its own checkpoint file")
+    if any(run_kw["progress"] or run_kw["plan"] or run_kw["queue"] for run_kw in runs.values()):
+        raise ValueError("--progress, --plan and --queue are not supported in batch mode")
+
+    scheduler = BatchScheduler(int(max_concurrent_diffs), int(max_diffs_per_database))
+    failed = 0
+    with DatabasePool(thread_counts=_get_batch_thread_counts(runs)) as pool:
+        tasks = [
+            BatchTask(
+                name,
+                partial(_diff_batch_run, pool, run_kw),
+                databases=(database_key(run_kw["database1"]), database_key(run_kw["database2"])),
+                priority=int(run_kw.get("priority") or 0),
+            )
+            for name, run_kw in runs.items()
+        ]
+        for res in scheduler.run(tasks):
+            if res.error is not None:
+                failed += 1
+                logging.error(f"Run '{res.name}' failed: {res.error}")
+                if json_output:
+                    print(json.dumps({"run": res.name, "error": str(res.error)}))
+                continue
+
+            stats_dict, stats_string = res.result
+            if json_output:
+                print(json.dumps({"run": res.name, **stats_dict}))
+            else:
+                rich.print(f"[bold]{res.name}[/bold]")
+                rich.print(stats_string)
+            sys.stdout.flush()
+
+    end = time.monotonic()
+    logging.info(f"Diffed {len(runs)} runs in {end-start:.2f} seconds.")
+    if failed:
+        logging.error(f"{failed} of {len(runs)} runs failed.")
+        sys.exit(1)
+
+
+# Options that a request to the server may set. The rest are fixed when the server starts.
+_SERVER_REQUEST_OPTIONS = {
+    "run",
+    "database1",
+    "table1",
+    "database2",
+    "table2",
+    "key_columns",
+    "update_column",
+    "columns",
+    "limit",
+    "stats",
+    "algorithm",
+    "bisection_factor",
+    "bisection_threshold",
+    "min_age",
+    "max_age",
+    "threads",
+    "case_sensitive",
+    "where",
+    "keys_only",
+    "partition_column",
+    "table_partitions",
+    "assume_unique_key",
+    "sample_exclusive_rows",
+}
+
+
+def _server_diff(pool: DatabasePool, config: dict, defaults: dict, request: dict) -> Iterator:
+    """Handles a diff request to the server.
+
+    Sets up the diff eagerly, so that invalid requests fail before the response starts,
+    and returns a generator of the response lines: the diff rows, as in --json, followed by the stats.
+    """
+    unknown = request.keys() - _SERVER_REQUEST_OPTIONS
+    if unknown:
+        raise BadRequest(f"Unknown option(s): {', '.join(sorted(unknown))}")
+
+    # Requests only connect to the databases that the server was started with, never to arbitrary URIs
+    databases = config.get("database", {})
+    for field in ("database1", "database2"):
+        if request.get(field) is not None and request[field] not in databases:
+            raise BadRequest(f"Unknown database: '{request[field]}'. Available: {list(databases)}")
+
+    request = dict(request)
+    run_name = request.pop("run", None)
+    if request.get("database1") and not request.get("database2"):
+        request["database2"] = request["database1"]
+    for field in ("key_columns", "columns"):
+        if isinstance(request.get(field), str):
+            request[field] = (request[field],)
+        elif isinstance(request.get(field), list):
+            request[field] = tuple(request[field])
+
+    run_kw = apply_config(config, run_name, {**defaults, **request})
+    if run_kw["limit"] and run_kw["stats"]:
+        raise BadRequest("Cannot specify a limit when requesting stats")
+    diff_iter, _segments = _prepare_pooled_diff(pool, run_kw)
+    return _server_diff_lines(diff_iter, run_kw["stats"], run_kw["limit"])
+
+
+def _server_diff_lines(diff_iter: DiffResultWrapper, stats: bool, limit: Optional[int]) -> Iterator:
+    if not stats:
+        rows = islice(diff_iter, int(limit)) if limit else diff_iter
+        for op, values in rows:
+            yield [op, list(values)]
+
+    if not limit:
+        yield {"stats": diff_iter.get_stats_dict()}
+
+
+def _serve(address: str, config: dict, defaults: dict) -> None:
+    if defaults["checkpoint"] or defaults["progress"] or defaults["plan"] or defaults["queue"]:
+        raise ValueError("--checkpoint, --progress, --plan and --queue are not supported with --serve")
+    _threaded, threads = _get_threads(defaults["threads"], None, None)
+    host, port = parse_address(address)
+    # Every database of the configuration, and of the command line (directly, or as the default run)
+    max_databases = len(config.get("database", {})) + 2 * len(config.get("run", {})) + 2
+    with DatabasePool(threads, schema_ttl=DEFAULT_SCHEMA_TTL, max_databases=max_databases) as pool:
+        server = DiffServer((host, port), partial(_server_diff, pool, config, defaults))
+        rich.print(f"data-diff v{__version__} listening on http://{host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+
+def _prepare_work(pool: DatabasePool, config: dict) -> Tuple[TableDiffer, List[TableSegment]]:
+    "Creates the differ and the segments of a distributed diff, as configured by its coordinator"
+    if config["no_tracking"]:
+        disable_tracking()
+    threads1, threads2 = config["threads1"], config["threads2"]
+    pool.thread_count = max(_get_threads(config["threads"], threads1, threads2)[1], threads1 or 0, threads2 or 0)
+
+    run_kw = {**config, "key_columns": tuple(config["key_columns"]), "columns": tuple(config["columns"])}
+    differ, segments = _prepare_pooled_differ(pool, run_kw)
+    # Filter by the same update times as the coordinator, rather than by age
+    update_bounds = {k: config[k] and datetime.fromisoformat(config[k]) for k in ("min_update", "max_update")}
+    return differ, [s.new(**update_bounds) for s in segments]
+
+
+def _work(queue_path: str) -> None:
+    start = time.monotonic()
+    with DatabasePool() as pool:
+        diffed = run_worker(WorkQueue(queue_path), partial(_prepare_work, pool))
+    logging.info(f"Diffed {diffed} work units in {time.monotonic() - start:.2f} seconds.")
+
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,206 @@
+"""Runs many diffs in one process, sharing the database connections between them, under a single scheduler"""
+
+import json
+import queue
+import threading
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Tuple, Union
+
+import attrs
+
+from data_diff.abcs.database_types import DbPath
+from data_diff.databases._connect import connect
+from data_diff.databases.base import Database
+from data_diff.schema import RawColumnInfo
+
+DEFAULT_MAX_CONCURRENT_DIFFS = 4
+DEFAULT_MAX_DIFFS_PER_DATABASE = 2
+
+
+def database_key(db_conf: Union[str, dict]) -> Hashable:
+    "Returns a key that identifies the database of the given URI or dict of connection options"
+    if isinstance(db_conf, dict):
+        return json.dumps(db_conf, sort_keys=True, default=str)
+    return db_conf
+
+
+@attrs.define(frozen=False, eq=False)
+class DatabasePool:
+    """Connects to each distinct database once, and shares the connection between all the diffs that use it.
+
+    Unlike the cache of ``connect()``, the pool keeps its connections alive until it's closed,
+    even when no diff is currently using them.
+
+    Parameters:
+        thread_count (int): Size of the threadpool of each connection. Bounds the number of concurrent queries
+                            to each database, across all the diffs.
+        thread_counts (dict): Size of the threadpool of specific databases, by `database_key()`, instead of
+                              `thread_count`.
+        schema_ttl (float, optional): For how many seconds to cache the schema of each table (see `get_schema()`).
+                                      ``None`` means the schemas are queried every time.
+        max_databases (int, optional): How many distinct databases the pool may connect to. Beyond that,
+                                       ``get()`` raises a ValueError instead of opening another connection.
+    """
+
+    thread_count: int = 1
+    thread_counts: Dict[Hashable, int] = attrs.field(factory=dict)
+    schema_ttl: Optional[float] = None
+    max_databases: Optional[int] = None
+
+    _databases: Dict[Hashable, Database] = attrs.field(factory=dict, init=False)
+    _schemas: Dict[Tuple[int, DbPath], Tuple[float, Dict[str, RawColumnInfo]]] = attrs.field(factory=dict, init=False)
+    _lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+
+    def get(self, db_conf: Union[str, dict]) -> Database:
+        key = database_key(db_conf)
+        with self._lock:
+            if key not in self._databases:
+                if self.max_databases is not None and len(self._databases) >= self.max_databases:
+                    raise ValueError(f"Too many databases (the pool is limited to {self.max_databases})")
+                thread_count = self.thread_counts.get(key, self.thread_count)
+                self._databases[key] = connect(db_conf, thread_count, shared=False)
+            return self._databases[key]
+
+    def get_schema(self, pair: Tuple[Database, DbPath]) -> Dict[str, RawColumnInfo]:
+        "Returns the raw schema of the table, from the cache if it's fresh enough"
+        db, path = pair
+        if self.schema_ttl is None:
+            return db.query_table_schema(path)
+
+        # Keyed by id(), because the pool holds a reference to every database for as long as the cache exists
+        key = id(db), path
+        with self._lock:
+            cached = self._schemas.get(key)
+        if cached is not None and time.monotonic() - cached[0] < self.schema_ttl:
+            return cached[1]
+
+        schema = db.query_table_schema(path)
+        with self._lock:
+            self._schemas[key] = time.monotonic(), schema
+        return schema
+
+    def close(self) -> None:
+        with self._lock:
+            for db in self._databases.values():
+                db.close()
+            self._databases.clear()
+            self._schemas.clear()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+@attrs.define(frozen=True)
+class BatchTask:
+    """A unit of work for the scheduler.
+
+    Parameters:
+        name (str): Identifies the task in the results.
+        func (Callable): Called without arguments, from a worker thread. Its return value is the result of the task.
+        databases (Tuple[Hashable, ...]): Keys of the databases that the task uses (see `database_key()`).
+        priority (int): Tasks with a higher priority are started first. Ties are started in order.
+    """
+
+    name: str
+    func: Callable[[], Any] = attrs.field(eq=False)
+    databases: Tuple[Hashable, ...] = ()
+    priority: int = 0
+
+
+@attrs.define(frozen=True)
+class BatchResult:
+    task: BatchTask
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def name(self) -> str:
+        return self.task.name
+
+
+@attrs.define(frozen=False, eq=False)
+class BatchScheduler:
+    """Runs tasks on a shared set of worker threads, highest priority first.
+
+    A task is only started when every database it uses has fewer than `max_per_database` running tasks.
+    Meanwhile, tasks of a lower priority that use other databases may overtake it, so that a busy database
+    never holds up the rest of the batch.
+
+    Parameters:
+        max_workers (int): Maximum number of tasks running at once.
+        max_per_database (int): Maximum number of tasks running at once, that use the same database.
+    """
+
+    max_workers: int = DEFAULT_MAX_CONCURRENT_DIFFS
+    max_per_database: int = DEFAULT_MAX_DIFFS_PER_DATABASE
+
+    _pending: List[BatchTask] = attrs.field(factory=list, init=False)
+    _active: Counter = attrs.field(factory=Counter, init=False)
+    _cond: threading.Condition = attrs.field(factory=threading.Condition, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        if self.max_workers < 1 or self.max_per_database < 1:
+            raise ValueError("max_workers and max_per_database must be at least 1")
+
+    def _claim_next(self) -> Optional[BatchTask]:
+        # Called with _cond held. _pending is sorted by priority.
+        for i, task in enumerate(self._pending):
+            dbs = set(task.databases)
+            if all(self._active[db] < self.max_per_database for db in dbs):
+                del self._pending[i]
+                self._active.update(dbs)
+                return task
+        return None
+
+    def _worker(self, results: queue.Queue) -> None:
+        while True:
+            with self._cond:
+                task = None
+                while self._pending and task is None:
+                    task = self._claim_next()
+                    if task is None:
+                        self._cond.wait()
+                if task is None:
+                    return
+
+            try:
+                result = BatchResult(task, result=task.func())
+            except BaseException as e:  # Including SystemExit, so that run() still gets a result for the task
+                result = BatchResult(task, error=e)
+
+            with self._cond:
+                self._active.subtract(set(task.databases))
+                self._cond.notify_all()
+            results.put(result)
+
+    def run(self, tasks: Iterable[BatchTask]) -> Iterator[BatchResult]:
+        """Run the tasks, and yield their results in order of completion.
+
+        A failed task doesn't stop the batch. Its exception is returned in `BatchResult.error`.
+        If the iteration is stopped early, the tasks that haven't started yet are cancelled.
+        """
+        tasks = sorted(tasks, key=lambda t: -t.priority)  # Stable, so ties keep their order
+        results = queue.Queue()
+        with self._cond:
+            self._pending.extend(tasks)
+
+        workers = [
+            threading.Thread(target=self._worker, args=(results,), name=f"data-diff-batch-{i}", daemon=True)
+            for i in range(min(self.max_workers, len(tasks)))
+        ]
+        for w in workers:
+            w.start()
+
+        try:
+            for _ in tasks:
+                yield results.get()
+        finally:
+            with self._cond:
+                self._pending.clear()
+                self._cond.notify_all()
+            for w in workers:
+                w.join()
@@ -0,0 +1,122 @@
+"""Records the progress of a diff in a local file, so that an interrupted diff can be resumed"""
+
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, IO, Optional
+
+import attrs
+
+from data_diff.table_segment import TableSegment
+
+logger = logging.getLogger("checkpoint")
+
+CHECKPOINT_VERSION = 1
+
+# How often to fsync the checkpoint file. Every line is flushed regardless, so only a machine crash can lose lines.
+DEFAULT_SYNC_INTERVAL = 10.0
+
+
+def segment_key(table: TableSegment) -> str:
+    "Identifies a segment by its bounds (and partition), which are the same every time a diff is bisected"
+    partition = [str(table.partition_value)] if table.is_partition else []
+    return json.dumps([partition, [str(k) for k in table.min_key], [str(k) for k in table.max_key]])
+
+
+@attrs.define(frozen=False, eq=False)
+class Checkpoint:
+    """Records the outcome of each segment of a diff in a JSONL file, as the segments complete.
+
+    The first line identifies the diff, and each following line records one segment: its key bounds,
+    its row counts, and its checksums or its diff. When resuming, the recorded segments are replayed
+    instead of queried, and only the unfinished segments are diffed again.
+
+    Parameters:
+        path (str): Path of the checkpoint file.
+        resume (bool): Load the segments recorded in an existing file, and append to it.
+                       Otherwise, the file is overwritten.
+        sync_interval (float): How often to fsync the file, in seconds.
+    """
+
+    path: str
+    resume: bool = False
+    sync_interval: float = DEFAULT_SYNC_INTERVAL
+
+    _segments: Dict[str, Dict[str, Any]] = attrs.field(factory=dict, init=False)
+    _file: Optional[IO] = attrs.field(default=None, init=False)
+    _lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+    _last_sync: float = attrs.field(default=0.0, init=False)
+
+    def open(self, fingerprint: Dict[str, Any]) -> None:
+        """Open the checkpoint file for the diff identified by `fingerprint`.
+
+        Raises ValueError when resuming from a file that was written for a different diff.
+        """
+        header = {"version": CHECKPOINT_VERSION, "diff": fingerprint}
+        header = json.loads(json.dumps(header, default=str))  # Normalized, to compare with the file
+
+        if self.resume and os.path.exists(self.path):
+            self._load(header)
+            self._file = open(self.path, "a", encoding="utf-8")
+        else:
+            self._file = open(self.path, "w", encoding="utf-8")
+            self._file.write(json.dumps(header) + "\n")
+            self._file.flush()
+        self._last_sync = time.monotonic()
+
+    def _load(self, header: Dict[str, Any]) -> None:
+        with open(self.path, encoding="utf-8") as f:
+            lines = f.readlines()
+        if not lines:
+            raise ValueError(f"Checkpoint file '{self.path}' is empty")
+
+        if json.loads(lines[0]) != header:
+            raise ValueError(
+                f"Checkpoint file '{self.path}' was written for a different diff (tables, columns or options). "
+                "Remove it, or run without resuming."
+            )
+
+        for i, line in enumerate(lines[1:], 2):
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                if i == len(lines):
+                    # The last line was cut short by the interruption, so its segment is diffed again
+                    logger.warning(f"Ignoring an incomplete line at the end of checkpoint file '{self.path}'")
+                    continue
+                raise ValueError(f"Checkpoint file '{self.path}' is corrupt at line {i}")
+            self._segments[entry["segment"]] = entry
+
+        if not lines[-1].endswith("\n"):
+            # Make sure the next line starts on a line of its own
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write("\n")
+
+        logger.info(f"Resuming from checkpoint '{self.path}', with {len(self._segments)} recorded segments")
+
+    def get(self, table: TableSegment) -> Optional[Dict[str, Any]]:
+        "Returns what was recorded for the segment, if it was recorded before resuming"
+        return self._segments.get(segment_key(table))
+
+    def record(self, table: TableSegment, status: str, **entry: Any) -> None:
+        "Record the outcome of a segment"
+        line = json.dumps({"segment": segment_key(table), "status": status, **entry}, default=str) + "\n"
+        with self._lock:
+            if self._file is None:
+                return  # Closed, because the diff was interrupted while this segment was running
+            self._file.write(line)
+            self._file.flush()
+            now = time.monotonic()
+            if now - self._last_sync >= self.sync_interval:
+                os.fsync(self._file.fileno())
+                self._last_sync = now
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._file.close()
+                self._file = None
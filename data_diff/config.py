@@ -1,6 +1,8 @@
+import json
 import re
 import os
-from typing import Any, Dict
+from copy import deepcopy
+from typing import Any, Dict, Optional
 import toml
 
 
@@ -118,6 +120,16 @@ def _replace_match(match: re.Match) -> str:
     return os.environ.get(referenced_var, "")
 
 
+def load_config_file(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return toml.load(f)
+
+
+def apply_config(config: Dict[str, Any], run_name: Optional[str], kw: Dict[str, Any]):
+    "Like apply_config_from_file(), for a configuration that's already loaded. The configuration isn't modified."
+    return _apply_config(deepcopy(config), run_name, dict(kw))
+
+
 def apply_config_from_file(path: str, run_name: str, kw: Dict[str, Any]):
     with open(path) as f:
         return _apply_config(toml.load(f), run_name, kw)
@@ -125,3 +137,31 @@ def apply_config_from_file(path: str, run_name: str, kw: Dict[str, Any]):
 
 def apply_config_from_string(toml_config: str, run_name: str, kw: Dict[str, Any]):
     return _apply_config(toml.loads(toml_config), run_name, kw)
+
+
+def _apply_batch_config(config: Dict[str, Any], kw: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+    runs = config.get("run", {})
+    run_names = [name for name in runs if name != "default"]
+    if not run_names:
+        raise ConfigParseError("Batch mode requires at least one run, besides 'default'.")
+
+    return {name: apply_config(config, name, kw) for name in run_names}
+
+
+def apply_batch_config_from_files(conf_path: Optional[str], manifest_path: Optional[str], kw: Dict[str, Any]):
+    """Returns the arguments for every run (except 'default'), by run name.
+
+    The manifest is a JSON file with the same structure as the TOML configuration. When both are given,
+    the runs are taken from the manifest, and the databases and the 'default' run from both.
+    """
+    config = load_config_file(conf_path) if conf_path else {}
+    if manifest_path:
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        config["database"] = {**config.get("database", {}), **manifest.pop("database", {})}
+        runs = manifest.pop("run", {})
+        default = {**config.get("run", {}).get("default", {}), **runs.pop("default", {})}
+        config["run"] = {"default": default, **runs}
+        if manifest:
+            raise ConfigParseError(f"Unknown option(s) in manifest: {manifest}")
+    return _apply_batch_config(config, kw)
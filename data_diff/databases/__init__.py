@@ -15,3 +15,4 @@ from data_diff.databases.clickhouse import Clickhouse as Clickhouse
 from data_diff.databases.vertica import Vertica as Vertica
 from data_diff.databases.duckdb import DuckDB as DuckDB
 from data_diff.databases.mssql import MsSQL as MsSQL
+from data_diff.databases.files import Files as Files
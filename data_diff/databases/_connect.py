@@ -23,6 +23,7 @@ from data_diff.databases.trino import Trino
 from data_diff.databases.clickhouse import Clickhouse
 from data_diff.databases.vertica import Vertica
 from data_diff.databases.duckdb import DuckDB
+from data_diff.databases.files import Files
 from data_diff.databases.mssql import MsSQL
 
 
@@ -86,6 +87,7 @@ DATABASE_BY_SCHEME = {
     "bigquery": BigQuery,
     "databricks": Databricks,
     "duckdb": DuckDB,
+    "file": Files,
     "trino": Trino,
     "clickhouse": Clickhouse,
     "vertica": Vertica,
@@ -134,8 +136,17 @@ class Connect:
         - clickhouse
         - vertica
         - duckdb
+        - file (a local directory of Parquet/CSV/JSON/Arrow files, e.g. file://path/to/dir)
         """
 
+        if db_uri.startswith("file://"):
+            # Not a regular DSN: everything after the scheme is a local path, possibly absolute (file:///data)
+            try:
+                cls = self.database_by_scheme["file"]
+            except KeyError:
+                raise NotImplementedError("Scheme 'file' currently not supported")
+            return self._connection_created(cls(directory=db_uri[len("file://") :] or ".", **kwargs))
+
         dsn = dsnparse.parse(db_uri)
         if len(dsn.schemes) > 1:
             raise NotImplementedError("No support for multiple schemes")
@@ -1,7 +1,8 @@
 import abc
 import functools
 import random
-from datetime import datetime
+import re
+from datetime import date, datetime
 import math
 import sys
 import logging
@@ -11,6 +12,7 @@ from typing import (
     ClassVar,
     Dict,
     Generator,
+    Iterable,
     Iterator,
     NewType,
     Tuple,
@@ -34,9 +36,9 @@ from typing_extensions import Self
 
 from data_diff.abcs.compiler import AbstractCompiler, Compilable
 from data_diff.queries.extras import ApplyFuncAndNormalizeAsString, Checksum, NormalizeAsString
-from data_diff.schema import RawColumnInfo
-from data_diff.utils import ArithString, ArithUUID, is_uuid, join_iter, safezip
-from data_diff.queries.api import Expr, table, Select, SKIP, Explain, Code, this
+from data_diff.schema import RawColumnInfo, TableStatistics
+from data_diff.utils import ArithString, ArithUUID, batched, is_uuid, join_iter, safezip
+from data_diff.queries.api import Expr, table, Select, SKIP, Explain, Code, commit, insert_rows_in_batches, this
 from data_diff.queries.ast_classes import (
     Alias,
     BinOp,
@@ -93,6 +95,9 @@ from data_diff.abcs.database_types import (
 )
 
 logger = logging.getLogger("database")
+
+# Rows per batch, when bulk-inserting with executemany() or multi-row INSERTs
+DEFAULT_BULK_BATCH_SIZE = 1024 * 8
 cv_params = contextvars.ContextVar("params")
 
 
@@ -204,6 +209,59 @@ class ThreadLocalInterpreter:
                 break
 
 
+def _placeholder(paramstyle: str, index: int) -> str:
+    "Returns the placeholder for a query parameter, in the given DB-API paramstyle"
+    if paramstyle == "qmark":
+        return "?"
+    elif paramstyle in ("format", "pyformat"):
+        return "%s"
+    elif paramstyle == "numeric":
+        return f":{index + 1}"
+    raise ValueError(f"Unsupported paramstyle: {paramstyle}")
+
+
+def csv_row(row: Sequence[Any]) -> str:
+    """Format a row as a line of CSV, for bulk loading.
+
+    NULL is written as an empty field, and every other value is quoted, so that an empty string
+    stays distinct from NULL. (That's how PostgreSQL's and Snowflake's CSV loaders read it)
+    """
+    return ",".join("" if v is None else '"' + str(v).replace('"', '""') + '"' for v in row) + "\n"
+
+
+class CsvRowsReader:
+    """A read-only text file, that formats the rows as CSV lazily, as it's being read.
+
+    Allows streaming any iterable of rows into a bulk loader (e.g. COPY FROM STDIN), without materializing it.
+    """
+
+    def __init__(self, rows: Iterable[Sequence[Any]]) -> None:
+        self._lines = map(csv_row, rows)
+        self._rest = ""
+
+    def read(self, size: int = -1) -> str:
+        chunks = [self._rest]
+        length = len(self._rest)
+        for line in self._lines:
+            chunks.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+
+        data = "".join(chunks)
+        if size < 0:
+            self._rest = ""
+            return data
+        self._rest = data[size:]
+        return data[:size]
+
+    def readline(self, size: int = -1) -> str:
+        if self._rest:
+            line, self._rest = self._rest, ""
+            return line
+        return next(self._lines, "")
+
+
 def apply_query(callback: Callable[[str], Any], sql_code: Union[str, ThreadLocalInterpreter]) -> list:
     if isinstance(sql_code, ThreadLocalInterpreter):
         return sql_code.apply_queries(callback)
@@ -216,6 +274,7 @@ class BaseDialect(abc.ABC):
     SUPPORTS_PRIMARY_KEY: ClassVar[bool] = False
     SUPPORTS_INDEXES: ClassVar[bool] = False
     PREVENT_OVERFLOW_WHEN_CONCAT: ClassVar[bool] = False
+    SUPPORTS_NATIVE_CHECKSUM: ClassVar[bool] = False  # see native_hash_as_int()
     TYPE_CLASSES: ClassVar[Dict[str, Type[ColType]]] = {}
     DEFAULT_NUMERIC_PRECISION: ClassVar[int] = 0  # effective precision when type is just "NUMERIC"
 
@@ -258,10 +317,12 @@ class BaseDialect(abc.ABC):
             return self.render_coltype(attrs.evolve(compiler, root=False), elem)
         elif isinstance(elem, str):
             return f"'{elem}'"
-        elif isinstance(elem, (int, float)):
+        elif isinstance(elem, (int, float, decimal.Decimal)):
             return str(elem)
         elif isinstance(elem, datetime):
             return self.timestamp_value(elem)
+        elif isinstance(elem, date):
+            return f"'{elem.isoformat()}'"
         elif isinstance(elem, bytes):
             return f"b'{elem.decode()}'"
         elif isinstance(elem, ArithUUID):
@@ -417,6 +478,8 @@ class BaseDialect(abc.ABC):
             # No need to coalesce - safe to assume that key cannot be null
             (expr,) = elem.exprs
         expr = self.compile(c, expr)
+        if elem.native and self.SUPPORTS_NATIVE_CHECKSUM:
+            return self.native_checksum_agg(expr)
         md5 = self.md5_as_int(expr)
         return f"sum({md5})"
 
@@ -804,6 +867,23 @@ class BaseDialect(abc.ABC):
     def md5_as_hex(self, s: str) -> str:
         """Method to calculate MD5"""
 
+    def native_hash_as_int(self, s: str) -> str:
+        """Provide SQL for computing a fast engine-native 64-bit hash, returning an int that can be summed.
+
+        Unlike md5_as_int(), the result is only comparable between databases of the same engine.
+        Only used when SUPPORTS_NATIVE_CHECKSUM is true.
+        """
+        raise NotImplementedError(f"{self.name} has no native checksum support")
+
+    def native_checksum_agg(self, s: str) -> str:
+        """Provide SQL for an order-independent aggregate hash of 's' over all rows, using native functions.
+
+        Only used when SUPPORTS_NATIVE_CHECKSUM is true. Must return NULL or 0 when there are no rows.
+        Must not let identical rows cancel out (as XOR does), since duplicate rows are allowed.
+        Dialects with a built-in aggregate hash should override this.
+        """
+        return f"sum({self.native_hash_as_int(s)})"
+
     @abstractmethod
     def normalize_timestamp(self, value: str, coltype: TemporalType) -> str:
         """Creates an SQL expression, that converts 'value' to a normalized timestamp.
@@ -931,6 +1011,10 @@ class Database(abc.ABC):
 
     SUPPORTS_ALPHANUMS: ClassVar[bool] = True
     SUPPORTS_UNIQUE_CONSTAINT: ClassVar[bool] = False
+    SUPPORTS_PARTITIONS: ClassVar[bool] = False
+    SUPPORTS_TABLE_STATISTICS: ClassVar[bool] = False
+    # The DB-API paramstyle of the driver, if its executemany() is efficient. See insert_rows_bulk()
+    PARAMSTYLE: ClassVar[Optional[str]] = None
     CONNECT_URI_KWPARAMS: ClassVar[List[str]] = []
 
     default_schema: Optional[str] = None
@@ -1082,6 +1166,53 @@ class Database(abc.ABC):
         res = self.query(self.select_table_unique_columns(path), List[str], log_message=path)
         return list(res)
 
+    def select_table_partition_column(self, path: DbPath) -> str:
+        """Provide SQL for selecting the partitioning expression of the table, from the catalog"""
+        raise NotImplementedError()
+
+    def query_table_partition_column(self, path: DbPath) -> Optional[str]:
+        """Query the catalog for the column that the table in 'path' is partitioned by.
+
+        Returns None if the table isn't partitioned by a single column, or if the database doesn't support it.
+        """
+        if not self.SUPPORTS_PARTITIONS:
+            return None
+        res = self.query(self.select_table_partition_column(path), list, log_message=path)
+        if not res or not res[0][0]:
+            return None
+        return self._parse_partition_column(res[0][0])
+
+    def select_table_statistics(self, path: DbPath) -> str:
+        """Provide SQL for selecting the estimated row count and size in bytes of the table, from the catalog"""
+        raise NotImplementedError()
+
+    def query_table_statistics(self, path: DbPath) -> Optional[TableStatistics]:
+        """Query the catalog for the estimated size of the table in 'path', without scanning it.
+
+        Returns None if the table isn't in the catalog, or if the database doesn't support it.
+        """
+        if not self.SUPPORTS_TABLE_STATISTICS:
+            return None
+        res = self.query(self.select_table_statistics(path), list, log_message=path)
+        if not res:
+            return None
+
+        # Some catalogs use -1 for unknown (e.g. a table that was never analyzed)
+        row_count, size_bytes = (int(v) if v is not None and int(v) >= 0 else None for v in res[0])
+        return TableStatistics(row_count, size_bytes)
+
+    def estimate_query_bytes(self, sql_ast: Union[Expr, str]) -> Optional[int]:
+        """Estimate how many bytes the query would scan, without running it (e.g. with a dry run).
+
+        Returns None if the database can't estimate it.
+        """
+        return None
+
+    def _parse_partition_column(self, partition_expr: str) -> Optional[str]:
+        # Only plain columns can be filtered on, e.g. not 'toYYYYMM(created_at)'
+        m = re.fullmatch(r'\s*[`"]?(\w+)[`"]?\s*', partition_expr)
+        return m.group(1) if m else None
+
     def _process_table_schema(
         self,
         path: DbPath,
@@ -1159,6 +1290,43 @@ class Database(abc.ABC):
 
         return col_dict
 
+    def insert_rows_bulk(
+        self,
+        path: DbPath,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        """Insert the given rows into an existing table, and commit them.
+
+        Accepts any iterable, and consumes it lazily, in batches of `batch_size` rows.
+
+        Uses the driver's executemany() when the database declares its PARAMSTYLE, and multi-row INSERT
+        statements otherwise. Databases that have a native bulk-loading path (e.g. COPY) override this method.
+        """
+        if self.PARAMSTYLE is None:
+            insert_rows_in_batches(self, table(path), rows, columns=columns, batch_size=batch_size)
+            self.query(commit)
+            return
+
+        name = ".".join(map(self.dialect.quote, path))
+        cols = ", ".join(map(self.dialect.quote, columns))
+        placeholders = ", ".join(_placeholder(self.PARAMSTYLE, i) for i in range(len(columns)))
+        sql = f"INSERT INTO {name} ({cols}) VALUES ({placeholders})"
+
+        def executemany(conn, batch):
+            conn.cursor().executemany(sql, batch)
+            if not self.is_autocommit:
+                conn.commit()
+
+        for batch in batched(rows, batch_size):
+            batch = [tuple(str(v) if isinstance(v, UUID) else v for v in row) for row in batch]
+            self._apply_to_conn(partial(executemany, batch=batch))
+
+    def _apply_to_conn(self, f: Callable[[Any], Any]) -> Any:
+        """Call f(connection) with a connection that's safe to use. Used for driver APIs that aren't covered by SQL"""
+        raise NotImplementedError(f"{self.name} doesn't expose its connection")
+
     def _normalize_table_path(self, path: DbPath) -> DbPath:
         if len(path) == 1:
             return self.default_schema, path[0]
@@ -1253,6 +1421,16 @@ class ThreadedDatabase(Database):
             raise self._init_error
         return self._query_conn(self.thread_local.conn, sql_code)
 
+    def _apply_to_conn(self, f: Callable[[Any], Any]) -> Any:
+        "Call f(connection) in a worker thread"
+        return self._queue.submit(self._apply_in_worker, f).result()
+
+    def _apply_in_worker(self, f: Callable[[Any], Any]) -> Any:
+        """This method runs in a worker thread"""
+        if self._init_error:
+            raise self._init_error
+        return f(self.thread_local.conn)
+
     @abstractmethod
     def create_connection(self):
         """Return a connection instance, that supports the .cursor() method."""
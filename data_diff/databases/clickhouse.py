@@ -1,4 +1,4 @@
-from typing import Any, ClassVar, Dict, Optional, Type
+from typing import Any, ClassVar, Dict, Iterable, Optional, Sequence, Type
 
 import attrs
 
@@ -11,6 +11,7 @@ from data_diff.databases.base import (
     ThreadedDatabase,
     import_helper,
     ConnectError,
+    DEFAULT_BULK_BATCH_SIZE,
 )
 from data_diff.abcs.database_types import (
     ColType,
@@ -26,6 +27,7 @@ from data_diff.abcs.database_types import (
     Boolean,
 )
 from data_diff.schema import RawColumnInfo
+from data_diff.utils import batched
 
 # https://clickhouse.com/docs/en/operations/server-configuration-parameters/settings/#default-database
 DEFAULT_DATABASE = "default"
@@ -42,6 +44,7 @@ def import_clickhouse():
 class Dialect(BaseDialect):
     name = "Clickhouse"
     ROUNDS_ON_PREC_LOSS = False
+    SUPPORTS_NATIVE_CHECKSUM = True
     TYPE_CLASSES = {
         "Int8": Integer,
         "Int16": Integer,
@@ -110,6 +113,9 @@ class Dialect(BaseDialect):
     def md5_as_hex(self, s: str) -> str:
         return f"hex(MD5({s}))"
 
+    def native_hash_as_int(self, s: str) -> str:
+        return f"toUInt128(cityHash64({s}))"
+
     def normalize_number(self, value: str, coltype: FractionalType) -> str:
         # If a decimal value has trailing zeros in a fractional part, when casting to string they are dropped.
         # For example:
@@ -170,6 +176,8 @@ class Dialect(BaseDialect):
 @attrs.define(frozen=False, init=False, kw_only=True)
 class Clickhouse(ThreadedDatabase):
     DIALECT_CLASS: ClassVar[Type[BaseDialect]] = Dialect
+    SUPPORTS_PARTITIONS = True
+    SUPPORTS_TABLE_STATISTICS = True
     CONNECT_URI_HELP = "clickhouse://<user>:<password>@<host>/<database>"
     CONNECT_URI_PARAMS = ["database?"]
 
@@ -201,3 +209,27 @@ class Clickhouse(ThreadedDatabase):
     @property
     def is_autocommit(self) -> bool:
         return True
+
+    def insert_rows_bulk(
+        self,
+        path: DbPath,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        # With executemany(), the driver sends the rows in native columnar blocks, rather than as SQL literals.
+        # Values must match the column types (e.g. str for String)
+        name = ".".join(map(self.dialect.quote, path))
+        cols = ", ".join(map(self.dialect.quote, columns))
+        sql = f"INSERT INTO {name} ({cols}) VALUES"
+        for batch in batched(rows, batch_size):
+            self._apply_to_conn(lambda conn: conn.cursor().executemany(sql, [tuple(row) for row in batch]))
+
+    def select_table_partition_column(self, path: DbPath) -> str:
+        schema, name = self._normalize_table_path(path)
+        return f"SELECT partition_key FROM system.tables WHERE database = '{schema}' AND name = '{name}'"
+
+    def select_table_statistics(self, path: DbPath) -> str:
+        schema, name = self._normalize_table_path(path)
+        # Both are NULL for engines that don't track them (e.g. views)
+        return f"SELECT total_rows, total_bytes FROM system.tables WHERE database = '{schema}' AND name = '{name}'"
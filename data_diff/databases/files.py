@@ -0,0 +1,108 @@
+import os
+import threading
+from typing import Any, ClassVar, Dict, Set, Type
+
+import attrs
+
+from data_diff.abcs.database_types import DbPath
+from data_diff.databases.base import BaseDialect, import_helper
+from data_diff.databases.duckdb import DuckDB, Dialect as DuckDBDialect
+from data_diff.schema import RawColumnInfo
+
+
+@import_helper(text="Reading Arrow IPC files requires pyarrow. Please run: pip install pyarrow")
+def import_pyarrow():
+    import pyarrow
+    import pyarrow.ipc
+
+    return pyarrow
+
+
+# Maps file extensions to the DuckDB table function that reads them.
+# The readers also accept glob patterns, e.g. 'orders/*.parquet'.
+FILE_READERS = {
+    ".parquet": "read_parquet",
+    ".pq": "read_parquet",
+    ".csv": "read_csv_auto",
+    ".tsv": "read_csv_auto",
+    ".json": "read_json_auto",
+    ".ndjson": "read_json_auto",
+    ".jsonl": "read_json_auto",
+}
+
+ARROW_EXTENSIONS = (".arrow", ".feather", ".ipc")
+
+
+def _file_extension(path: str) -> str:
+    name = path.lower()
+    if name.endswith((".gz", ".zst")):
+        name = name.rsplit(".", 1)[0]
+    return os.path.splitext(name)[1]
+
+
+@attrs.define(frozen=False)
+class Dialect(DuckDBDialect):
+    name = "Files"
+
+    def parse_table_name(self, name: str) -> DbPath:
+        # File names usually contain dots, so they are never split into schema.table
+        return (name,)
+
+
+@attrs.define(frozen=False, init=False, kw_only=True)
+class Files(DuckDB):
+    """Treats the data files in a local directory as tables, using an in-memory DuckDB
+
+    Table names are file paths (or glob patterns), relative to the given directory.
+    Each file is exposed as a view, so filters and key-range predicates are pushed down
+    to the file readers (e.g. Parquet row-group pruning), instead of loading the files in full.
+
+    Supported formats: Parquet, CSV/TSV, JSON/NDJSON, and Arrow IPC (via a memory-mapped pyarrow table).
+    """
+
+    DIALECT_CLASS: ClassVar[Type[BaseDialect]] = Dialect
+    CONNECT_URI_HELP = "file://<directory>"
+    CONNECT_URI_PARAMS = ["directory"]
+
+    directory: str = attrs.field(init=False)
+    _views: Set[str] = attrs.field(init=False)
+    _views_lock: Any = attrs.field(init=False)
+    _arrow_tables: Dict[str, Any] = attrs.field(init=False)
+
+    def __init__(self, *, directory: str = ".", **kw) -> None:
+        super().__init__(filepath=":memory:", **kw)
+        self.directory = directory
+        self._views = set()
+        self._views_lock = threading.Lock()
+        self._arrow_tables = {}
+
+    def query_table_schema(self, path: DbPath) -> Dict[str, RawColumnInfo]:
+        self._create_view(path)
+        return super().query_table_schema(path)
+
+    def _create_view(self, path: DbPath) -> None:
+        *_, name = self._normalize_table_path(path)
+        with self._views_lock:
+            if name in self._views:
+                return
+
+            file_path = name if os.path.isabs(name) else os.path.join(self.directory, name)
+            ext = _file_extension(file_path)
+            if ext in ARROW_EXTENSIONS:
+                pa = import_pyarrow()
+                # Memory-mapped, so the file is paged in on demand rather than copied into memory
+                arrow_table = pa.ipc.open_file(pa.memory_map(file_path)).read_all()
+                self._arrow_tables[name] = arrow_table  # Keep a reference for as long as the view exists
+                self._conn.register(name, arrow_table)
+            elif ext in FILE_READERS:
+                literal = file_path.replace("'", "''")
+                self.query(
+                    f"CREATE OR REPLACE VIEW {self.dialect.quote(name)} AS SELECT * FROM {FILE_READERS[ext]}('{literal}')"
+                )
+            else:
+                raise ValueError(
+                    f"{self.name}: Unsupported file format for '{name}'. "
+                    f"Expected one of: {', '.join([*FILE_READERS, *ARROW_EXTENSIONS])}"
+                )
+
+            self._views.add(name)
@@ -14,6 +14,7 @@ from data_diff.abcs.database_types import (
     ColType_UUID,
     Boolean,
     Date,
+    DbPath,
 )
 from data_diff.databases.base import (
     ThreadedDatabase,
@@ -124,6 +125,8 @@ class MySQL(ThreadedDatabase):
     DIALECT_CLASS: ClassVar[Type[BaseDialect]] = Dialect
     SUPPORTS_ALPHANUMS = False
     SUPPORTS_UNIQUE_CONSTAINT = True
+    SUPPORTS_TABLE_STATISTICS = True
+    PARAMSTYLE = "format"  # executemany() rewrites an INSERT into a single multi-row statement
     CONNECT_URI_HELP = "mysql://<user>:<password>@<host>/<database>"
     CONNECT_URI_PARAMS = ["database?"]
 
@@ -157,3 +160,11 @@ class MySQL(ThreadedDatabase):
         if not self.thread_local.conn.is_connected():
             self.thread_local.conn.ping(reconnect=True, attempts=3, delay=5)
         return self._query_conn(self.thread_local.conn, sql_code)
+
+    def select_table_statistics(self, path: DbPath) -> str:
+        schema, name = self._normalize_table_path(path)
+        # Estimates, for InnoDB
+        return (
+            "SELECT table_rows, data_length FROM information_schema.tables "
+            f"WHERE table_name = '{name}' AND table_schema = '{schema}'"
+        )
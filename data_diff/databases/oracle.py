@@ -158,6 +158,7 @@ class Dialect(
 @attrs.define(frozen=False, init=False, kw_only=True)
 class Oracle(ThreadedDatabase):
     DIALECT_CLASS: ClassVar[Type[BaseDialect]] = Dialect
+    PARAMSTYLE = "numeric"  # executemany() uses array binding, a single round-trip per batch
     CONNECT_URI_HELP = "oracle://<user>:<password>@<host>/<database>"
     CONNECT_URI_PARAMS = ["database?"]
 
@@ -1,4 +1,4 @@
-from typing import Any, ClassVar, Dict, List, Type
+from typing import Any, ClassVar, Dict, Iterable, List, Sequence, Type
 from urllib.parse import unquote
 import attrs
 
@@ -19,13 +19,14 @@ from data_diff.abcs.database_types import (
     Date,
     Time,
 )
-from data_diff.databases.base import BaseDialect, ThreadedDatabase, import_helper, ConnectError
+from data_diff.databases.base import BaseDialect, ThreadedDatabase, import_helper, ConnectError, CsvRowsReader
 from data_diff.databases.base import (
     MD5_HEXDIGITS,
     CHECKSUM_HEXDIGITS,
     _CHECKSUM_BITSIZE,
     TIMESTAMP_PRECISION_POS,
     CHECKSUM_OFFSET,
+    DEFAULT_BULK_BATCH_SIZE,
 )
 
 SESSION_TIME_ZONE = None  # Changed by the tests
@@ -52,6 +53,8 @@ class PostgresqlDialect(BaseDialect):
     # https://www.postgresql.org/docs/current/datatype-numeric.html#DATATYPE-NUMERIC-TABLE
     DEFAULT_NUMERIC_PRECISION = 16383
 
+    _native_checksum: bool = True  # see disable_native_checksum()
+
     TYPE_CLASSES: ClassVar[Dict[str, Type[ColType]]] = {
         # Timestamps
         "timestamp with time zone": TimestampTZ,
@@ -110,6 +113,18 @@ class PostgresqlDialect(BaseDialect):
     def md5_as_hex(self, s: str) -> str:
         return f"md5({s})"
 
+    @property
+    def SUPPORTS_NATIVE_CHECKSUM(self) -> bool:
+        return self._native_checksum
+
+    def disable_native_checksum(self) -> None:
+        "For servers older than PostgreSQL 11, which lack hashtextextended()"
+        self._native_checksum = False
+
+    def native_hash_as_int(self, s: str) -> str:
+        # Available since PostgreSQL 11 (see create_connection()). Summing bigints yields numeric, so it can't overflow.
+        return f"hashtextextended({s}, 0)"
+
     def normalize_timestamp(self, value: str, coltype: TemporalType) -> str:
         def _add_padding(coltype: TemporalType, timestamp6: str):
             return f"RPAD(LEFT({timestamp6}, {TIMESTAMP_PRECISION_POS+coltype.precision}), {TIMESTAMP_PRECISION_POS+6}, '0')"
@@ -177,6 +192,8 @@ class PostgresqlDialect(BaseDialect):
 class PostgreSQL(ThreadedDatabase):
     DIALECT_CLASS: ClassVar[Type[BaseDialect]] = PostgresqlDialect
     SUPPORTS_UNIQUE_CONSTAINT = True
+    SUPPORTS_PARTITIONS = True
+    SUPPORTS_TABLE_STATISTICS = True
     CONNECT_URI_HELP = "postgresql://<user>:<password>@<host>/<database>"
     CONNECT_URI_PARAMS = ["database?"]
 
@@ -200,6 +217,8 @@ class PostgreSQL(ThreadedDatabase):
             )
             if SESSION_TIME_ZONE:
                 self._conn.cursor().execute(f"SET TIME ZONE '{SESSION_TIME_ZONE}'")
+            if self._conn.server_version < 110000:
+                self.dialect.disable_native_checksum()
             return self._conn
         except pg.OperationalError as e:
             raise ConnectError(*e.args) from e
@@ -240,6 +259,46 @@ class PostgreSQL(ThreadedDatabase):
             f"WHERE table_name = '{table}' AND table_schema = '{schema}'"
         )
 
+    def select_table_partition_column(self, path: DbPath) -> str:
+        _database, schema, table = self._normalize_table_path(path)
+
+        # Declarative partitioning. Partitioning by an expression has partattrs = 0, and is skipped by the join
+        return (
+            "SELECT a.attname FROM pg_catalog.pg_partitioned_table p "
+            "JOIN pg_catalog.pg_class c ON c.oid = p.partrelid "
+            "JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace "
+            "JOIN pg_catalog.pg_attribute a ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0] "
+            f"WHERE c.relname = '{table}' AND n.nspname = '{schema}' AND p.partnatts = 1"
+        )
+
+    def select_table_statistics(self, path: DbPath) -> str:
+        _database, schema, table = self._normalize_table_path(path)
+        # reltuples is as of the last VACUUM or ANALYZE (-1 if never). The size excludes indexes.
+        return (
+            "SELECT c.reltuples, pg_table_size(c.oid) FROM pg_catalog.pg_class c "
+            "JOIN pg_catalog.pg_namespace n ON n.oid = c.relnamespace "
+            f"WHERE c.relname = '{table}' AND n.nspname = '{schema}'"
+        )
+
+    def insert_rows_bulk(
+        self,
+        path: DbPath,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        # A single COPY streams all the rows (formatted lazily, as the driver reads them),
+        # without parsing or planning an INSERT per batch
+        name = ".".join(map(self.dialect.quote, path))
+        cols = ", ".join(map(self.dialect.quote, columns))
+        sql = f"COPY {name} ({cols}) FROM STDIN WITH (FORMAT csv)"
+
+        def copy(conn):
+            conn.cursor().copy_expert(sql, CsvRowsReader(rows))
+            conn.commit()
+
+        self._apply_to_conn(copy)
+
     def _normalize_table_path(self, path: DbPath) -> DbPath:
         if len(path) == 1:
             return None, self.default_schema, path[0]
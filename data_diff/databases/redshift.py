@@ -1,4 +1,4 @@
-from typing import Any, ClassVar, Iterable, List, Dict, Tuple, Type
+from typing import Any, ClassVar, Iterable, List, Dict, Sequence, Tuple, Type
 
 import attrs
 
@@ -12,6 +12,7 @@ from data_diff.abcs.database_types import (
     TimestampTZ,
     Integer,
 )
+from data_diff.databases.base import DEFAULT_BULK_BATCH_SIZE, Database
 from data_diff.databases.postgresql import (
     BaseDialect,
     PostgreSQL,
@@ -36,6 +37,7 @@ class Dialect(PostgresqlDialect):
         "float": Float,  # Redshift Spectrum
     }
     SUPPORTS_INDEXES = False
+    SUPPORTS_NATIVE_CHECKSUM = False  # No hashtextextended()
 
     def concat(self, items: List[str]) -> str:
         joined_exprs = " || ".join(items)
@@ -65,9 +67,28 @@ class Dialect(PostgresqlDialect):
 @attrs.define(frozen=False, init=False, kw_only=True)
 class Redshift(PostgreSQL):
     DIALECT_CLASS: ClassVar[Type[BaseDialect]] = Dialect
+    SUPPORTS_PARTITIONS = False  # No declarative partitioning
     CONNECT_URI_HELP = "redshift://<user>:<password>@<host>/<database>"
     CONNECT_URI_PARAMS = ["database?"]
 
+    def insert_rows_bulk(
+        self,
+        path: DbPath,
+        columns: Sequence[str],
+        rows: Iterable[Sequence[Any]],
+        batch_size: int = DEFAULT_BULK_BATCH_SIZE,
+    ) -> None:
+        # Redshift only COPYs from S3 and the like, not from STDIN
+        Database.insert_rows_bulk(self, path, columns, rows, batch_size)
+
+    def select_table_statistics(self, path: DbPath) -> str:
+        _database, schema, table = self._normalize_table_path(path)
+        # The size is in 1 MB blocks
+        return (
+            "SELECT tbl_rows, size * 1024 * 1024 FROM svv_table_info "
+            f"WHERE \"table\" = '{table.lower()}' AND \"schema\" = '{schema.lower()}'"
+        )
+
     def select_table_schema(self, path: DbPath) -> str:
         database, schema, table = self._normalize_table_path(path)
 
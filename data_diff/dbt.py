@@ -2,6 +2,7 @@ from contextlib import nullcontext
 import json
 import os
 import re
+import sys
 import time
 from typing import List, Optional, Dict, Tuple, Union
 import keyring
@@ -22,7 +23,7 @@ from data_diff import connect_to_table, diff_tables, Algorithm
 from data_diff.cloud import DatafoldAPI, TCloudApiDataDiff, TCloudApiOrgMeta
 from data_diff.dbt_parser import DbtParser, TDatadiffConfig
 from data_diff.diff_tables import DiffResultWrapper
-from data_diff.format import jsonify, jsonify_error
+from data_diff.format import Columns, jsonify, jsonify_error, stream_jsonify
 from data_diff.tracking import (
     bool_ask_for_email,
     bool_notify_about_extension,
@@ -81,6 +82,7 @@ def dbt_diff(
     columns_flag: Optional[Tuple[str]] = None,
     production_database_flag: Optional[str] = None,
     production_schema_flag: Optional[str] = None,
+    json_stream: bool = False,
 ) -> None:
     print_version_info()
     set_entrypoint_name(os.getenv("DATAFOLD_TRIGGERED_BY", "CLI-dbt"))
@@ -150,10 +152,12 @@ def dbt_diff(
                         _cloud_diff, diff_vars, config.datasource_id, api, org_meta, log_status_handler
                     )
                 else:
-                    future = executor.submit(_local_diff, diff_vars, json_output, log_status_handler)
+                    future = executor.submit(
+                        _local_diff, diff_vars, json_output, log_status_handler, json_stream=json_stream
+                    )
                 futures[future] = model
             else:
-                if json_output:
+                if json_output or json_stream:
                     print(
                         json.dumps(
                             jsonify_error(
@@ -274,7 +278,10 @@ def _get_prod_path_from_manifest(model, prod_manifest) -> Union[Tuple[str, str,
 
 
 def _local_diff(
-    diff_vars: TDiffVars, json_output: bool = False, log_status_handler: Optional[LogStatusHandler] = None
+    diff_vars: TDiffVars,
+    json_output: bool = False,
+    log_status_handler: Optional[LogStatusHandler] = None,
+    json_stream: bool = False,
 ) -> None:
     if log_status_handler:
         log_status_handler.diff_started(diff_vars.dev_path[-1])
@@ -345,7 +352,34 @@ def _local_diff(
         extra_columns=extra_columns,
         where=diff_vars.where_filter,
         skip_null_keys=True,
+        # When streaming, rows are written as they are found, so there's no need to keep them around
+        retain_diffs=not json_stream,
     )
+    if json_stream:
+        try:
+            stream_jsonify(
+                diff,
+                sys.stdout,
+                dbt_model=diff_vars.dbt_model,
+                dataset1_columns=_parse_columns(table1, table1_columns),
+                dataset2_columns=_parse_columns(table2, table2_columns),
+                with_summary=True,
+                columns_diff={
+                    "added": columns_added,
+                    "removed": columns_removed,
+                    "changed": columns_type_changed,
+                },
+                stats_only=diff_vars.stats_flag,
+            )
+        except Exception as e:
+            print(
+                json.dumps(
+                    jsonify_error(list(table1.table_path), list(table2.table_path), diff_vars.dbt_model, str(e))
+                ),
+                flush=True,
+            )
+        return
+
     if json_output:
         # drain the iterator to get accumulated stats in diff.info_tree
         try:
@@ -359,14 +393,8 @@ def _local_diff(
             )
             return
 
-        dataset1_columns = [
-            (info.column_name, info.data_type, table1.database.dialect.parse_type(table1.table_path, info))
-            for info in table1_columns.values()
-        ]
-        dataset2_columns = [
-            (info.column_name, info.data_type, table2.database.dialect.parse_type(table2.table_path, info))
-            for info in table2_columns.values()
-        ]
+        dataset1_columns = _parse_columns(table1, table1_columns)
+        dataset2_columns = _parse_columns(table2, table2_columns)
 
         print(
             json.dumps(
@@ -399,6 +427,13 @@ def _local_diff(
         log_status_handler.diff_finished(diff_vars.dev_path[-1])
 
 
+def _parse_columns(table, columns) -> Columns:
+    return [
+        (info.column_name, info.data_type, table.database.dialect.parse_type(table.table_path, info))
+        for info in columns.values()
+    ]
+
+
 def _initialize_api() -> Optional[DatafoldAPI]:
     datafold_host = os.environ.get("DATAFOLD_HOST")
     if datafold_host is None:
@@ -4,28 +4,38 @@ import threading
 import time
 from abc import ABC, abstractmethod
 from enum import Enum
-from contextlib import contextmanager
 from operator import methodcaller
-from typing import Any, Dict, Set, List, Tuple, Iterator, Optional, Union
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, Sequence, Set, List, Tuple, Iterator, Optional, Union
 
 import attrs
 
 from data_diff.errors import DataDiffMismatchingKeyTypesError
 from data_diff.info_tree import InfoTree, SegmentInfo
+from data_diff.progress import DiffProgress
+from data_diff.result_store import DEFAULT_MAX_ROWS_IN_MEMORY, ResultStore
 from data_diff.utils import dbt_diff_string_template, run_as_daemon, safezip, getLogger, truncate_error, Vector
-from data_diff.thread_utils import ThreadedYielder
+from data_diff.utils import BloomFilter
+from data_diff.thread_utils import PriorityExecutor, ThreadedYielder
 from data_diff.table_segment import TableSegment, create_mesh_from_points
 from data_diff.tracking import create_end_event_json, create_start_event_json, send_event_json, is_tracking_enabled
 from data_diff.abcs.database_types import IKey
 
 logger = getLogger(__name__)
 
+DEFAULT_MAX_PARTITIONS = 1024
+DEFAULT_MAX_PENDING_KEYS = 1024 * 1024
+# Results waiting to be consumed, before the threads that produce them wait for room
+DEFAULT_MAX_BUFFERED_RESULTS = 64 * 1024
+# Segments are diffed with their level as priority, so deeper ones run first. The root segments (and partitions)
+# run last, so that the diff descends into a mismatching segment before it starts on the next one.
+ROOT_SEGMENT_PRIORITY = -1
+
 
 class Algorithm(Enum):
     AUTO = "auto"
     JOINDIFF = "joindiff"
     HASHDIFF = "hashdiff"
+    HYBRID = "hybrid"
 
 
 DiffResult = Iterator[Tuple[str, tuple]]  # Iterator[Tuple[Literal["+", "-"], tuple]]
@@ -34,17 +44,29 @@ DiffResultList = Iterator[List[Tuple[str, tuple]]]
 
 @attrs.define(frozen=False)
 class ThreadBase:
-    "Provides utility methods for optional threading"
+    """Provides utility methods for optional threading
+
+    All the threads of an instance come from a single PriorityExecutor, of up to `max_threadpool_size` threads,
+    which is created on first use. Nested calls run their tasks in the same executor.
+    """
 
     threaded: bool = True
     max_threadpool_size: Optional[int] = 1
 
+    _executor: Optional[PriorityExecutor] = attrs.field(default=None, init=False)
+    _executor_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+
+    def _get_executor(self) -> PriorityExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = PriorityExecutor(self.max_threadpool_size)
+            return self._executor
+
     def _thread_map(self, func, iterable):
         if not self.threaded:
             return map(func, iterable)
 
-        with ThreadPoolExecutor(max_workers=self.max_threadpool_size) as task_pool:
-            return task_pool.map(func, iterable)
+        return self._get_executor().map(func, iterable)
 
     def _threaded_call(self, func, iterable):
         "Calls a method for each object in iterable."
@@ -52,25 +74,16 @@ class ThreadBase:
 
     def _thread_as_completed(self, func, iterable):
         if not self.threaded:
-            yield from map(func, iterable)
-            return
+            return map(func, iterable)
 
-        with ThreadPoolExecutor(max_workers=self.max_threadpool_size) as task_pool:
-            futures = [task_pool.submit(func, item) for item in iterable]
-            for future in as_completed(futures):
-                yield future.result()
+        return self._get_executor().as_completed(func, iterable)
 
     def _threaded_call_as_completed(self, func, iterable):
         "Calls a method for each object in iterable. Returned in order of completion."
         return self._thread_as_completed(methodcaller(func), iterable)
 
-    @contextmanager
     def _run_in_background(self, *funcs):
-        with ThreadPoolExecutor(max_workers=self.max_threadpool_size) as task_pool:
-            futures = [task_pool.submit(f) for f in funcs if f is not None]
-            yield futures
-            for f in futures:
-                f.result()
+        return self._get_executor().background(*funcs)
 
 
 @attrs.define(frozen=True)
@@ -81,6 +94,75 @@ class DiffStats:
     unchanged: int
     diff_percent: float
     extra_column_diffs: Optional[Dict[str, int]]
+    is_approximate: bool = False
+
+
+@attrs.define(frozen=False)
+class DiffStatsAccumulator:
+    """Counts the diff by sign, and the changes per column, incrementally as the rows stream through.
+
+    A '-' row and a '+' row with the same key are paired into an update ('!'). Until its pair arrives, a row is kept
+    in a map of pending keys. Pairs usually arrive close together, since both rows come from the same segment.
+    Once the map exceeds `max_pending_keys`, its oldest keys are evicted into a Bloom filter per sign, so memory
+    stays bounded. A later row whose key (probably) matches an evicted one is still counted as an update, but
+    its values can no longer be compared, and Bloom filters have false positives, so the stats become approximate.
+
+    Keys that repeat with the same sign (duplicate keys) can't be counted; they are only flagged, so the diff itself
+    isn't interrupted.
+    """
+
+    key_columns: Sequence[str]
+    extra_columns: Sequence[str]
+    max_pending_keys: int = DEFAULT_MAX_PENDING_KEYS
+
+    diff_by_sign: Dict[str, int] = attrs.field(factory=lambda: {k: 0 for k in "+-!"})
+    extra_column_diffs: Dict[str, int] = attrs.field(init=False)
+    is_approximate: bool = False
+    has_duplicate_keys: bool = False
+    _pending: Dict[tuple, Tuple[str, tuple]] = attrs.field(factory=dict)
+    _evicted: Optional[Dict[str, BloomFilter]] = None
+
+    def __attrs_post_init__(self) -> None:
+        self.extra_column_diffs = {k: 0 for k in self.extra_columns}
+
+    def add(self, sign: str, values: tuple) -> None:
+        len_key_columns = len(self.key_columns)
+        k = values[:len_key_columns]
+        extra_column_values = values[len_key_columns:]
+        other_sign = "+" if sign == "-" else "-"
+
+        if k in self._pending:
+            if self._pending[k][0] == sign:
+                self.has_duplicate_keys = True
+                return
+            _pending_sign, pending_values = self._pending.pop(k)
+            self._count_update(other_sign)
+            for i, column in enumerate(self.extra_columns):
+                if extra_column_values[i] != pending_values[i]:
+                    self.extra_column_diffs[column] += 1
+        elif self._evicted is not None and k in self._evicted[other_sign]:
+            self._count_update(other_sign)
+        else:
+            self.diff_by_sign[sign] += 1
+            self._pending[k] = sign, extra_column_values
+            if len(self._pending) > self.max_pending_keys:
+                self._evict_oldest()
+
+    def _count_update(self, other_sign: str) -> None:
+        self.diff_by_sign[other_sign] -= 1
+        self.diff_by_sign["!"] += 1
+
+    def _evict_oldest(self) -> None:
+        if self._evicted is None:
+            logger.warning(
+                f"More than {self.max_pending_keys} unpaired keys in the diff. Diff stats are now approximate."
+            )
+            self.is_approximate = True
+            self._evicted = {sign: BloomFilter(self.max_pending_keys * 10) for sign in "+-"}
+
+        k = next(iter(self._pending))  # Dicts keep insertion order
+        sign, _values = self._pending.pop(k)
+        self._evicted[sign].add(k)
 
 
 @attrs.define(frozen=True)
@@ -88,7 +170,7 @@ class DiffResultWrapper:
     diff: iter  # DiffResult
     info_tree: InfoTree
     stats: dict
-    result_list: list = attrs.field(factory=list)
+    result_list: ResultStore = attrs.field(factory=ResultStore)
 
     def __iter__(self) -> Iterator[Any]:
         yield from self.result_list
@@ -97,43 +179,29 @@ class DiffResultWrapper:
             yield i
 
     def _get_stats(self, is_dbt: bool = False) -> DiffStats:
-        list(self)  # Consume the iterator into result_list, if we haven't already
-
-        key_columns = self.info_tree.info.tables[0].key_columns
-        len_key_columns = len(key_columns)
-        diff_by_key = {}
-        extra_column_diffs = None
-        if is_dbt:
-            extra_column_values_store = {}
-            extra_columns = self.info_tree.info.tables[0].extra_columns
-            extra_column_diffs = {k: 0 for k in extra_columns}
+        # Consume the rest of the iterator into result_list, if we haven't already
+        for i in self.diff:
+            self.result_list.append(i)
 
+        # Replayed from result_list, which spills to disk, so that only the pending keys are held in memory
+        table = self.info_tree.info.tables[0]
+        acc = DiffStatsAccumulator(table.key_columns, table.extra_columns)
         for sign, values in self.result_list:
-            k = values[:len_key_columns]
-            if is_dbt:
-                extra_column_values = values[len_key_columns:]
-            if k in diff_by_key:
-                assert sign != diff_by_key[k]
-                diff_by_key[k] = "!"
-                if is_dbt:
-                    for i in range(0, len(extra_columns)):
-                        if extra_column_values[i] != extra_column_values_store[k][i]:
-                            extra_column_diffs[extra_columns[i]] += 1
-            else:
-                diff_by_key[k] = sign
-                if is_dbt:
-                    extra_column_values_store[k] = extra_column_values
-
-        diff_by_sign = {k: 0 for k in "+-!"}
-        for sign in diff_by_key.values():
-            diff_by_sign[sign] += 1
+            acc.add(sign, values)
+        if acc.has_duplicate_keys:
+            raise ValueError("Could not compute stats for tables with duplicate keys")
+
+        diff_by_sign = dict(acc.diff_by_sign)
+        extra_column_diffs = dict(acc.extra_column_diffs) if is_dbt else None
 
         table1_count = self.info_tree.info.rowcounts[1]
         table2_count = self.info_tree.info.rowcounts[2]
         unchanged = table1_count - diff_by_sign["-"] - diff_by_sign["!"]
         diff_percent = 1 - unchanged / max(table1_count, table2_count)
 
-        return DiffStats(diff_by_sign, table1_count, table2_count, unchanged, diff_percent, extra_column_diffs)
+        return DiffStats(
+            diff_by_sign, table1_count, table2_count, unchanged, diff_percent, extra_column_diffs, acc.is_approximate
+        )
 
     def get_stats_string(self, is_dbt: bool = False):
         diff_stats = self._get_stats(is_dbt)
@@ -162,6 +230,8 @@ class DiffResultWrapper:
             string_output += f"{diff_stats.diff_by_sign['!']} rows updated\n"
             string_output += f"{diff_stats.unchanged} rows unchanged\n"
             string_output += f"{100*diff_stats.diff_percent:.2f}% difference score\n"
+            if diff_stats.is_approximate:
+                string_output += "(approximate; too many unpaired keys to pair '-' and '+' rows exactly)\n"
 
             if self.stats:
                 string_output += "\nExtra-Info:\n"
@@ -183,20 +253,35 @@ class DiffResultWrapper:
             "stats": self.stats,
         }
         json_output["values"] = diff_stats.extra_column_diffs or {}
+        if diff_stats.is_approximate:
+            json_output["approximate"] = True
         return json_output
 
 
+def _query_key_range_if_not_empty(table: TableSegment) -> Optional[Tuple[tuple, tuple]]:
+    try:
+        return table.query_key_range()
+    except ValueError:  # Table appears to be empty
+        return None
+
+
+def _segment_size(table: TableSegment) -> int:
+    "The size of the segment's key-space, for measuring progress. An unbounded segment is a single unit."
+    return table.approximate_size() if table.is_bounded else 1
+
+
 @attrs.define(frozen=False)
-class TableDiffer(ThreadBase, ABC):
+class BaseTableDiffer(ThreadBase, ABC):
+    "Diffs two tables from the root, in a way that's up to the subclass. See :class:`TableDiffer` for bisection."
+
     INFO_TREE_CLASS = InfoTree
 
-    bisection_factor = 32
     stats: dict = {}
 
-    ignored_columns1: Set[str] = attrs.field(factory=set)
-    ignored_columns2: Set[str] = attrs.field(factory=set)
-    _ignored_columns_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
-    yield_list: bool = False
+    table_partitions: bool = False
+    max_rows_in_memory: Optional[int] = DEFAULT_MAX_ROWS_IN_MEMORY
+    retain_diffs: bool = True
+    progress: Optional[DiffProgress] = None
 
     def diff_tables(self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree = None) -> DiffResultWrapper:
         """Diff the given tables.
@@ -212,15 +297,20 @@ class TableDiffer(ThreadBase, ABC):
             Where `row` is a tuple of values, corresponding to the diffed columns.
         """
         if info_tree is None:
-            segment_info = self.INFO_TREE_CLASS.SEGMENT_INFO_CLASS([table1, table2])
+            segment_info = self.INFO_TREE_CLASS.SEGMENT_INFO_CLASS([table1, table2], retain_diff=self.retain_diffs)
             info_tree = self.INFO_TREE_CLASS(segment_info)
-        return DiffResultWrapper(self._diff_tables_wrapper(table1, table2, info_tree), info_tree, self.stats)
+        return DiffResultWrapper(
+            self._diff_tables_wrapper(table1, table2, info_tree),
+            info_tree,
+            self.stats,
+            ResultStore(max_rows_in_memory=self.max_rows_in_memory),
+        )
 
     def _diff_tables_wrapper(self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree) -> DiffResult:
         if is_tracking_enabled():
-            options = attrs.asdict(self, recurse=False)
-            # not a useful event attribute
-            options.pop("_ignored_columns_lock")
+            # Private attributes (e.g. locks) aren't useful event attributes
+            options = {k: v for k, v in attrs.asdict(self, recurse=False).items() if not k.startswith("_")}
+            options["progress"] = self.progress is not None
             options["differ_name"] = type(self).__name__
             event_json = create_start_event_json(options)
             run_as_daemon(send_event_json, event_json)
@@ -230,13 +320,26 @@ class TableDiffer(ThreadBase, ABC):
             table2.database.dialect.enable_preventing_type_overflow()
 
         start = time.monotonic()
+        self.stats.pop("time_to_first_diff", None)  # Of a previous diff
         error = None
         try:
+            if self.table_partitions:
+                table1, table2 = self._with_table_partitions(table1, table2)
+
             # Query and validate schema
             table1, table2 = self._threaded_call("with_schema", [table1, table2])
             self._validate_and_adjust_columns(table1, table2)
-
-            yield from self._diff_tables_root(table1, table2, info_tree)
+            if self.progress is not None:
+                self.progress.set_database_names(table1.database.name, table2.database.name)
+
+            results = iter(self._diff_tables_root(table1, table2, info_tree))
+            for result in results:
+                if result:  # With yield_list, a segment without differences yields an empty list
+                    self._record_first_diff(time.monotonic() - start)
+                    yield result
+                    break
+                yield result
+            yield from results
 
         except BaseException as e:  # Catch KeyboardInterrupt too
             error = e
@@ -265,9 +368,64 @@ class TableDiffer(ThreadBase, ABC):
             if error:
                 raise error
 
+    def _record_first_diff(self, seconds: float) -> None:
+        "Report how long it took to find the first difference, from the start of the diff"
+        self.stats["time_to_first_diff"] = round(seconds, 3)
+        if self.progress is not None:
+            self.progress.first_diff()
+
     def _validate_and_adjust_columns(self, table1: TableSegment, table2: TableSegment) -> None:
         pass
 
+    def _with_table_partitions(self, table1: TableSegment, table2: TableSegment) -> Tuple[TableSegment, TableSegment]:
+        def partition_column(t: TableSegment) -> Optional[str]:
+            return t.partition_column or t.database.query_table_partition_column(t.table_path)
+
+        column1, column2 = self._thread_map(partition_column, [table1, table2])
+        if not (column1 or column2):
+            logger.info("Tables aren't partitioned by a single column. Segmenting by key.")
+            return table1, table2
+
+        # When only one side is partitioned (e.g. a copy in another database), filter both by the same column
+        tables = []
+        for t, column in safezip([table1, table2], [column1 or column2, column2 or column1]):
+            if t.partition_column != column:
+                # The schema must include the partition column, so it's queried again
+                t = t.new(partition_column=column, schema=None)
+            tables.append(t)
+        return tuple(tables)
+
+    @abstractmethod
+    def _diff_tables_root(
+        self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree
+    ) -> Union[DiffResult, DiffResultList]: ...
+
+    def _parse_key_range_result(self, key_types, key_range) -> Tuple[Vector, Vector]:
+        min_key_values, max_key_values = key_range
+
+        # We add 1 because our ranges are exclusive of the end (like in Python)
+        try:
+            min_key = Vector(key_type.make_value(mn) for key_type, mn in safezip(key_types, min_key_values))
+            max_key = Vector(key_type.make_value(mx) + 1 for key_type, mx in safezip(key_types, max_key_values))
+        except (TypeError, ValueError) as e:
+            raise type(e)(f"Cannot apply {key_types} to '{min_key_values}', '{max_key_values}'.") from e
+
+        return min_key, max_key
+
+
+@attrs.define(frozen=False)
+class TableDiffer(BaseTableDiffer):
+    "Diffs two tables by bisecting them into segments, which the subclass diffs (see `_diff_segments()`)"
+
+    bisection_factor = 32
+
+    ignored_columns1: Set[str] = attrs.field(factory=set)
+    ignored_columns2: Set[str] = attrs.field(factory=set)
+    _ignored_columns_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+    yield_list: bool = False
+    max_partitions: int = DEFAULT_MAX_PARTITIONS
+    max_buffered_results: Optional[int] = DEFAULT_MAX_BUFFERED_RESULTS
+
     def _diff_tables_root(
         self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree
     ) -> Union[DiffResult, DiffResultList]:
@@ -305,6 +463,110 @@ class TableDiffer(ThreadBase, ABC):
                     f"Key columns {k1} and {k2} can't be compared due to different types."
                 )
 
+        ti = ThreadedYielder(
+            self.max_threadpool_size, self.yield_list, self.max_buffered_results, executor=self._get_executor()
+        )
+
+        partitions = self._query_partitions(table1, table2)
+        if partitions is None and table1.is_bounded and table2.is_bounded:
+            # Already bounded, e.g. a work unit of a distributed diff, so either table may be empty within the bounds
+            ti.submit(
+                self._bisect_and_diff_bounding_box,
+                ti,
+                table1,
+                table2,
+                info_tree,
+                key_types1,
+                key_types2,
+                priority=ROOT_SEGMENT_PRIORITY,
+            )
+        elif partitions is None:
+            self._bisect_and_diff_key_ranges(ti, table1, table2, info_tree, key_types1, key_types2)
+        else:
+            # Align the first-level segments with the partitions, so that every query prunes to a single partition
+            for value in partitions:
+                ptable1 = table1.new_partition(value)
+                ptable2 = table2.new_partition(value)
+                info_node = info_tree.add_node(ptable1, ptable2)
+                ti.submit(
+                    self._bisect_and_diff_bounding_box,
+                    ti,
+                    ptable1,
+                    ptable2,
+                    info_node,
+                    key_types1,
+                    key_types2,
+                    priority=ROOT_SEGMENT_PRIORITY,
+                )
+
+        return ti
+
+    def _query_partitions(self, table1: TableSegment, table2: TableSegment) -> Optional[list]:
+        if not (table1.partition_column and table2.partition_column) or table1.is_partition:
+            return None
+
+        values1, values2 = self._threaded_call("query_partition_values", [table1, table2])
+        # NULL is a partition too. Sort it last, since it isn't comparable.
+        partitions = sorted(set(values1) | set(values2), key=lambda v: (v is None, v))
+        if len(partitions) > self.max_partitions:
+            logger.warning(
+                f"Column '{table1.partition_column}' has {len(partitions)} distinct values, "
+                f"more than max_partitions={self.max_partitions}. Segmenting by key instead."
+            )
+            return None
+
+        logger.info(f"Diffing {len(partitions)} partitions of column '{table1.partition_column}'")
+        return partitions
+
+    def _bisect_and_diff_bounding_box(
+        self,
+        ti: ThreadedYielder,
+        table1: TableSegment,
+        table2: TableSegment,
+        info_tree: InfoTree,
+        key_types1: List[IKey],
+        key_types2: List[IKey],
+    ):
+        bounding_box = self._query_bounding_box(table1, table2, key_types1, key_types2)
+        if bounding_box is None:
+            return  # Only rows with NULL keys
+
+        min_key, max_key = bounding_box
+        btable1 = table1.new_key_bounds(min_key=min_key, max_key=max_key, key_types=key_types1)
+        btable2 = table2.new_key_bounds(min_key=min_key, max_key=max_key, key_types=key_types2)
+        if table1.is_partition:
+            logger.info(f"Diffing partition {table1.partition_value!r} at key-range: {min_key}..{max_key}")
+        else:
+            logger.info(f"Diffing segments at key-range: {min_key}..{max_key}")
+        self._progress_add_segment(btable1)
+        return self._bisect_and_diff_segments(ti, btable1, btable2, info_tree)
+
+    def _query_bounding_box(
+        self, table1: TableSegment, table2: TableSegment, key_types1: List[IKey], key_types2: List[IKey]
+    ) -> Optional[Tuple[Vector, Vector]]:
+        "Returns the bounding box of the key ranges of both tables, or None if neither has a row with a non-NULL key"
+        # A partition (or key range) may be missing from one of the tables, so it can't be queried for its key range
+        key_ranges = list(self._thread_map(_query_key_range_if_not_empty, [table1, table2]))
+        bounds = [
+            self._parse_key_range_result(key_types, key_range)
+            for key_types, key_range in safezip([key_types1, key_types2], key_ranges)
+            if key_range is not None
+        ]
+        if not bounds:
+            return None
+
+        min_keys, max_keys = zip(*bounds)
+        return Vector(min(k) for k in zip(*min_keys)), Vector(max(k) for k in zip(*max_keys))
+
+    def _bisect_and_diff_key_ranges(
+        self,
+        ti: ThreadedYielder,
+        table1: TableSegment,
+        table2: TableSegment,
+        info_tree: InfoTree,
+        key_types1: List[IKey],
+        key_types2: List[IKey],
+    ):
         # Query min/max values
         key_ranges = self._threaded_call_as_completed("query_key_range", [table1, table2])
 
@@ -319,9 +581,9 @@ class TableDiffer(ThreadBase, ABC):
             f"size: table1 <= {btable1.approximate_size()}, table2 <= {btable2.approximate_size()}"
         )
 
-        ti = ThreadedYielder(self.max_threadpool_size, self.yield_list)
         # Bisect (split) the table into segments, and diff them recursively.
-        ti.submit(self._bisect_and_diff_segments, ti, btable1, btable2, info_tree, priority=999)
+        self._progress_add_segment(btable1)
+        ti.submit(self._bisect_and_diff_segments, ti, btable1, btable2, info_tree, priority=ROOT_SEGMENT_PRIORITY)
 
         # Now we check for the second min-max, to diff the portions we "missed".
         # This is achieved by subtracting the table ranges, and dividing the resulting space into aligned boxes.
@@ -347,21 +609,15 @@ class TableDiffer(ThreadBase, ABC):
         for p1, p2 in new_regions:
             extra_table1 = table1.new_key_bounds(min_key=p1, max_key=p2, key_types=key_types1)
             extra_table2 = table2.new_key_bounds(min_key=p1, max_key=p2, key_types=key_types2)
-            ti.submit(self._bisect_and_diff_segments, ti, extra_table1, extra_table2, info_tree, priority=999)
-
-        return ti
-
-    def _parse_key_range_result(self, key_types, key_range) -> Tuple[Vector, Vector]:
-        min_key_values, max_key_values = key_range
-
-        # We add 1 because our ranges are exclusive of the end (like in Python)
-        try:
-            min_key = Vector(key_type.make_value(mn) for key_type, mn in safezip(key_types, min_key_values))
-            max_key = Vector(key_type.make_value(mx) + 1 for key_type, mx in safezip(key_types, max_key_values))
-        except (TypeError, ValueError) as e:
-            raise type(e)(f"Cannot apply {key_types} to '{min_key_values}', '{max_key_values}'.") from e
-
-        return min_key, max_key
+            self._progress_add_segment(extra_table1)
+            ti.submit(
+                self._bisect_and_diff_segments,
+                ti,
+                extra_table1,
+                extra_table2,
+                info_tree,
+                priority=ROOT_SEGMENT_PRIORITY,
+            )
 
     def _bisect_and_diff_segments(
         self,
@@ -386,14 +642,33 @@ class TableDiffer(ThreadBase, ABC):
         # Create new instances of TableSegment between each checkpoint
         segmented1 = table1.segment_by_checkpoints(checkpoints)
         segmented2 = table2.segment_by_checkpoints(checkpoints)
+        if self.progress is not None:
+            self.progress.split_keyspace(_segment_size(table1), map(_segment_size, segmented1))
 
         # Recursively compare each pair of corresponding segments between table1 and table2
         for i, (t1, t2) in enumerate(safezip(segmented1, segmented2)):
             info_node = info_tree.add_node(t1, t2, max_rows=max_rows)
             ti.submit(
-                self._diff_segments, ti, t1, t2, info_node, max_rows, level + 1, i + 1, len(segmented1), priority=level
+                self._diff_segments,
+                ti,
+                t1,
+                t2,
+                info_node,
+                max_rows,
+                level + 1,
+                i + 1,
+                len(segmented1),
+                priority=level,
             )
 
+    def _progress_add_segment(self, table: TableSegment) -> None:
+        if self.progress is not None:
+            self.progress.add_keyspace(_segment_size(table))
+
+    def _progress_segment_done(self, table: TableSegment) -> None:
+        if self.progress is not None:
+            self.progress.segment_done(_segment_size(table))
+
     def ignore_column(self, column_name1: str, column_name2: str) -> None:
         """
         Ignore the column (by name on sides A & B) in md5s & diffs from now on.
@@ -0,0 +1,448 @@
+"""Runs a diff across several worker processes (or hosts), through a work queue in a shared SQLite file
+
+The coordinator splits the key range of the tables into work units, and puts them on the queue, along with the
+configuration of the diff. Each worker connects to the databases by itself, claims units one at a time, diffs
+them, and writes back their diff and row counts. The coordinator yields the results as the units complete,
+and merges them into its info tree, one node per unit.
+
+A unit whose worker stopped sending heartbeats (e.g. it was killed) is claimed again by another worker,
+once its lease expires. SQLite locking requires a local filesystem, or a network filesystem that supports it.
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import attrs
+
+from data_diff.diff_tables import BaseTableDiffer, DiffResult, TableDiffer, _query_key_range_if_not_empty
+from data_diff.info_tree import InfoTree
+from data_diff.table_segment import TableSegment
+from data_diff.utils import ArithUUID, Vector, getLogger, safezip
+
+logger = getLogger(__name__)
+
+QUEUE_VERSION = 1
+
+DEFAULT_WORK_UNITS = 64
+DEFAULT_POLL_INTERVAL = 1.0
+# A unit is claimed again when its worker didn't send a heartbeat for this long
+DEFAULT_LEASE_SECONDS = 60.0
+DEFAULT_MAX_ATTEMPTS = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    min_key TEXT NOT NULL,
+    max_key TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    heartbeat REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    result TEXT,
+    error TEXT
+);
+CREATE TABLE IF NOT EXISTS results (unit_id INTEGER NOT NULL, sign TEXT NOT NULL, row TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS results_unit ON results (unit_id);
+"""
+
+
+def encode_key(key: Sequence[Any]) -> List[Any]:
+    "Encodes a key as JSON values, that `decode_key()` parses back with the key types of either table"
+    return [str(k.uuid) if isinstance(k, ArithUUID) else k if isinstance(k, int) else str(k) for k in key]
+
+
+def decode_key(values: Sequence[Any], key_types: Sequence[Any]) -> Vector:
+    return Vector(key_type.make_value(v) for key_type, v in safezip(key_types, values))
+
+
+@attrs.define(frozen=True)
+class WorkUnit:
+    "A key range of the tables, to be diffed by a single worker"
+
+    id: int
+    min_key: List[Any]
+    max_key: List[Any]
+    attempts: int
+
+
+class WorkQueueError(RuntimeError):
+    pass
+
+
+@attrs.define(frozen=False, eq=False)
+class WorkQueue:
+    """A queue of work units in a SQLite file, shared by the coordinator and the workers of a diff.
+
+    Each operation is a short transaction, so any number of processes can use the queue at once.
+
+    Parameters:
+        path (str): Path of the queue file. Holds the configuration of the diff, including database credentials,
+                    so it's created readable only by its owner.
+        lease_seconds (float): How long a claimed unit may go without a heartbeat, before it's claimed again.
+        max_attempts (int): How many times to try each unit, before failing the diff.
+    """
+
+    path: str
+    lease_seconds: float = DEFAULT_LEASE_SECONDS
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def create(self, config: Dict[str, Any], units: Sequence[Tuple[Sequence[Any], Sequence[Any]]]) -> None:
+        "Create the queue, with the configuration of the diff, and its units. Overwrites an existing queue."
+        for suffix in ("", "-wal", "-shm", "-journal"):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+        os.close(os.open(self.path, os.O_CREAT | os.O_WRONLY, 0o600))
+
+        conn = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(_SCHEMA)
+        finally:
+            conn.close()
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT INTO units (min_key, max_key) VALUES (?, ?)",
+                [(json.dumps(mn), json.dumps(mx)) for mn, mx in units],
+            )
+            # Written last, so that a worker that sees the config also sees every unit
+            conn.executemany(
+                "INSERT INTO meta VALUES (?, ?)",
+                [("version", json.dumps(QUEUE_VERSION)), ("config", json.dumps(config, default=str))],
+            )
+
+    def config(self) -> Optional[Dict[str, Any]]:
+        "Returns the configuration of the diff, or None if the queue wasn't created yet"
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with self._transaction() as conn:
+                meta = dict(conn.execute("SELECT key, value FROM meta"))
+        except sqlite3.OperationalError:  # Still being created
+            return None
+        if "config" not in meta:
+            return None
+        if json.loads(meta["version"]) != QUEUE_VERSION:
+            raise WorkQueueError(f"Queue '{self.path}' was created by an incompatible version of data-diff")
+        return json.loads(meta["config"])
+
+    def claim(self, worker: str) -> Optional[WorkUnit]:
+        "Claim a pending unit, or one whose lease expired. Returns None if there are none."
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT id, min_key, max_key, attempts FROM units "
+                "WHERE status = 'pending' OR (status = 'running' AND heartbeat < ?) ORDER BY id LIMIT 1",
+                (now - self.lease_seconds,),
+            ).fetchone()
+            if row is None:
+                return None
+            unit_id, min_key, max_key, attempts = row
+            if attempts >= self.max_attempts:
+                # Its worker died on the last attempt
+                conn.execute(
+                    "UPDATE units SET status = 'failed', error = ? WHERE id = ?",
+                    (f"Lease expired after {attempts} attempts", unit_id),
+                )
+                return None
+            conn.execute(
+                "UPDATE units SET status = 'running', worker = ?, heartbeat = ?, attempts = attempts + 1 WHERE id = ?",
+                (worker, now, unit_id),
+            )
+        return WorkUnit(unit_id, json.loads(min_key), json.loads(max_key), attempts + 1)
+
+    def heartbeat(self, unit: WorkUnit, worker: str) -> bool:
+        "Extend the lease of a claimed unit. Returns False if it was claimed by another worker since."
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE units SET heartbeat = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (time.time(), unit.id, worker),
+            )
+        return cur.rowcount > 0
+
+    def complete(self, unit: WorkUnit, worker: str, diff: Sequence[Tuple[str, tuple]], result: Dict[str, Any]) -> bool:
+        """Record the diff and the result (row counts and stats) of a unit.
+
+        Returns False, and records nothing, if the unit was claimed by another worker since.
+        """
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE units SET status = 'done', result = ? WHERE id = ? AND worker = ? AND status = 'running'",
+                (json.dumps(result), unit.id, worker),
+            )
+            if cur.rowcount == 0:
+                return False
+            conn.executemany(
+                "INSERT INTO results VALUES (?, ?, ?)",
+                [(unit.id, sign, json.dumps(row, default=str)) for sign, row in diff],
+            )
+        return True
+
+    def fail(self, unit: WorkUnit, worker: str, error: str) -> None:
+        "Record an error. The unit is retried, unless it ran out of attempts."
+        status = "failed" if unit.attempts >= self.max_attempts else "pending"
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE units SET status = ?, error = ?, worker = NULL WHERE id = ? AND worker = ? AND status = 'running'",
+                (status, error, unit.id, worker),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        "Returns the number of units by status"
+        with self._transaction() as conn:
+            return dict(conn.execute("SELECT status, count(*) FROM units GROUP BY status"))
+
+    def is_finished(self) -> bool:
+        counts = self.counts()
+        return not (counts.get("pending") or counts.get("running"))
+
+    def failures(self) -> List[Tuple[int, str]]:
+        with self._transaction() as conn:
+            return list(conn.execute("SELECT id, error FROM units WHERE status = 'failed' ORDER BY id"))
+
+    def completed(self, exclude: Sequence[int] = ()) -> List[Tuple[int, Dict[str, Any], List[Tuple[str, tuple]]]]:
+        "Returns the units that are done (except those in `exclude`), with their result and their diff"
+        with self._transaction() as conn:
+            units = [
+                (unit_id, json.loads(result))
+                for unit_id, result in conn.execute("SELECT id, result FROM units WHERE status = 'done' ORDER BY id")
+                if unit_id not in exclude
+            ]
+            return [
+                (
+                    unit_id,
+                    result,
+                    [
+                        (sign, tuple(json.loads(row)))
+                        for sign, row in conn.execute("SELECT sign, row FROM results WHERE unit_id = ?", (unit_id,))
+                    ],
+                )
+                for unit_id, result in units
+            ]
+
+
+def _merge_stats(total: Dict[str, Any], stats: Dict[str, Any]) -> None:
+    "Add up numeric stats, recursively"
+    for k, v in stats.items():
+        if isinstance(v, dict):
+            _merge_stats(total.setdefault(k, {}), v)
+        elif isinstance(v, (int, float)) and not isinstance(v, bool):
+            total[k] = total.get(k, 0) + v
+        else:
+            total[k] = v
+
+
+def default_worker_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+
+@attrs.define(frozen=False)
+class DistributedDiffer(BaseTableDiffer):
+    """Coordinates a diff that runs in worker processes, which may be on other hosts.
+
+    The key range of the tables is split into `work_units` equal parts, which are put on the queue.
+    Each worker diffs one unit at a time, with the differ described by `config`. See :func:`run_worker`.
+
+    Parameters:
+        queue (WorkQueue): The queue to put the units on. It's created anew.
+        config (dict): The configuration of the diff, for the workers. Opaque to the coordinator.
+        work_units (int): Into how many units to split the key range.
+        local_workers (int): How many worker processes to start on this host, with `worker_command`.
+                             With 0, the coordinator only waits for workers that were started separately.
+        worker_command (list, optional): The command that starts a worker. Default runs the CLI with ``--work``.
+        poll_interval (float): How often to poll the queue for completed units, in seconds.
+    """
+
+    queue: WorkQueue = None
+    config: Dict[str, Any] = attrs.field(factory=dict)
+    work_units: int = DEFAULT_WORK_UNITS
+    local_workers: int = 0
+    worker_command: Optional[List[str]] = None
+    poll_interval: float = DEFAULT_POLL_INTERVAL
+
+    stats: dict = attrs.field(factory=dict)
+    _processes: List[subprocess.Popen] = attrs.field(factory=list, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        if self.queue is None:
+            raise ValueError("DistributedDiffer requires a queue")
+        if self.work_units < 1:
+            raise ValueError("work_units must be >= 1")
+
+    def _diff_tables_root(self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree) -> DiffResult:
+        if len(table1.key_columns) != len(table2.key_columns):
+            raise ValueError("Tables should have an equivalent number of key columns!")
+
+        key_types = [table1._schema[k] for k in table1.key_columns]
+        key_ranges = [
+            self._parse_key_range_result(key_types, key_range)
+            for key_range in self._thread_map(_query_key_range_if_not_empty, [table1, table2])
+            if key_range is not None
+        ]
+        if not key_ranges:
+            raise ValueError("Both tables appear to be empty")
+
+        # Bounding box of both key ranges, split evenly
+        min_keys, max_keys = zip(*key_ranges)
+        bounded = table1.new_key_bounds(
+            min_key=Vector(min(k) for k in zip(*min_keys)), max_key=Vector(max(k) for k in zip(*max_keys))
+        )
+        if self.work_units == 1:
+            segments = [bounded]
+        else:
+            segments = bounded.segment_by_checkpoints(bounded.choose_checkpoints(self.work_units - 1))
+        units = [(encode_key(s.min_key), encode_key(s.max_key)) for s in segments]
+        self.queue.create(self.config, units)
+        logger.info(f"Queued {len(units)} work units at key-range: {bounded.min_key}..{bounded.max_key}")
+
+        nodes = {
+            unit_id: info_tree.add_node(
+                table1.new_key_bounds(s.min_key, s.max_key, key_types=key_types),
+                table2.new_key_bounds(s.min_key, s.max_key, key_types=[table2._schema[k] for k in table2.key_columns]),
+            )
+            for unit_id, s in enumerate(segments, 1)  # SQLite numbers the units from 1, in insertion order
+        }
+
+        self._start_local_workers()
+        try:
+            yield from self._collect(nodes)
+        finally:
+            self._stop_local_workers()
+
+    def _collect(self, nodes: Dict[int, InfoTree]) -> DiffResult:
+        "Yields the diff of each unit as it completes, and records its result in its node"
+        collected = set()
+        while True:
+            finished = self.queue.is_finished()  # Checked first, so no unit completes unseen
+            for unit_id, result, diff in self.queue.completed(exclude=collected):
+                collected.add(unit_id)
+                info = nodes[unit_id].info
+                info.set_diff(diff)
+                info.rowcounts = {1: result["rowcounts"][0], 2: result["rowcounts"][1]}
+                _merge_stats(self.stats, result["stats"])
+                yield from diff
+
+            failures = self.queue.failures()
+            if failures:
+                unit_id, error = failures[0]
+                raise WorkQueueError(f"Work unit {unit_id} failed ({len(failures)} failed in total): {error}")
+            if finished:
+                return
+
+            if self._processes and all(p.poll() is not None for p in self._processes):
+                raise WorkQueueError("All the local workers exited before the diff was finished")
+            time.sleep(self.poll_interval)
+
+    def _start_local_workers(self) -> None:
+        command = self.worker_command or [sys.executable, "-m", "data_diff", "--work", self.queue.path]
+        for _ in range(self.local_workers):
+            self._processes.append(subprocess.Popen(command))
+
+    def _stop_local_workers(self) -> None:
+        for p in self._processes:
+            if p.poll() is None:
+                p.terminate()
+        for p in self._processes:
+            p.wait()
+        self._processes.clear()
+
+
+def _diff_unit(differ: TableDiffer, table1: TableSegment, table2: TableSegment, unit: WorkUnit):
+    key_types1 = [table1._schema[k] for k in table1.key_columns]
+    key_types2 = [table2._schema[k] for k in table2.key_columns]
+    utable1 = table1.new_key_bounds(decode_key(unit.min_key, key_types1), decode_key(unit.max_key, key_types1))
+    utable2 = table2.new_key_bounds(decode_key(unit.min_key, key_types2), decode_key(unit.max_key, key_types2))
+
+    differ.stats = {}  # Reported per unit, and added up by the coordinator
+    diff_iter = differ.diff_tables(utable1, utable2)
+    diff = list(diff_iter)
+    rowcounts = diff_iter.info_tree.info.rowcounts
+    differ.stats.pop("time_to_first_diff", None)  # Measured by the coordinator, across all units
+    result = {"rowcounts": [rowcounts.get(1, 0), rowcounts.get(2, 0)], "stats": differ.stats}
+    return diff, result
+
+
+def run_worker(
+    queue: WorkQueue,
+    prepare: Callable[[Dict[str, Any]], Tuple[TableDiffer, List[TableSegment]]],
+    worker_id: Optional[str] = None,
+    poll_interval: float = DEFAULT_POLL_INTERVAL,
+) -> int:
+    """Claim and diff units from the queue, until every unit is done. Returns the number of units diffed.
+
+    Waits for the queue to be created, if it doesn't exist yet.
+
+    Parameters:
+        queue (WorkQueue): The queue of the diff.
+        prepare (Callable): Called once with the configuration of the diff. Returns the differ,
+                            and the (unbounded) table segments to diff.
+        worker_id (str, optional): Identifies the worker in the queue. Default is unique to the thread.
+    """
+    worker_id = worker_id or default_worker_id()
+    config = queue.config()
+    while config is None:
+        time.sleep(poll_interval)
+        config = queue.config()
+
+    differ, segments = prepare(config)
+    table1, table2 = differ._threaded_call("with_schema", segments)
+    logger.info(f"Worker {worker_id} started on queue '{queue.path}'")
+
+    diffed = 0
+    while True:
+        unit = queue.claim(worker_id)
+        if unit is None:
+            if queue.is_finished():
+                break
+            time.sleep(poll_interval)
+            continue
+
+        stop_heartbeat = threading.Event()
+
+        def send_heartbeats(unit=unit, stop_heartbeat=stop_heartbeat):
+            while not stop_heartbeat.wait(queue.lease_seconds / 3):
+                if not queue.heartbeat(unit, worker_id):
+                    logger.warning(f"Work unit {unit.id} was claimed by another worker")
+                    return
+
+        heartbeat_thread = threading.Thread(target=send_heartbeats, name="data-diff-heartbeat", daemon=True)
+        heartbeat_thread.start()
+        try:
+            diff, result = _diff_unit(differ, table1, table2, unit)
+        except Exception as e:
+            logger.exception(f"Work unit {unit.id} failed (attempt {unit.attempts})")
+            queue.fail(unit, worker_id, repr(e))
+            continue
+        finally:
+            stop_heartbeat.set()
+            heartbeat_thread.join()
+
+        if queue.complete(unit, worker_id, diff, result):
+            diffed += 1
+            logger.info(f"Work unit {unit.id} done: {len(diff)} differences")
+
+    logger.info(f"Worker {worker_id} finished, after diffing {diffed} units")
+    return diffed
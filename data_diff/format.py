@@ -1,9 +1,12 @@
 import collections
+import json
 from enum import Enum
-from typing import Any, Optional, List, Dict, Tuple, Type
+from itertools import groupby
+from typing import Any, Iterator, Optional, List, Dict, Sequence, TextIO, Tuple, Type
 
 import attrs
 from data_diff.diff_tables import DiffResultWrapper
+from data_diff.sinks import DEFAULT_SINK_BATCH_SIZE, ArrowSink, ParquetSink, write_diff
 from data_diff.abcs.database_types import (
     JSON,
     Boolean,
@@ -90,6 +93,100 @@ def jsonify(
     )
 
 
+def stream_jsonify(
+    diff: DiffResultWrapper,
+    out: TextIO,
+    dbt_model: str,
+    dataset1_columns: Columns,
+    dataset2_columns: Columns,
+    columns_diff: Dict[str, List[str]],
+    with_summary: bool = False,
+    stats_only: bool = False,
+) -> None:
+    """
+    Writes the diff result as NDJSON (one JSON object per line), while the diff is running.
+
+    The first line is the header (datasets and columns), followed by a line per different row,
+    and a last line with the result and, optionally, the stats summary.
+    Unlike jsonify(), rows are written as soon as they are found, and never collected in memory.
+    """
+    table1, table2 = diff.info_tree.info.tables
+    key_columns = list(table1.key_columns)
+
+    header = JsonStreamHeader(
+        status="success",
+        model=dbt_model,
+        dataset1=list(table1.table_path),
+        dataset2=list(table2.table_path),
+        columns=_jsonify_columns_diff(dataset1_columns, dataset2_columns, columns_diff, key_columns),
+    )
+    _write_json_line(out, attrs.asdict(header))
+
+    is_different = any(columns_diff.get(k) for k in ("added", "removed", "changed"))
+    for line in _stream_rows_diff(diff, table1.relevant_columns, key_columns):
+        is_different = True
+        if not stats_only:
+            _write_json_line(out, line)
+
+    summary = None
+    if with_summary:
+        summary = _jsonify_diff_summary(diff.get_stats_dict(is_dbt=True))
+
+    result = JsonStreamResult(result="different" if is_different else "identical", summary=summary)
+    _write_json_line(out, attrs.asdict(result))
+
+
+def write_arrow(
+    diff: DiffResultWrapper,
+    path: str,
+    file_format: str = "arrow",
+    batch_size: int = DEFAULT_SINK_BATCH_SIZE,
+) -> int:
+    """
+    Writes the diff rows to an Arrow IPC or a Parquet file, one record batch at a time, while the diff is running.
+
+    Each row has the diff sign ('-' or '+') in the `op` column, followed by the diffed columns, as strings.
+    Returns the number of rows written.
+    """
+    if file_format == "arrow":
+        sink = ArrowSink(path)
+    elif file_format == "parquet":
+        sink = ParquetSink(path)
+    else:
+        raise ValueError(f"Unknown file format: {file_format}. Expected 'arrow' or 'parquet'.")
+    return write_diff(diff, sink, batch_size=batch_size)
+
+
+def _write_json_line(out: TextIO, obj: dict) -> None:
+    # A single write per line, so that lines from concurrent writers don't interleave
+    out.write(json.dumps(obj, default=str) + "\n")
+    out.flush()
+
+
+def _stream_rows_diff(diff: DiffResultWrapper, columns: Sequence[str], key_columns: List[str]) -> Iterator[dict]:
+    # Both differs yield all the rows of a key together, '-' before '+', so an updated row is a pair of neighbours
+    key_count = len(key_columns)
+    for _, group in groupby(diff, key=lambda item: item[1][:key_count]):
+        rows = list(group)
+        signs = [sign for sign, _ in rows]
+        if signs == ["-", "+"]:
+            (_, row1), (_, row2) = rows
+            yield {
+                "type": "diff",
+                "row": {
+                    c: {"dataset1": v1, "dataset2": v2, "isDiff": v1 != v2, "isPK": c in key_columns}
+                    for c, v1, v2 in zip(columns, row1, row2)
+                },
+            }
+        else:
+            for sign, row in rows:
+                yield {
+                    "type": "exclusive",
+                    "dataset": "dataset1" if sign == "-" else "dataset2",
+                    "row": {c: {"isPK": c in key_columns, "value": v} for c, v in zip(columns, row)},
+                }
+
+
 @attrs.define(frozen=True)
 class JsonExclusiveRowValue:
     """
@@ -229,6 +326,26 @@ class JsonDiff:
     version: str = "1.1.0"
 
 
+@attrs.define(frozen=True)
+class JsonStreamHeader:
+    status: str  # Literal ["success"]
+    model: str
+    dataset1: List[str]
+    dataset2: List[str]
+    columns: JsonColumnsSummary
+
+    type: str = "header"
+    version: str = "1.1.0"
+
+
+@attrs.define(frozen=True)
+class JsonStreamResult:
+    result: str  # Literal ["different", "identical"]
+    summary: Optional[JsonDiffSummary]
+
+    type: str = "result"
+
+
 def _group_rows(
     diff_info: DiffResultWrapper, schema: List[str]
 ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]], List[Dict[str, Any]]]:
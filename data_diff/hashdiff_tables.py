@@ -1,16 +1,24 @@
 import os
+import multiprocessing
+import tempfile
+import threading
 from numbers import Number
 import logging
 from collections import defaultdict
-from typing import Any, Collection, Dict, Iterator, List, Sequence, Set, Tuple
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import groupby
+from typing import Any, Collection, Dict, Iterator, List, Optional, Sequence, Set, Tuple
 
 import attrs
 from typing_extensions import Literal
 
 from data_diff.abcs.database_types import ColType_UUID, NumericType, PrecisionType, StringType, Boolean, JSON
+from data_diff.checkpoint import Checkpoint
+from data_diff.databases.base import csv_row
+from data_diff.databases.duckdb import import_duckdb
 from data_diff.info_tree import InfoTree
 from data_diff.utils import safezip, diffs_are_equiv_jsons
-from data_diff.thread_utils import ThreadedYielder
+from data_diff.thread_utils import URGENT, ThreadedYielder
 from data_diff.table_segment import TableSegment
 from data_diff.diff_tables import TableDiffer
 
@@ -19,6 +27,9 @@ BENCHMARK = os.environ.get("BENCHMARK", False)
 DEFAULT_BISECTION_THRESHOLD = 1024 * 16
 DEFAULT_BISECTION_FACTOR = 32
 
+# Smaller leaves are compared in the calling thread, since sending them to a process costs more than comparing them
+LEAF_PROCESS_MIN_ROWS = 1000
+
 logger = logging.getLogger("hashdiff_tables")
 
 # Just for local readability: TODO: later switch to real type declarations of these.
@@ -68,8 +79,103 @@ def diff_sets(
             for row2 in rows_by_pks2[pk]:
                 diffs_by_pks[pk].append(("+", row2))
 
+    yield from _filter_equiv_jsons((diffs_by_pks[pk] for pk in sorted(diffs_by_pks)), json_cols)
+
+
+def _run_leaf_diff_in_process(diff_func, a: Sequence[_Row], b: Sequence[_Row], kwargs: dict) -> List[Tuple[_Op, _Row]]:
+    "Runs in a leaf process. Only the diff is sent back."
+    return list(diff_func(a, b, **kwargs))
+
+
+def diff_sets_duckdb(
+    a: Sequence[_Row],
+    b: Sequence[_Row],
+    *,
+    json_cols: dict = None,
+    columns1: Sequence[str],
+    columns2: Sequence[str],
+    key_columns1: Sequence[str],
+    key_columns2: Sequence[str],
+    ignored_columns1: Collection[str],
+    ignored_columns2: Collection[str],
+) -> Iterator:
+    """Same as diff_sets(), but compares the rows in an in-process DuckDB, using a vectorized FULL OUTER JOIN.
+
+    Expects the values to be strings or None, as returned by TableSegment.get_values().
+    """
+    cut1 = [i for i, col in enumerate(columns1) if col not in ignored_columns1]
+    cut2 = [i for i, col in enumerate(columns2) if col not in ignored_columns2]
+    if len(cut1) != len(cut2) or len(key_columns1) != len(key_columns2):
+        # Rows can never be equal. Rare enough to not be worth handling in SQL.
+        yield from diff_sets(
+            a,
+            b,
+            json_cols=json_cols,
+            columns1=columns1,
+            columns2=columns2,
+            key_columns1=key_columns1,
+            key_columns2=key_columns2,
+            ignored_columns1=ignored_columns1,
+            ignored_columns2=ignored_columns2,
+        )
+        return
+
+    key_count = len(key_columns1)
+    keys = [f"c{i}" for i in range(key_count)]
+    conn = import_duckdb().connect()
+    try:
+        for name, rows, width in (("a", a, len(columns1)), ("b", b, len(columns2))):
+            cols = ", ".join(f"c{i} VARCHAR" for i in range(width))
+            conn.execute(f"CREATE TABLE {name} (rn BIGINT, {cols})")
+            if rows:
+                _load_rows_duckdb(conn, name, rows)
+
+        # Mirrors diff_sets(): a key is different if either side has 0 or 2+ rows for it, or the rows differ
+        def grouped(name, cut):
+            values = ", ".join(f"any_value(c{c}) AS v{i}" for i, c in enumerate(cut))
+            return f"SELECT {', '.join(keys)}, count(*) AS n, {values} FROM {name} GROUP BY {', '.join(keys)}"
+
+        on = " AND ".join(f"ga.{k} IS NOT DISTINCT FROM gb.{k}" for k in keys)
+        is_diff = " OR ".join(
+            ["ga.n IS DISTINCT FROM 1", "gb.n IS DISTINCT FROM 1"]
+            + [f"ga.v{i} IS DISTINCT FROM gb.v{i}" for i in range(len(cut1))]
+        )
+        select_keys = ", ".join(f"coalesce(ga.{k}, gb.{k}) AS {k}" for k in keys)
+        in_diff = " AND ".join(f"{{t}}.{k} IS NOT DISTINCT FROM d.{k}" for k in keys)
+        sql = f"""
+            WITH ga AS ({grouped("a", cut1)}),
+                 gb AS ({grouped("b", cut2)}),
+                 d AS (SELECT {select_keys} FROM ga FULL OUTER JOIN gb ON {on} WHERE {is_diff})
+            SELECT 0 AS side, rn, {", ".join(keys)} FROM a WHERE EXISTS (SELECT 1 FROM d WHERE {in_diff.format(t="a")})
+            UNION ALL
+            SELECT 1 AS side, rn, {", ".join(keys)} FROM b WHERE EXISTS (SELECT 1 FROM d WHERE {in_diff.format(t="b")})
+            ORDER BY {", ".join(keys)}, side, rn
+        """
+        res = conn.execute(sql).fetchall()
+    finally:
+        conn.close()
+
+    diffs = (("-", a[rn]) if side == 0 else ("+", b[rn]) for side, rn, *_pk in res)
+    diffs_by_pk = (list(group) for _pk, group in groupby(diffs, key=lambda d: tuple(d[1][:key_count])))
+    yield from _filter_equiv_jsons(diffs_by_pk, json_cols)
+
+
+def _load_rows_duckdb(conn, name: str, rows: Sequence[_Row]) -> None:
+    "Load the rows into a table of (rn, *row), through a CSV file (as DuckDB.insert_rows_bulk(), for the same reason)"
+    fd, filename = tempfile.mkstemp(prefix="data-diff-", suffix=".csv")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.writelines(csv_row((i, *row)) for i, row in enumerate(rows))
+        literal = filename.replace("'", "''")
+        conn.execute(f"COPY {name} FROM '{literal}' (FORMAT csv, HEADER false, ALLOW_QUOTED_NULLS false)")
+    finally:
+        os.remove(filename)
+
+
+def _filter_equiv_jsons(diffs_by_pk: Iterator[List[Tuple[_Op, _Row]]], json_cols: dict) -> Iterator:
+    "Yield the diffs of each pk, skipping those that only differ in the representation of JSON values"
     warned_diff_cols = set()
-    for diffs in (diffs_by_pks[pk] for pk in sorted(diffs_by_pks)):
+    for diffs in diffs_by_pk:
         if json_cols:
             parsed_match, overriden_diff_cols = diffs_are_equiv_jsons(diffs, json_cols)
             if parsed_match:
@@ -97,16 +203,73 @@ class HashDiffer(TableDiffer):
         bisection_factor (int): Into how many segments to bisect per iteration.
         bisection_threshold (Number): When should we stop bisecting and compare locally (in row count).
         threaded (bool): Enable/disable threaded diffing. Needed to take advantage of database threads.
-        max_threadpool_size (int): Maximum size of each threadpool. ``None`` means auto.
-                                   Only relevant when `threaded` is ``True``.
-                                   There may be many pools, so number of actual threads can be a lot higher.
+        max_threadpool_size (int): Maximum number of threads of the differ, shared by all of its tasks.
+                                   ``None`` means auto. Only relevant when `threaded` is ``True``.
+                                   Database connections have threads of their own (see `thread_count`).
+        native_checksum (bool): When both tables are in the same kind of database, checksum using the
+                                engine's native hash function instead of md5, which is considerably faster.
+                                Has no effect when diffing across different databases. Default is True.
+        column_checksums (bool): Checksum each column separately (along with the keys), to find which columns
+                                 differ without downloading rows. For leaf segments whose keys match, the number
+                                 of mismatching segments per column is reported in the stats. Default is False.
+        auto_ignore_columns_after (int, optional): Ignore a column from now on (see `ignore_column()`), once it
+                                    mismatched in this many leaf segments. Segments whose keys match, and whose mismatch
+                                    is fully explained by ignored columns, are then skipped instead of downloaded.
+                                    Requires `column_checksums`. ``None`` (default) means never.
+        duckdb_leaf_diff (bool): Compare the downloaded rows in an in-process DuckDB, instead of in Python.
+                                 Faster from about 20K rows per leaf, so it pays off with a `bisection_threshold`
+                                 above that, which saves round-trips on high-latency connections. Slower for small
+                                 leaves. Requires the `duckdb` package. Default is False.
+        table_partitions (bool): Set the segments' `partition_column` from the database catalog, if the table is
+                                 partitioned by a single column. Default is False.
+        max_partitions (int): When there are more distinct partition values than this, segment by key instead.
+        max_rows_in_memory (int, optional): How many diff rows to keep in memory, before spilling them to a
+                                            temporary file on disk. ``None`` means never spill.
+        max_buffered_results (int, optional): How many results the threads may buffer, before they wait for the
+                                              consumer to read them. ``None`` means unbounded. Default is 64K.
+        retain_diffs (bool): Keep the diff of each segment in the info tree, after yielding it. Needed for
+                             inspecting `info_tree.info.diff`, but holds every difference in memory. Default is True.
+        progress (DiffProgress, optional): Track the progress of the diff in this object, as segments complete.
+                                           See :class:`ProgressReporter` for reporting it live.
+        checkpoint_path (str, optional): Record each completed segment (its key bounds, counts, checksums and diff)
+                                         in this file, as the diff runs. See :class:`Checkpoint`.
+        resume (bool): Resume from the segments recorded in `checkpoint_path`. Their diffs are yielded again,
+                       and only the unfinished segments are queried. Default is False.
+        leaf_processes (int, optional): Compare the downloaded rows of each leaf segment in a pool of this many
+                                        processes, instead of in the thread that downloaded them. Lets the comparison
+                                        use more than one core, and keeps the threads free for querying.
+                                        ``None`` (default) means no processes.
+        prefetch_leaves (float, optional): Download the rows of a segment that is expected to be a leaf at the same
+                                           time as its checksum, instead of after it mismatched. Saves a round-trip
+                                           per leaf, but the download is wasted when the checksums match.
+                                           Enabled while at least this fraction of the expected leaves mismatched
+                                           so far. Only relevant when `threaded` is ``True``.
+                                           ``None`` (default) means never.
+
+    An instance runs one diff at a time. Concurrent diffs need an instance each.
     """
 
     bisection_factor: int = DEFAULT_BISECTION_FACTOR
     bisection_threshold: int = DEFAULT_BISECTION_THRESHOLD
     bisection_disabled: bool = False  # i.e. always download the rows (used in tests)
+    native_checksum: bool = True
+    column_checksums: bool = False
+    auto_ignore_columns_after: Optional[int] = None
+    duckdb_leaf_diff: bool = False
+    checkpoint_path: Optional[str] = None
+    resume: bool = False
+    leaf_processes: Optional[int] = None
+    prefetch_leaves: Optional[float] = None
 
     stats: dict = attrs.field(factory=dict)
+    # The state below belongs to the running diff, so only one diff may run at a time (see _diff_tables_root())
+    _diff_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+    _checkpoint: Optional[Checkpoint] = attrs.field(default=None, init=False)
+    _process_pool: Optional[ProcessPoolExecutor] = attrs.field(default=None, init=False)
+    _process_pool_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+    _leaf_checksums: int = attrs.field(default=0, init=False)
+    _leaf_mismatches: int = attrs.field(default=0, init=False)
+    _prefetch_lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
 
     def __attrs_post_init__(self) -> None:
         # Validate options
@@ -114,6 +277,14 @@ class HashDiffer(TableDiffer):
             raise ValueError("Incorrect param values (bisection factor must be lower than threshold)")
         if self.bisection_factor < 2:
             raise ValueError("Must have at least two segments per iteration (i.e. bisection_factor >= 2)")
+        if self.auto_ignore_columns_after is not None and not self.column_checksums:
+            raise ValueError("auto_ignore_columns_after requires column_checksums")
+        if self.resume and not self.checkpoint_path:
+            raise ValueError("resume requires checkpoint_path")
+        if self.leaf_processes is not None and self.leaf_processes < 1:
+            raise ValueError("leaf_processes must be >= 1")
+        if self.prefetch_leaves is not None and not 0 <= self.prefetch_leaves <= 1:
+            raise ValueError("prefetch_leaves must be between 0 and 1")
 
     def _validate_and_adjust_columns(self, table1: TableSegment, table2: TableSegment, *, strict: bool = True) -> None:
         for c1, c2 in safezip(table1.relevant_columns, table2.relevant_columns):
@@ -166,6 +337,104 @@ class HashDiffer(TableDiffer):
                         "If encoding/formatting differs between databases, it may result in false positives."
                     )
 
+    def _can_use_native_checksum(self, table1: TableSegment, table2: TableSegment) -> bool:
+        dialect1 = table1.database.dialect
+        dialect2 = table2.database.dialect
+        # Native hashes differ between engines, so they're only comparable within the same dialect
+        return self.native_checksum and type(dialect1) is type(dialect2) and dialect1.SUPPORTS_NATIVE_CHECKSUM
+
+    def _diff_tables_root(self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree):
+        if self._can_use_native_checksum(table1, table2):
+            logger.info(f"Using native {table1.database.dialect.name} hash function for checksums")
+            table1 = table1.new(native_checksum=True)
+            table2 = table2.new(native_checksum=True)
+
+        if not self._diff_lock.acquire(blocking=False):
+            raise RuntimeError(f"{type(self).__name__} is already running a diff. Use an instance per concurrent diff.")
+        self._checkpoint = None
+        self._leaf_checksums = self._leaf_mismatches = 0
+        try:
+            if self.checkpoint_path is not None:
+                self._checkpoint = Checkpoint(self.checkpoint_path, resume=self.resume)
+                self._checkpoint.open(self._checkpoint_fingerprint(table1, table2))
+            results = super()._diff_tables_root(table1, table2, info_tree)
+        except BaseException:
+            self._close()
+            raise
+        return self._close_after(results)
+
+    def _checkpoint_fingerprint(self, table1: TableSegment, table2: TableSegment) -> dict:
+        "Everything that determines the segments and their outcome. A checkpoint can only resume the same diff."
+        return {
+            "tables": [
+                {
+                    "path": t.table_path,
+                    "key_columns": t.key_columns,
+                    "relevant_columns": t.relevant_columns,
+                    "where": t.where,
+                    "min_key": t.min_key,
+                    "max_key": t.max_key,
+                    "min_update": t.min_update,
+                    "max_update": t.max_update,
+                    "partition_column": t.partition_column,
+                    "native_checksum": t.native_checksum,
+                }
+                for t in (table1, table2)
+            ],
+            "bisection_factor": self.bisection_factor,
+            "bisection_threshold": self.bisection_threshold,
+            "column_checksums": self.column_checksums,
+        }
+
+    def _close_after(self, results):
+        try:
+            yield from results
+        finally:
+            self._close()
+
+    def _close(self) -> None:
+        "Close the checkpoint and the leaf processes, once the diff is done, so that the next diff can run"
+        try:
+            if self._checkpoint is not None:
+                self._checkpoint.close()
+            with self._process_pool_lock:
+                if self._process_pool is not None:
+                    self._process_pool.shutdown()
+                    self._process_pool = None
+        finally:
+            self._diff_lock.release()
+
+    def _diff_leaf(self, diff_func, rows1: Sequence[_Row], rows2: Sequence[_Row], **kwargs) -> List[Tuple[_Op, _Row]]:
+        "Compare the rows of a leaf segment, in a leaf process if it's big enough"
+        if self.leaf_processes is None or len(rows1) + len(rows2) < LEAF_PROCESS_MIN_ROWS:
+            return list(diff_func(rows1, rows2, **kwargs))
+
+        with self._process_pool_lock:
+            if self._process_pool is None:
+                # Spawned, because forking a process that runs threads (and holds connections) isn't safe
+                self._process_pool = ProcessPoolExecutor(
+                    self.leaf_processes, mp_context=multiprocessing.get_context("spawn")
+                )
+            pool = self._process_pool
+        # Waiting for the result releases the GIL, so the other threads keep querying meanwhile
+        return pool.submit(_run_leaf_diff_in_process, diff_func, rows1, rows2, kwargs).result()
+
+    def _replay_segment(
+        self, ti: ThreadedYielder, table1: TableSegment, table2: TableSegment, info_tree: InfoTree, entry: dict, level
+    ):
+        "Replay a segment that was recorded in the checkpoint, instead of checksumming it"
+        self.stats["resumed_segments"] = self.stats.get("resumed_segments", 0) + 1
+        if entry["status"] == "equal":
+            count1, count2 = entry["rowcounts"]
+            info_tree.info.rowcounts = {1: count1, 2: count2}
+            info_tree.info.is_diff = False
+            self._progress_segment_done(table1)
+            return
+
+        # The segment is bisected, or diffed locally, exactly like the first time
+        info_tree.info.is_diff = True
+        return self._bisect_and_diff_segments(ti, table1, table2, info_tree, level=level, max_rows=entry["max_rows"])
+
     def _diff_segments(
         self,
         ti: ThreadedYielder,
@@ -183,6 +452,11 @@ class HashDiffer(TableDiffer):
             f"size <= {max_rows}"
         )
 
+        if self._checkpoint is not None:
+            entry = self._checkpoint.get(table1)
+            if entry is not None:
+                return self._replay_segment(ti, table1, table2, info_tree, entry, level)
+
         # When benchmarking, we want the ability to skip checksumming. This
         # allows us to download all rows for comparison in performance. By
         # default, data-diff will checksum the section first (when it's below
@@ -191,7 +465,21 @@ class HashDiffer(TableDiffer):
             if self.bisection_disabled or max_rows < self.bisection_threshold:
                 return self._bisect_and_diff_segments(ti, table1, table2, info_tree, level=level, max_rows=max_rows)
 
-        (count1, checksum1), (count2, checksum2) = self._threaded_call("count_and_checksum", [table1, table2])
+        expected_leaf = self.prefetch_leaves is not None and self.threaded and self._is_expected_leaf(max_rows)
+        prefetch = self._prefetch_leaf_rows(table1, table2) if expected_leaf else None
+
+        if self.column_checksums:
+            (count1, checksum1, columns1), (count2, checksum2, columns2) = self._query_tables(
+                "count_and_checksum_columns", table1, table2
+            )
+        else:
+            (count1, checksum1), (count2, checksum2) = self._query_tables("count_and_checksum", table1, table2)
+        if expected_leaf:
+            columns_mismatch = self.column_checksums and list(columns1.values()) != list(columns2.values())
+            self._count_expected_leaf((count1, checksum1) != (count2, checksum2) or columns_mismatch)
+        if self.progress is not None:
+            self.progress.add_rows(1, count1, downloaded=False)
+            self.progress.add_rows(2, count2, downloaded=False)
 
         assert not info_tree.info.rowcounts
         info_tree.info.rowcounts = {1: count1, 2: count2}
@@ -205,14 +493,112 @@ class HashDiffer(TableDiffer):
             )
             assert checksum1 is None and checksum2 is None
             info_tree.info.is_diff = False
+            self._record_equal_segment(table1, count1, count2, checksum1, prefetch)
             return
 
-        if checksum1 == checksum2:
-            info_tree.info.is_diff = False
-            return
+        if count1 == count2 and checksum1 == checksum2:
+            if not self.column_checksums:
+                info_tree.info.is_diff = False
+                self._record_equal_segment(table1, count1, count2, checksum1, prefetch)
+                return
+
+            # Here the checksum only covers the keys. Since they match, any mismatch is explained by specific columns.
+            mismatched_columns = [
+                (c1, c2) for (c1, cs1), (c2, cs2) in safezip(columns1.items(), columns2.items()) if cs1 != cs2
+            ]
+            # Only the leaves are counted, so that a difference counts once, however deep it is
+            max_rows = max(count1, count2)
+            is_leaf = self._is_leaf_segment(table1, table2, max_rows)
+            ignored_columns = self._update_column_stats(mismatched_columns if is_leaf else [])
+            if ignored_columns.issuperset(c1 for c1, _c2 in mismatched_columns):
+                info_tree.info.is_diff = False
+                self._record_equal_segment(table1, count1, count2, checksum1, prefetch)
+                return
 
         info_tree.info.is_diff = True
-        return self._bisect_and_diff_segments(ti, table1, table2, info_tree, level=level, max_rows=max(count1, count2))
+        return self._bisect_and_diff_segments(
+            ti, table1, table2, info_tree, level=level, max_rows=max(count1, count2), prefetch=prefetch
+        )
+
+    def _query_tables(self, method: str, table1: TableSegment, table2: TableSegment) -> list:
+        "Like _threaded_call(), but measures the queries of each side for the progress"
+        if self.progress is None:
+            return self._threaded_call(method, [table1, table2])
+
+        def query(side_table):
+            side, table = side_table
+            with self.progress.query(side):
+                return getattr(table, method)()
+
+        return list(self._thread_map(query, [(1, table1), (2, table2)]))
+
+    def _record_equal_segment(
+        self, table1: TableSegment, count1: int, count2: int, checksum, prefetch: Optional[Future] = None
+    ) -> None:
+        self._progress_segment_done(table1)
+        if self._checkpoint is not None:
+            self._checkpoint.record(table1, "equal", rowcounts=[count1, count2], checksum=checksum)
+        self._discard_prefetch(prefetch)
+
+    def _is_expected_leaf(self, max_rows: Optional[int]) -> bool:
+        "Whether a segment will probably be downloaded if it mismatches, by the row count of its parent"
+        return max_rows is not None and max_rows / self.bisection_factor < self.bisection_threshold
+
+    def _count_expected_leaf(self, mismatch: bool) -> None:
+        with self._prefetch_lock:
+            self._leaf_checksums += 1
+            self._leaf_mismatches += mismatch
+
+    def _prefetch_leaf_rows(self, table1: TableSegment, table2: TableSegment) -> Optional[Future]:
+        "Start downloading the rows of an expected leaf, if enough of the expected leaves mismatched so far"
+        with self._prefetch_lock:
+            # Optimistic until there's data, as if one of two mismatched
+            mismatch_ratio = (self._leaf_mismatches + 1) / (self._leaf_checksums + 2)
+            if mismatch_ratio < self.prefetch_leaves:
+                return None
+            self.stats["prefetched_leaves"] = self.stats.get("prefetched_leaves", 0) + 1
+        return self._get_executor().submit(self._query_tables, "get_values", table1, table2, priority=URGENT)
+
+    def _discard_prefetch(self, prefetch: Optional[Future]) -> None:
+        "Cancel the download if it didn't start yet. Otherwise, the rows are dropped when they arrive."
+        if prefetch is None:
+            return
+        prefetch.cancel()
+        with self._prefetch_lock:
+            self.stats["prefetched_leaves_unused"] = self.stats.get("prefetched_leaves_unused", 0) + 1
+
+    def _is_leaf_segment(self, table1: TableSegment, table2: TableSegment, max_rows: int) -> bool:
+        "Whether a segment of up to `max_rows` rows is downloaded and compared locally, instead of bisected"
+        max_space_size = max(table1.approximate_size(), table2.approximate_size())
+        return (
+            self.bisection_disabled or max_rows < self.bisection_threshold or max_space_size < self.bisection_factor * 2
+        )
+
+    def _update_column_stats(self, mismatched_columns: Sequence[Tuple[str, str]]) -> Set[str]:
+        """Count the mismatching leaf segments per column, and auto-ignore columns if needed.
+
+        Returns the ignored columns of table1.
+        """
+        newly_ignored = []
+        with self._ignored_columns_lock:
+            column_stats = self.stats.setdefault("mismatched_segments_by_column", {})
+            for c1, c2 in mismatched_columns:
+                column_stats[c1] = column_stats.get(c1, 0) + 1
+                if (
+                    self.auto_ignore_columns_after is not None
+                    and column_stats[c1] >= self.auto_ignore_columns_after
+                    and c1 not in self.ignored_columns1
+                ):
+                    newly_ignored.append((c1, c2))
+
+        for c1, c2 in newly_ignored:
+            logger.warning(
+                f"Column '{c1}' mismatched in {self.auto_ignore_columns_after} segments. Ignoring it from now on."
+            )
+            self.ignore_column(c1, c2)
+
+        with self._ignored_columns_lock:
+            return set(self.ignored_columns1)
 
     def _bisect_and_diff_segments(
         self,
@@ -222,36 +608,50 @@ class HashDiffer(TableDiffer):
         info_tree: InfoTree,
         level=0,
         max_rows=None,
+        prefetch: Optional[Future] = None,
     ):
         assert table1.is_bounded and table2.is_bounded
 
-        max_space_size = max(table1.approximate_size(), table2.approximate_size())
         if max_rows is None:
             # We can be sure that row_count <= max_rows iff the table key is unique
-            max_rows = max_space_size
+            max_rows = max(table1.approximate_size(), table2.approximate_size())
             info_tree.info.max_rows = max_rows
 
         # If count is below the threshold, just download and compare the columns locally
         # This saves time, as bisection speed is limited by ping and query performance.
-        if self.bisection_disabled or max_rows < self.bisection_threshold or max_space_size < self.bisection_factor * 2:
-            rows1, rows2 = self._threaded_call("get_values", [table1, table2])
+        if self._is_leaf_segment(table1, table2, max_rows):
+            entry = self._checkpoint.get(table1) if self._checkpoint is not None else None
+            if entry is not None and entry["status"] == "diffed":
+                diff = [(sign, tuple(row)) for sign, row in entry["diff"]]
+                info_tree.info.set_diff(diff)
+                count1, count2 = entry["rowcounts"]
+                info_tree.info.rowcounts = {1: count1, 2: count2}
+                self._progress_segment_done(table1)
+                return diff
+
+            if prefetch is not None:
+                rows1, rows2 = self._get_executor().result(prefetch)
+            else:
+                rows1, rows2 = self._query_tables("get_values", table1, table2)
             json_cols = {
                 i: colname
                 for i, colname in enumerate(table1.extra_columns)
-                if isinstance(table1._schema[colname], JSON)
+                if colname in table1.relevant_columns and isinstance(table1._schema[colname], JSON)
             }
-            diff = list(
-                diff_sets(
-                    rows1,
-                    rows2,
-                    json_cols=json_cols,
-                    columns1=table1.relevant_columns,
-                    columns2=table2.relevant_columns,
-                    key_columns1=table1.key_columns,
-                    key_columns2=table2.key_columns,
-                    ignored_columns1=self.ignored_columns1,
-                    ignored_columns2=self.ignored_columns2,
-                )
+            # A snapshot, since leaf processes receive the columns after this thread moves on
+            with self._ignored_columns_lock:
+                ignored_columns1, ignored_columns2 = frozenset(self.ignored_columns1), frozenset(self.ignored_columns2)
+            diff = self._diff_leaf(
+                diff_sets_duckdb if self.duckdb_leaf_diff else diff_sets,
+                rows1,
+                rows2,
+                json_cols=json_cols,
+                columns1=table1.relevant_columns,
+                columns2=table2.relevant_columns,
+                key_columns1=table1.key_columns,
+                key_columns2=table2.key_columns,
+                ignored_columns1=ignored_columns1,
+                ignored_columns2=ignored_columns2,
             )
 
             info_tree.info.set_diff(diff)
@@ -259,6 +659,17 @@ class HashDiffer(TableDiffer):
 
             logger.info(". " * level + f"Diff found {len(diff)} different rows.")
             self.stats["rows_downloaded"] = self.stats.get("rows_downloaded", 0) + max(len(rows1), len(rows2))
+            if self.progress is not None:
+                self.progress.add_rows(1, len(rows1), downloaded=True)
+                self.progress.add_rows(2, len(rows2), downloaded=True)
+                self._progress_segment_done(table1)
+            if self._checkpoint is not None:
+                rowcounts = [len(rows1), len(rows2)]
+                self._checkpoint.record(table1, "diffed", max_rows=max_rows, rowcounts=rowcounts, diff=diff)
             return diff
 
+        # Bigger than expected, so it's bisected instead
+        self._discard_prefetch(prefetch)
+        if self._checkpoint is not None and self._checkpoint.get(table1) is None:
+            self._checkpoint.record(table1, "bisected", max_rows=max_rows)
         return super()._bisect_and_diff_segments(ti, table1, table2, info_tree, level, max_rows)
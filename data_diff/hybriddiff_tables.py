@@ -0,0 +1,234 @@
+"""Provides classes for performing a table diff across databases, by joining locally when it's cheaper than bisecting"""
+
+import logging
+from math import ceil
+from typing import Iterator, List, Optional, Tuple
+
+import attrs
+
+from data_diff.abcs.database_types import DbPath, IKey
+from data_diff.databases.duckdb import DuckDB
+from data_diff.diff_tables import DiffResult
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.info_tree import InfoTree
+from data_diff.joindiff_tables import JoinDiffer
+from data_diff.queries.api import commit, table
+from data_diff.query_utils import drop_table
+from data_diff.table_segment import TableSegment
+from data_diff.utils import safezip
+
+logger = logging.getLogger("hybriddiff_tables")
+
+DEFAULT_MAX_LOCAL_ROWS = 1024 * 1024
+DEFAULT_DIVERGENCE_THRESHOLD = 0.5
+DEFAULT_DOWNLOAD_CHUNK_SIZE = 1024 * 64
+
+
+@attrs.define(frozen=False)
+class HybridDiffer(HashDiffer):
+    """Finds the diff between two SQL tables, possibly in different databases
+
+    First estimates the rows on each side, and then chooses one of these strategies:
+
+    - If the tables are small enough, both sides are downloaded in bulk into a local in-memory DuckDB, and diffed
+      there with a single outer join (see :class:`JoinDiffer`).
+    - If their row counts diverge so much that bisection would end up downloading most of the rows anyway
+      (through many small queries), and the smaller side is small enough, the tables are joined locally one key
+      range at a time. Each range holds about `download_chunk_size` rows of the bigger table, so the memory stays
+      bounded however big it is. Since at least half of the bigger table is in the diff, downloading all of it
+      costs at most twice the diff itself.
+    - Otherwise, falls back to bisection (see :class:`HashDiffer`).
+
+    The estimates come from the catalog statistics when the database has them, and the segments are whole tables
+    (see :meth:`Database.query_table_statistics`), so that no table is scanned before bisecting. A local join is
+    only chosen from exact counts, since the statistics may be stale.
+
+    Rows are normalized to strings before being transferred, the same way that HashDiffer normalizes them
+    for comparison, so the results are the same regardless of the chosen strategy.
+
+    Requires the `duckdb` package.
+
+    Parameters:
+        max_local_rows (int): Join locally when both tables combined have up to this many rows. When the row counts
+                              diverge, the smaller table must have up to this many rows.
+        divergence_threshold (float): Join locally in chunks when the row counts differ by at least this fraction
+                                      of the bigger table.
+        download_chunk_size (int): Approximate number of rows to download per query, when joining locally.
+
+    See :class:`HashDiffer` for the rest of the parameters.
+    """
+
+    max_local_rows: int = DEFAULT_MAX_LOCAL_ROWS
+    divergence_threshold: float = DEFAULT_DIVERGENCE_THRESHOLD
+    download_chunk_size: int = DEFAULT_DOWNLOAD_CHUNK_SIZE
+
+    def _diff_tables_root(self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree):
+        count1, count2 = self._thread_map(_catalog_row_count, [table1, table2])
+        if count1 is None or count2 is None or self._choose_strategy(count1, count2) != "bisection":
+            count1, count2 = self._threaded_call("count", [table1, table2])
+
+        strategy = self._choose_strategy(count1, count2)
+        chunks = None
+        if strategy == "chunked_join":
+            chunks = self._split_by_key_range(table1, table2, max(count1, count2))
+            if chunks is None:
+                strategy = "bisection"
+
+        divergence = abs(count1 - count2) / max(count1, count2, 1)
+        self.stats["hybrid_strategy"] = strategy
+        if strategy == "local_join":
+            logger.info(f"Joining locally ({count1} <> {count2} rows, divergence {divergence:.2f})")
+            return self._diff_tables_locally(table1, table2, info_tree, count1, count2)
+        if strategy == "chunked_join":
+            logger.info(
+                f"Joining locally in {len(chunks)} chunks ({count1} <> {count2} rows, divergence {divergence:.2f})"
+            )
+            return self._diff_chunks_locally(chunks, info_tree, count1, count2)
+
+        logger.info(f"Bisecting (about {count1} <> {count2} rows, divergence {divergence:.2f})")
+        return super()._diff_tables_root(table1, table2, info_tree)
+
+    def _choose_strategy(self, count1: int, count2: int) -> str:
+        if count1 + count2 <= self.max_local_rows:
+            return "local_join"
+        divergence = abs(count1 - count2) / max(count1, count2, 1)
+        if divergence >= self.divergence_threshold and min(count1, count2) <= self.max_local_rows:
+            return "chunked_join"
+        return "bisection"
+
+    def _diff_tables_locally(
+        self, table1: TableSegment, table2: TableSegment, info_tree: InfoTree, count1: int, count2: int
+    ) -> DiffResult:
+        local_db = DuckDB(filepath=":memory:")
+        if self.progress is not None:
+            # Measured in rows, since the tables are downloaded in chunks instead of bisected
+            self.progress.add_keyspace(count1 + count2)
+        try:
+            local1, local2 = self._download_tables(local_db, [(table1, count1), (table2, count2)])
+            self.stats["rows_downloaded"] = self.stats.get("rows_downloaded", 0) + count1 + count2
+
+            differ = self._local_join_differ()
+            yield from differ._diff_tables_root(local1, local2, info_tree)
+            self.stats.update(differ.stats)
+        finally:
+            local_db.close()
+
+    def _diff_chunks_locally(
+        self, chunks: List[Tuple[TableSegment, TableSegment]], info_tree: InfoTree, count1: int, count2: int
+    ) -> DiffResult:
+        local_db = DuckDB(filepath=":memory:")
+        if self.progress is not None:
+            self.progress.add_keyspace(count1 + count2)
+        try:
+            differ = self._local_join_differ()
+            # Download a few chunks at a time, so that only those are held in memory
+            window = self._get_executor().max_workers if self.threaded else 1
+            for start in range(0, len(chunks), window):
+                downloads = self._thread_as_completed(
+                    self._download_chunk, enumerate(chunks[start : start + window], start)
+                )
+                for i, (segment1, segment2), rows1, rows2 in downloads:
+                    local1 = self._create_local_table(local_db, (f"chunk{i}_1",), segment1)
+                    local2 = self._create_local_table(local_db, (f"chunk{i}_2",), segment2)
+                    local_db.insert_rows_bulk(local1.table_path, segment1.relevant_columns, rows1)
+                    local_db.insert_rows_bulk(local2.table_path, segment2.relevant_columns, rows2)
+                    self.stats["rows_downloaded"] = self.stats.get("rows_downloaded", 0) + len(rows1) + len(rows2)
+
+                    yield from differ._diff_tables_root(local1, local2, info_tree.add_node(segment1, segment2))
+                    drop_table(local_db, local1.table_path)
+                    drop_table(local_db, local2.table_path)
+            self.stats.update(differ.stats)
+        finally:
+            local_db.close()
+
+    def _local_join_differ(self) -> JoinDiffer:
+        # Uniqueness is validated locally, where it's cheap. Rows with NULL keys are skipped, like in bisection.
+        return JoinDiffer(threaded=self.threaded, max_threadpool_size=self.max_threadpool_size, skip_null_keys=True)
+
+    def _create_local_table(self, local_db: DuckDB, path: DbPath, t: TableSegment) -> TableSegment:
+        columns = t.relevant_columns
+        local_db.query([table(path, schema={c: str for c in columns}).create(), commit])
+        return TableSegment(
+            local_db,
+            path,
+            t.key_columns,
+            extra_columns=tuple(columns[len(t.key_columns) :]),
+            case_sensitive=t.case_sensitive,
+        )
+
+    def _download_segment(self, side: int, segment: TableSegment) -> list:
+        if self.progress is None:
+            return segment.get_values()
+
+        with self.progress.query(side):
+            rows = segment.get_values()
+        self.progress.add_rows(side, len(rows), downloaded=True)
+        self.progress.segment_done(len(rows))
+        return rows
+
+    def _download_chunk(self, item):
+        i, (segment1, segment2) = item
+        return i, (segment1, segment2), self._download_segment(1, segment1), self._download_segment(2, segment2)
+
+    def _download_tables(
+        self, local_db: DuckDB, tables: List[Tuple[TableSegment, int]]
+    ) -> Tuple[TableSegment, TableSegment]:
+        local_tables = []
+        chunks = []
+        for i, (t, count) in enumerate(tables, 1):
+            local_table = self._create_local_table(local_db, (f"table{i}",), t)
+            local_tables.append(local_table)
+            chunks += [
+                (i, local_table.table_path, t.relevant_columns, chunk) for chunk in self._split_for_download(t, count)
+            ]
+
+        # Download in parallel, but insert from a single thread, since the connection isn't thread-safe
+        def download(item):
+            side, path, columns, segment = item
+            return path, columns, self._download_segment(side, segment)
+
+        for path, columns, rows in self._thread_as_completed(download, chunks):
+            local_db.insert_rows_bulk(path, columns, rows)
+
+        return tuple(local_tables)
+
+    def _split_for_download(self, t: TableSegment, count: int) -> Iterator[TableSegment]:
+        key_types = [t._schema[k] for k in t.key_columns]
+        if count <= self.download_chunk_size or not all(isinstance(kt, IKey) for kt in key_types):
+            yield t
+            return
+
+        min_key, max_key = self._parse_key_range_result(key_types, t.query_key_range())
+        bounded = t.new_key_bounds(min_key=min_key, max_key=max_key, key_types=key_types)
+        checkpoints = bounded.choose_checkpoints(ceil(count / self.download_chunk_size) - 1)
+        yield from bounded.segment_by_checkpoints(checkpoints)
+
+    def _split_by_key_range(
+        self, table1: TableSegment, table2: TableSegment, count: int
+    ) -> Optional[List[Tuple[TableSegment, TableSegment]]]:
+        """Splits both tables by the same key ranges, of about `download_chunk_size` rows of the bigger table.
+
+        Returns None if the keys can't be split into ranges.
+        """
+        key_types1 = [table1._schema[k] for k in table1.key_columns]
+        key_types2 = [table2._schema[k] for k in table2.key_columns]
+        if not all(isinstance(kt, IKey) for kt in key_types1 + key_types2):
+            return None
+
+        bounding_box = self._query_bounding_box(table1, table2, key_types1, key_types2)
+        if bounding_box is None:
+            return []  # Only rows with NULL keys, which are skipped
+
+        min_key, max_key = bounding_box
+        btable1 = table1.new_key_bounds(min_key=min_key, max_key=max_key, key_types=key_types1)
+        btable2 = table2.new_key_bounds(min_key=min_key, max_key=max_key, key_types=key_types2)
+        checkpoints = btable1.choose_checkpoints(ceil(count / self.download_chunk_size) - 1)
+        return list(safezip(btable1.segment_by_checkpoints(checkpoints), btable2.segment_by_checkpoints(checkpoints)))
+
+
+def _catalog_row_count(t: TableSegment) -> Optional[int]:
+    "The estimated row count of the segment from the catalog, if it's a whole table. Doesn't scan the table."
+    if t.where or t.is_partition or any(v is not None for v in (t.min_key, t.max_key, t.min_update, t.max_update)):
+        return None
+    stats = t.database.query_table_statistics(t.table_path)
+    return stats.row_count if stats is not None else None
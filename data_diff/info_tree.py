@@ -1,4 +1,5 @@
-from typing import List, Dict, Optional, Any, Tuple, Union
+from itertools import chain
+from typing import Iterator, List, Dict, Optional, Any, Sequence, Tuple, Union
 
 import attrs
 from typing_extensions import Self
@@ -6,23 +7,38 @@ from typing_extensions import Self
 from data_diff.table_segment import TableSegment
 
 
+@attrs.define(frozen=True)
+class DiffChain:
+    "The diffs of several segments, concatenated lazily (without copying)"
+
+    parts: List[Sequence[Any]]
+
+    def __iter__(self) -> Iterator[Any]:
+        return chain.from_iterable(self.parts)
+
+    def __len__(self) -> int:
+        return sum(map(len, self.parts))
+
+
 @attrs.define(frozen=False)
 class SegmentInfo:
     tables: List[TableSegment]
 
-    diff: Optional[List[Union[Tuple[Any, ...], List[Any]]]] = None
+    diff: Optional[Union[List[Union[Tuple[Any, ...], List[Any]]], DiffChain]] = None
     diff_schema: Optional[Tuple[Tuple[str, type], ...]] = None
     is_diff: Optional[bool] = None
     diff_count: Optional[int] = None
 
     rowcounts: Dict[int, int] = attrs.field(factory=dict)
     max_rows: Optional[int] = None
+    # If false, only diff_count is kept, and the rows themselves are dropped
+    retain_diff: bool = True
 
     def set_diff(
         self, diff: List[Union[Tuple[Any, ...], List[Any]]], schema: Optional[Tuple[Tuple[str, type]]] = None
     ) -> None:
         self.diff_schema = schema
-        self.diff = diff
+        self.diff = diff if self.retain_diff else None
         self.diff_count = len(diff)
         self.is_diff = self.diff_count > 0
 
@@ -30,11 +46,11 @@ class SegmentInfo:
         child_infos = list(child_infos)
         assert child_infos
 
-        # self.diff = list(chain(*[c.diff for c in child_infos]))
         self.diff_count = sum(c.diff_count for c in child_infos if c.diff_count is not None)
         self.is_diff = any(c.is_diff for c in child_infos)
         self.diff_schema = next((child.diff_schema for child in child_infos if child.diff_schema is not None), None)
-        self.diff = sum((c.diff for c in child_infos if c.diff is not None), [])
+        if self.retain_diff:
+            self.diff = DiffChain([c.diff for c in child_infos if c.diff is not None])
 
         self.rowcounts = {
             1: sum(c.rowcounts[1] for c in child_infos if c.rowcounts),
@@ -51,7 +67,7 @@ class InfoTree:
 
     def add_node(self, table1: TableSegment, table2: TableSegment, max_rows: Optional[int] = None) -> Self:
         cls = self.__class__
-        node = cls(cls.SEGMENT_INFO_CLASS([table1, table2], max_rows=max_rows))
+        node = cls(cls.SEGMENT_INFO_CLASS([table1, table2], max_rows=max_rows, retain_diff=self.info.retain_diff))
         self.children.append(node)
         return node
 
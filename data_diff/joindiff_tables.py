@@ -120,9 +120,9 @@ class JoinDiffer(TableDiffer):
 
     Parameters:
         threaded (bool): Enable/disable threaded diffing. Needed to take advantage of database threads.
-        max_threadpool_size (int): Maximum size of each threadpool. ``None`` means auto.
-                                   Only relevant when `threaded` is ``True``.
-                                   There may be many pools, so number of actual threads can be a lot higher.
+        max_threadpool_size (int): Maximum number of threads of the differ, shared by all of its tasks.
+                                   ``None`` means auto. Only relevant when `threaded` is ``True``.
+                                   Database connections have threads of their own (see `thread_count`).
         validate_unique_key (bool): Enable/disable validating that the key columns are unique. (default: True)
                                     If there are no UNIQUE constraints in the schema, it is done in a single query,
                                     and can't be threaded, so it's very slow on non-cloud dbs.
@@ -132,6 +132,15 @@ class JoinDiffer(TableDiffer):
         materialize_all_rows (bool): Materialize every row, not just those that are different. (default: False)
         table_write_limit (int): Maximum number of rows to write when materializing, per thread.
         skip_null_keys (bool): Skips diffing any rows with null PKs (displays a warning if any are null) (default: False)
+        table_partitions (bool): Set the segments' `partition_column` from the database catalog, if the table is
+                                 partitioned by a single column. (default: False)
+        max_partitions (int): When there are more distinct partition values than this, segment by key instead.
+        max_rows_in_memory (int, optional): How many diff rows to keep in memory, before spilling them to a
+                                            temporary file on disk. ``None`` means never spill.
+        max_buffered_results (int, optional): How many results the threads may buffer, before they wait for the
+                                              consumer to read them. ``None`` means unbounded. (default: 64K)
+        retain_diffs (bool): Keep the diff of each segment in the info tree, after yielding it. Needed for
+                             inspecting `info_tree.info.diff`, but holds every difference in memory. (default: True)
     """
 
     validate_unique_key: bool = True
@@ -158,6 +167,7 @@ class JoinDiffer(TableDiffer):
         with self._run_in_background(*bg_funcs):
             if isinstance(db, (Snowflake, BigQuery, DuckDB)):
                 # Don't segment the table; let the database handling parallelization
+                self._progress_add_segment(table1)
                 yield from self._diff_segments(None, table1, table2, info_tree, None)
             else:
                 yield from self._bisect_and_diff_tables(table1, table2, info_tree)
@@ -225,6 +235,8 @@ class JoinDiffer(TableDiffer):
                 if not is_xa:
                     yield "+", tuple(b_row)
 
+        self._progress_segment_done(table1)
+
     def _test_duplicate_keys(self, table1: TableSegment, table2: TableSegment):
         logger.debug(f"Testing for duplicate keys: {table1.table_path} <> {table2.table_path}")
 
@@ -0,0 +1,232 @@
+"""Estimates the cost of a hashdiff before running it, from the key ranges and the catalog, without scanning the tables
+
+The estimates are for three scenarios:
+    - min: the tables are identical, so only the first level of segments is checksummed.
+    - per_diff: each additional difference (an isolated row), which is bisected down to a leaf and downloaded.
+    - max: every segment differs, so every level is checksummed, and every row is downloaded.
+"""
+
+from typing import Any, Dict, Optional, Tuple
+
+import attrs
+
+from data_diff.diff_tables import _query_key_range_if_not_empty
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.table_segment import TableSegment
+from data_diff.utils import Vector, number_to_human
+
+
+@attrs.define(frozen=True)
+class TablePlan:
+    """What's known about one side of the diff, before running it.
+
+    Attributes:
+        row_count (int, optional): Estimated number of rows.
+        row_count_source (str): "catalog", or "key range" (the size of the key-space, an upper bound for unique keys).
+        scan_bytes (int, optional): Bytes scanned by checksumming the whole table.
+        segment_scan_bytes (int, optional): Bytes scanned by checksumming one segment of the first level.
+                                            Equal to `scan_bytes` when the key range doesn't prune the scan.
+        scan_bytes_source (str, optional): "estimate" (from the database, e.g. a dry run), or "catalog".
+    """
+
+    database: str
+    table_path: Tuple[str, ...]
+    row_count: Optional[int]
+    row_count_source: Optional[str]
+    min_key: Optional[tuple]
+    max_key: Optional[tuple]
+    scan_bytes: Optional[int] = None
+    segment_scan_bytes: Optional[int] = None
+    scan_bytes_source: Optional[str] = None
+
+    def scan_bytes_at_level(self, level: int, factor: int) -> Optional[float]:
+        "Bytes scanned by checksumming (or downloading) one segment at the given level of the bisection"
+        if self.scan_bytes is None:
+            return None
+        if level == 0 or self.segment_scan_bytes is None:
+            return self.scan_bytes / factor**level
+        # Extrapolate the pruning of the first level: 1/factor when it's perfect, 1 when there's none
+        ratio = self.segment_scan_bytes / self.scan_bytes if self.scan_bytes else 1 / factor
+        return self.scan_bytes * ratio**level
+
+
+@attrs.define(frozen=True)
+class DiffPlan:
+    """The expected shape and cost of a hashdiff, estimated without running it.
+
+    Checksum queries and scanned bytes count both tables. Levels are the depth of bisection, at which
+    the segments are small enough (below `bisection_threshold`) to be downloaded and compared locally.
+    """
+
+    tables: Tuple[TablePlan, TablePlan]
+    bisection_factor: int
+    bisection_threshold: int
+    levels: int
+    leaf_rows: int
+    checksum_queries: Dict[str, int]
+    scanned_bytes: Dict[str, Optional[int]]
+    downloaded_rows: Dict[str, int]
+
+    def as_dict(self) -> Dict[str, Any]:
+        return attrs.asdict(self, recurse=True)
+
+    def __str__(self) -> str:
+        def human(n: Optional[int]) -> str:
+            return "?" if n is None else number_to_human(n)
+
+        def human_bytes(n: Optional[int]) -> str:
+            return "?" if n is None else f"{number_to_human(n)}B"
+
+        lines = [f"Plan (bisection factor {self.bisection_factor}, threshold {self.bisection_threshold}):"]
+        for i, t in enumerate(self.tables, 1):
+            scan = f"{human_bytes(t.scan_bytes)} per full scan ({t.scan_bytes_source or 'unknown'})"
+            lines.append(
+                f"  table{i}: {t.database} {'.'.join(t.table_path)}, ~{human(t.row_count)} rows "
+                f"({t.row_count_source or 'unknown'}), key range {t.min_key}..{t.max_key}, {scan}"
+            )
+
+        def scenarios(name: str, values: Dict[str, Optional[int]], fmt) -> str:
+            return (
+                f"  {name}: {fmt(values['min'])} if the tables match, "
+                f"+{fmt(values['per_diff'])} per difference, up to {fmt(values['max'])}"
+            )
+
+        lines.append(f"  Bisection levels: {self.levels}, down to segments of ~{human(self.leaf_rows)} rows")
+        lines.append(scenarios("Checksum queries", self.checksum_queries, human))
+        lines.append(scenarios("Scanned bytes", self.scanned_bytes, human_bytes))
+        lines.append(scenarios("Downloaded rows", self.downloaded_rows, human))
+        return "\n".join(lines)
+
+
+def _sum_or_none(*values: Optional[float]) -> Optional[int]:
+    if any(v is None for v in values):
+        return None
+    return int(sum(values))
+
+
+def estimate_bisection(
+    row_count: int, keyspace_size: int, bisection_factor: int, bisection_threshold: int
+) -> Tuple[int, int]:
+    """Returns the number of checksum levels, and the approximate row count of the leaf segments.
+
+    Mirrors HashDiffer: the first split is decided by the size of the key-space, and the next ones by row count.
+    """
+    if keyspace_size < bisection_threshold or keyspace_size < bisection_factor * 2:
+        return 0, row_count
+
+    levels = 1
+    segment_rows = row_count / bisection_factor
+    while segment_rows >= bisection_threshold:
+        segment_rows /= bisection_factor
+        levels += 1
+    return levels, int(segment_rows)
+
+
+def _plan_table(differ: HashDiffer, table: TableSegment, key_range) -> TablePlan:
+    stats = table.database.query_table_statistics(table.table_path)
+    min_key, max_key = key_range or (None, None)
+
+    if stats is not None and stats.row_count is not None:
+        row_count, row_count_source = stats.row_count, "catalog"
+    elif key_range is not None:
+        row_count, row_count_source = table.new_key_bounds(min_key, max_key).approximate_size(), "key range"
+    else:
+        row_count, row_count_source = 0, "key range"
+
+    scan_bytes = segment_scan_bytes = scan_bytes_source = None
+    estimate = table.database.estimate_query_bytes(table.make_checksum_select())
+    if estimate is not None:
+        scan_bytes, scan_bytes_source = estimate, "estimate"
+        if key_range is not None:
+            bounded = table.new_key_bounds(min_key, max_key)
+            segments = bounded.segment_by_checkpoints(bounded.choose_checkpoints(differ.bisection_factor - 1))
+            segment_scan_bytes = table.database.estimate_query_bytes(
+                segments[len(segments) // 2].make_checksum_select()
+            )
+    elif stats is not None and stats.size_bytes is not None:
+        scan_bytes, scan_bytes_source = stats.size_bytes, "catalog"
+
+    return TablePlan(
+        table.database.name,
+        tuple(table.table_path),
+        row_count,
+        row_count_source,
+        min_key,
+        max_key,
+        scan_bytes,
+        segment_scan_bytes,
+        scan_bytes_source,
+    )
+
+
+def plan_diff(differ: HashDiffer, table1: TableSegment, table2: TableSegment) -> DiffPlan:
+    """Estimate the queries, scanned bytes and downloads of diffing the tables with the given differ.
+
+    Only runs metadata queries, and the key-range query of each table (min/max of the key columns).
+    Scanned bytes are estimated by the database when it can (BigQuery dry runs, Snowflake EXPLAIN),
+    and otherwise from the size of the table in the catalog, assuming that the key range prunes the scan.
+    """
+    if not isinstance(differ, HashDiffer):
+        raise ValueError("Only hashdiff (and hybrid) diffs can be planned")
+
+    table1, table2 = differ._threaded_call("with_schema", [table1, table2])
+    key_types = [[t._schema[k] for k in t.key_columns] for t in (table1, table2)]
+    key_ranges = [
+        key_range and differ._parse_key_range_result(types, key_range)
+        for types, key_range in zip(key_types, differ._thread_map(_query_key_range_if_not_empty, [table1, table2]))
+    ]
+    plans = tuple(differ._thread_map(lambda args: _plan_table(differ, *args), zip([table1, table2], key_ranges)))
+
+    # The bisection covers the bounding box of both key ranges
+    bounds = [r for r in key_ranges if r is not None]
+    if bounds:
+        min_keys, max_keys = zip(*bounds)
+        min_key = Vector(min(k) for k in zip(*min_keys))
+        max_key = Vector(max(k) for k in zip(*max_keys))
+        keyspace_size = table1.new_key_bounds(min_key, max_key).approximate_size()
+    else:
+        keyspace_size = 0
+
+    factor = differ.bisection_factor
+    rows = max(p.row_count for p in plans)
+    levels, leaf_rows = estimate_bisection(rows, keyspace_size, factor, differ.bisection_threshold)
+
+    if levels == 0:
+        # Downloaded right away
+        checksum_queries = {"min": 0, "per_diff": 0, "max": 0}
+        scanned = [p.scan_bytes_at_level(0, factor) for p in plans]
+        scanned_bytes = {"min": _sum_or_none(*scanned), "per_diff": 0, "max": _sum_or_none(*scanned)}
+        downloaded = sum(p.row_count for p in plans)
+        downloaded_rows = {"min": downloaded, "per_diff": 0, "max": downloaded}
+    else:
+        # Each level checksums `factor` segments per bisected segment, on both sides
+        checksum_queries = {
+            "min": 2 * factor,
+            "per_diff": 2 * factor * (levels - 1),
+            "max": 2 * sum(factor**level for level in range(1, levels + 1)),
+        }
+
+        def side_bytes(p: TablePlan) -> Dict[str, Optional[float]]:
+            at = [p.scan_bytes_at_level(level, factor) for level in range(levels + 1)]
+            if at[0] is None:
+                return {"min": None, "per_diff": None, "max": None}
+            return {
+                "min": factor * at[1],
+                "per_diff": sum(factor * at[level] for level in range(2, levels + 1)) + at[levels],
+                "max": sum(factor**level * at[level] for level in range(1, levels + 1)) + factor**levels * at[levels],
+            }
+
+        sides = [side_bytes(p) for p in plans]
+        scanned_bytes = {k: _sum_or_none(*(s[k] for s in sides)) for k in ("min", "per_diff", "max")}
+        downloaded_rows = {"min": 0, "per_diff": 2 * leaf_rows, "max": sum(p.row_count for p in plans)}
+
+    return DiffPlan(
+        plans,
+        factor,
+        differ.bisection_threshold,
+        levels,
+        leaf_rows,
+        checksum_queries,
+        scanned_bytes,
+        downloaded_rows,
+    )
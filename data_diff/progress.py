@@ -0,0 +1,227 @@
+"""Tracks the progress of a diff (key-space covered, rows processed, queries per database), and reports it live"""
+
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, IO, Iterator, Optional
+
+import attrs
+
+from data_diff.utils import number_to_human
+
+DEFAULT_REPORT_INTERVAL = 1.0
+
+
+@attrs.define(frozen=False, eq=False)
+class DatabaseProgress:
+    "Query counters of one side of the diff"
+
+    name: Optional[str] = None
+    queries: int = 0
+    in_flight: int = 0
+    rows: int = 0
+    busy_seconds: float = 0.0
+
+    def as_dict(self, elapsed: float) -> Dict[str, Any]:
+        return {
+            "database": self.name,
+            "queries": self.queries,
+            "in_flight": self.in_flight,
+            "rows": self.rows,
+            "queries_per_sec": self.queries / elapsed if elapsed else 0.0,
+            "rows_per_sec": self.rows / elapsed if elapsed else 0.0,
+            "avg_query_seconds": self.busy_seconds / self.queries if self.queries else None,
+        }
+
+
+@attrs.define(frozen=False, eq=False)
+class DiffProgress:
+    """Tracks the progress of a diff, as its segments complete. Thread-safe.
+
+    The key-space is measured by the approximate size of each segment (see `TableSegment.approximate_size()`).
+    Its total is only an estimate until the key ranges of both tables are known, and it's refined as segments
+    are bisected, so the completed fraction (and the ETA) become more accurate as the diff runs.
+
+    Rows are counted per side: the rows checksummed by the database, and the rows downloaded for local comparison.
+    """
+
+    keyspace_total: int = 0
+    keyspace_done: int = 0
+    segments_done: int = 0
+    rows_checksummed: int = 0
+    rows_downloaded: int = 0
+    first_diff_seconds: Optional[float] = None
+    databases: Dict[int, DatabaseProgress] = attrs.field(factory=lambda: {1: DatabaseProgress(), 2: DatabaseProgress()})
+
+    _start: float = attrs.field(factory=time.monotonic, init=False)
+    _lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+
+    def set_database_names(self, name1: str, name2: str) -> None:
+        self.databases[1].name = name1
+        self.databases[2].name = name2
+
+    def add_keyspace(self, size: int) -> None:
+        "Add a top-level segment to the total"
+        with self._lock:
+            self.keyspace_total += size
+
+    def split_keyspace(self, size: int, child_sizes: Iterator[int]) -> None:
+        "Replace a segment by its children, whose approximate sizes may not add up exactly to its own"
+        with self._lock:
+            self.keyspace_total += sum(child_sizes) - size
+
+    def segment_done(self, size: int) -> None:
+        with self._lock:
+            self.keyspace_done += size
+            self.segments_done += 1
+
+    def add_rows(self, side: int, rows: int, *, downloaded: bool) -> None:
+        with self._lock:
+            self.databases[side].rows += rows
+            if downloaded:
+                self.rows_downloaded += rows
+            else:
+                self.rows_checksummed += rows
+
+    def first_diff(self) -> None:
+        "Record that the first difference was found"
+        with self._lock:
+            if self.first_diff_seconds is None:
+                self.first_diff_seconds = time.monotonic() - self._start
+
+    @contextmanager
+    def query(self, side: int) -> Iterator[None]:
+        "Measures a query to the database of the given side (1 or 2)"
+        db = self.databases[side]
+        with self._lock:
+            db.in_flight += 1
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            with self._lock:
+                db.in_flight -= 1
+                db.queries += 1
+                db.busy_seconds += time.monotonic() - start
+
+    def snapshot(self) -> Dict[str, Any]:
+        "Returns the current progress, as a JSON-serializable dict"
+        with self._lock:
+            elapsed = time.monotonic() - self._start
+            fraction = min(self.keyspace_done / self.keyspace_total, 1.0) if self.keyspace_total else 0.0
+            rows = self.rows_checksummed + self.rows_downloaded
+            return {
+                "elapsed_seconds": elapsed,
+                "keyspace_fraction": fraction,
+                "eta_seconds": elapsed * (1 - fraction) / fraction if fraction else None,
+                "segments_done": self.segments_done,
+                "rows_checksummed": self.rows_checksummed,
+                "rows_downloaded": self.rows_downloaded,
+                "rows_per_sec": rows / elapsed if elapsed else 0.0,
+                "first_diff_seconds": self.first_diff_seconds,
+                "databases": {str(side): db.as_dict(elapsed) for side, db in self.databases.items()},
+            }
+
+
+def _format_seconds(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "?"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02}:{seconds:02}" if hours else f"{minutes}:{seconds:02}"
+
+
+def format_progress(snapshot: Dict[str, Any], width: int = 20) -> str:
+    "Renders a snapshot as a single line, with a progress bar"
+    fraction = snapshot["keyspace_fraction"]
+    filled = int(fraction * width)
+    bar = "#" * filled + "-" * (width - filled)
+    sides = "  ".join(
+        f"db{side}: {db['queries_per_sec']:.1f} q/s, {number_to_human(int(db['rows_per_sec']))} rows/s"
+        f" ({db['in_flight']} running)"
+        for side, db in snapshot["databases"].items()
+    )
+    first_diff = snapshot.get("first_diff_seconds")
+    first_diff = "" if first_diff is None else f"  first diff at {_format_seconds(first_diff)}"
+    return (
+        f"[{bar}] {fraction:6.1%}  elapsed {_format_seconds(snapshot['elapsed_seconds'])}"
+        f"  eta {_format_seconds(snapshot['eta_seconds'])}{first_diff}"
+        f"  rows: {number_to_human(snapshot['rows_checksummed'])} checksummed,"
+        f" {number_to_human(snapshot['rows_downloaded'])} downloaded  {sides}"
+    )
+
+
+@attrs.define(frozen=False, eq=False)
+class ProgressReporter:
+    """Reports the progress of a diff from a background thread, every `interval` seconds, and once more when stopped.
+
+    Parameters:
+        progress (DiffProgress): The progress to report.
+        report (Callable): Called with each snapshot (see `DiffProgress.snapshot()`). The last one has
+                           ``finished`` set to ``True``.
+        interval (float): Seconds between reports.
+    """
+
+    progress: DiffProgress
+    report: Callable[[Dict[str, Any]], None]
+    interval: float = DEFAULT_REPORT_INTERVAL
+
+    _stopped: threading.Event = attrs.field(factory=threading.Event, init=False)
+    _thread: Optional[threading.Thread] = attrs.field(default=None, init=False)
+
+    def _run(self) -> None:
+        while not self._stopped.wait(self.interval):
+            self._report(finished=False)
+
+    def _report(self, finished: bool) -> None:
+        snapshot = self.progress.snapshot()
+        snapshot["finished"] = finished
+        self.report(snapshot)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="data-diff-progress", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stopped.set()
+        self._thread.join()
+        self._thread = None
+        self._report(finished=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+def progress_bar_printer(file: Optional[IO] = None) -> Callable[[Dict[str, Any]], None]:
+    "Prints each snapshot as a progress line to `file` (default: stderr). On a terminal, the line is redrawn in place."
+    file = file or sys.stderr
+    interactive = file.isatty()
+
+    def report(snapshot: Dict[str, Any]) -> None:
+        line = format_progress(snapshot)
+        if interactive:
+            file.write(f"\r\x1b[K{line}" + ("\n" if snapshot.get("finished") else ""))
+        else:
+            file.write(line + "\n")
+        file.flush()
+
+    return report
+
+
+def progress_event_printer(file: Optional[IO] = None) -> Callable[[Dict[str, Any]], None]:
+    "Prints each snapshot as a JSON object, one per line, to `file` (default: stderr)"
+    file = file or sys.stderr
+
+    def report(snapshot: Dict[str, Any]) -> None:
+        file.write(json.dumps({"progress": snapshot}) + "\n")
+        file.flush()
+
+    return report
@@ -1,4 +1,4 @@
-from data_diff.utils import CaseAwareMapping, CaseSensitiveDict
+from data_diff.utils import CaseAwareMapping, CaseSensitiveDict, batched
 from data_diff.queries.ast_classes import *
 from data_diff.queries.base import args_as_tuple
 
@@ -152,11 +152,12 @@ def coalesce(*exprs) -> Func:
 
 
 def insert_rows_in_batches(db, tbl: TablePath, rows, *, columns=None, batch_size=1024 * 8) -> None:
-    assert batch_size > 0
-    rows = list(rows)
+    """Insert the rows with multi-row INSERT statements, of up to batch_size rows each.
 
-    while rows:
-        batch, rows = rows[:batch_size], rows[batch_size:]
+    Accepts any iterable, and consumes it lazily.
+    For large inputs, prefer `Database.insert_rows_bulk()`, which uses the driver's bulk-loading path when available.
+    """
+    for batch in batched(rows, batch_size):
         db.query(tbl.insert_rows(batch, columns=columns))
 
 
@@ -27,3 +27,5 @@ class ApplyFuncAndNormalizeAsString(ExprNode):
 @attrs.define(frozen=True)
 class Checksum(ExprNode):
     exprs: Sequence[Expr]
+    # Use the engine's native hash, instead of md5. Only comparable within the same engine.
+    native: bool = False
@@ -0,0 +1,98 @@
+"""Provides an append-only store for diff rows, that spills to disk once it grows too large"""
+
+import os
+import pickle
+import sqlite3
+import tempfile
+import threading
+import weakref
+from typing import Any, Iterable, Iterator, List, Optional
+
+import attrs
+
+DEFAULT_MAX_ROWS_IN_MEMORY = 100_000
+
+
+def _remove_spill_file(conn: sqlite3.Connection, path: str) -> None:
+    conn.close()
+    os.remove(path)
+
+
+@attrs.define(frozen=False, eq=False)
+class ResultStore:
+    """An append-only sequence of rows, with bounded memory.
+
+    Keeps up to `max_rows_in_memory` rows in memory. Beyond that, the rows are pickled in batches into a temporary
+    SQLite database, which is read back (in order, one batch at a time) on iteration. The file is removed once the
+    store is garbage-collected.
+
+    It's safe to append while iterating, or to iterate from several threads at once.
+
+    Parameters:
+        max_rows_in_memory (int, optional): How many rows to keep in memory before spilling. ``None`` means never spill.
+    """
+
+    max_rows_in_memory: Optional[int] = DEFAULT_MAX_ROWS_IN_MEMORY
+
+    _buffer: List[Any] = attrs.field(factory=list, init=False)
+    _spilled_count: int = attrs.field(default=0, init=False)
+    _conn: Optional[sqlite3.Connection] = attrs.field(default=None, init=False)
+    _lock: threading.Lock = attrs.field(factory=threading.Lock, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        if self.max_rows_in_memory is not None and self.max_rows_in_memory < 1:
+            raise ValueError("max_rows_in_memory must be at least 1")
+
+    @property
+    def is_spilled(self) -> bool:
+        return self._spilled_count > 0
+
+    def append(self, row: Any) -> None:
+        with self._lock:
+            self._buffer.append(row)
+            if self.max_rows_in_memory is not None and len(self._buffer) >= self.max_rows_in_memory:
+                self._spill()
+
+    def extend(self, rows: Iterable[Any]) -> None:
+        for row in rows:
+            self.append(row)
+
+    def _spill(self) -> None:
+        if self._conn is None:
+            fd, path = tempfile.mkstemp(prefix="data-diff-", suffix=".sqlite")
+            os.close(fd)
+            self._conn = sqlite3.connect(path, check_same_thread=False)
+            self._conn.execute("CREATE TABLE batches (id INTEGER PRIMARY KEY, rows BLOB)")
+            weakref.finalize(self, _remove_spill_file, self._conn, path)
+
+        # Every batch has exactly max_rows_in_memory rows, so a row's batch can be computed from its index
+        batch_id = self._spilled_count // self.max_rows_in_memory
+        blob = pickle.dumps(self._buffer, protocol=pickle.HIGHEST_PROTOCOL)
+        self._conn.execute("INSERT INTO batches VALUES (?, ?)", (batch_id, blob))
+        self._spilled_count += len(self._buffer)
+        self._buffer = []
+
+    def _read_batch(self, batch_id: int) -> List[Any]:
+        (blob,) = self._conn.execute("SELECT rows FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        return pickle.loads(blob)
+
+    def __iter__(self) -> Iterator[Any]:
+        # Track the position by index, so that rows spilled during the iteration are neither skipped nor repeated
+        i = 0
+        while True:
+            with self._lock:
+                if i < self._spilled_count:
+                    batch_size = self.max_rows_in_memory
+                    rows = self._read_batch(i // batch_size)[i % batch_size :]
+                elif i < self._spilled_count + len(self._buffer):
+                    rows = self._buffer[i - self._spilled_count :]
+                else:
+                    return
+            yield from rows
+            i += len(rows)
+
+    def __len__(self) -> int:
+        return self._spilled_count + len(self._buffer)
+
+    def __repr__(self) -> str:
+        return f"<ResultStore rows={len(self)} spilled={self._spilled_count}>"
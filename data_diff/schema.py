@@ -40,6 +40,14 @@ class RawColumnInfo(Collection[Any]):
         return False  # that was not used
 
 
+@attrs.frozen
+class TableStatistics:
+    "Estimates of a table's size, from the catalog. Either is None when the database doesn't keep it."
+
+    row_count: Optional[int] = None
+    size_bytes: Optional[int] = None
+
+
 def create_schema(db_name: str, table_path: DbPath, schema: dict, case_sensitive: bool) -> CaseAwareMapping:
     logger.info(f"[{db_name}] Schema = {schema}")
 
@@ -0,0 +1,130 @@
+"""Provides a long-running HTTP server, that runs diffs on request and streams back the results as NDJSON
+
+The server keeps its database connections (and their table schemas) warm between requests,
+so that each diff only pays for its own queries.
+
+Endpoints:
+    POST /diff      Run a diff. The body is a JSON object with the same options as a run in the configuration file.
+                    The response is NDJSON, written as the diff runs.
+    GET  /health    Returns {"status": "ok"}
+"""
+
+import json
+import logging
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Iterator, Tuple
+
+logger = logging.getLogger("server")
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8087
+
+# Seconds to cache the schema of each table. Stale schemas only affect column matching, and expire quickly.
+DEFAULT_SCHEMA_TTL = 300
+
+MAX_REQUEST_SIZE = 1024 * 1024
+
+
+class BadRequest(ValueError):
+    pass
+
+
+def parse_address(address: str) -> Tuple[str, int]:
+    "Parses 'host:port', 'host' or 'port'"
+    host, _, port = address.rpartition(":")
+    if not host and not port.isdigit():
+        return port or DEFAULT_HOST, DEFAULT_PORT
+    try:
+        return host or DEFAULT_HOST, int(port)
+    except ValueError:
+        raise ValueError(f"Invalid address: '{address}'. Expected 'host:port'")
+
+
+class DiffRequestHandler(BaseHTTPRequestHandler):
+    server: "DiffServer"
+    protocol_version = "HTTP/1.1"  # Required for chunked responses
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def _send_json(self, status: HTTPStatus, obj: Any) -> None:
+        body = json.dumps(obj, default=str).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+    def _read_request(self) -> dict:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_SIZE:
+            raise BadRequest(f"Request too large ({length} bytes)")
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError as e:
+            raise BadRequest(f"Invalid JSON: {e}")
+        if not isinstance(request, dict):
+            raise BadRequest("Expected a JSON object")
+        return request
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+        self._send_json(HTTPStatus.OK, {"status": "ok"})
+
+    def do_POST(self) -> None:
+        if self.path != "/diff":
+            self._send_json(HTTPStatus.NOT_FOUND, {"error": f"Not found: {self.path}"})
+            return
+
+        # Errors that happen before the diff starts get a proper status code.
+        # Once the response has started, they're written as the last line instead.
+        try:
+            lines = self.server.diff_func(self._read_request())
+        except ValueError as e:  # Includes BadRequest and ConfigParseError
+            self._send_json(HTTPStatus.BAD_REQUEST, {"error": str(e)})
+            return
+        except Exception as e:
+            logger.exception("Diff failed")
+            self._send_json(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": str(e)})
+            return
+
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        try:
+            for line in lines:
+                self._write_chunk(json.dumps(line, default=str).encode() + b"\n")
+        except (BrokenPipeError, ConnectionResetError):
+            logger.info("Client disconnected, stopping the diff")
+            lines.close()
+            self.close_connection = True
+            return
+        except Exception as e:
+            logger.exception("Diff failed")
+            self._write_chunk(json.dumps({"error": str(e)}).encode() + b"\n")
+        self._write_chunk(b"")
+
+
+class DiffServer(ThreadingHTTPServer):
+    """An HTTP server that runs each request in its own thread.
+
+    Parameters:
+        address (Tuple[str, int]): Host and port to listen on.
+        diff_func (Callable): Called with the JSON body of each diff request, from the request's thread.
+                              Returns a generator of JSON-serializable objects, one for each line of the response.
+                              Raises ValueError for invalid requests.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address: Tuple[str, int], diff_func: Callable[[dict], Iterator[Any]]) -> None:
+        super().__init__(address, DiffRequestHandler)
+        self.diff_func = diff_func
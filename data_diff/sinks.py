@@ -0,0 +1,301 @@
+"""Provides sinks, that write the rows of a diff to files or database tables, in batches, from a background thread"""
+
+import csv
+import json
+import logging
+import os
+import queue
+import threading
+from abc import ABC, abstractmethod
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, TextIO, Tuple
+
+import attrs
+
+from data_diff.abcs.database_types import DbPath
+from data_diff.databases.base import Database, import_helper
+from data_diff.queries.api import commit, table
+from data_diff.query_utils import drop_table
+
+logger = logging.getLogger("sinks")
+
+DEFAULT_SINK_BATCH_SIZE = 64 * 1024
+DEFAULT_MAX_PENDING_BATCHES = 4
+
+# Name of the column that holds the diff sign ('-' or '+'), before the diffed columns
+OP_COLUMN = "op"
+
+TABLE_TARGET_PREFIX = "table:"
+
+
+@import_helper(text="Writing Arrow or Parquet output requires pyarrow. Please run: pip install pyarrow")
+def import_pyarrow():
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+
+    return pyarrow
+
+
+class DiffSink(ABC):
+    """Receives the rows of a diff in batches.
+
+    Each row is written as the diff sign ('-' or '+'), followed by the values of the diffed columns.
+    All the methods are called from the same thread (see :class:`SinkWriter`).
+    """
+
+    @abstractmethod
+    def open(self, columns: Sequence[str]) -> None:
+        "Called once, before the first batch, with the names of the diffed columns"
+
+    @abstractmethod
+    def write_batch(self, rows: List[tuple]) -> None:
+        "Write a batch of (sign, *values) rows"
+
+    def close(self) -> None:
+        "Called once, after the last batch (or after an error)"
+
+
+@attrs.define(frozen=False)
+class CsvSink(DiffSink):
+    """Writes the diff to a CSV file, with a header. NULL is written as an empty field."""
+
+    path: str
+    _file: Optional[TextIO] = attrs.field(default=None, init=False)
+    _writer: Any = attrs.field(default=None, init=False)
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._file = open(self.path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow([OP_COLUMN, *columns])
+
+    def write_batch(self, rows: List[tuple]) -> None:
+        self._writer.writerows(rows)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+@attrs.define(frozen=False)
+class NdjsonSink(DiffSink):
+    """Writes the diff to a file as NDJSON, one object per row"""
+
+    path: str
+    _file: Optional[TextIO] = attrs.field(default=None, init=False)
+    _fields: Sequence[str] = attrs.field(default=(), init=False)
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._file = open(self.path, "w", encoding="utf-8")
+        self._fields = [OP_COLUMN, *columns]
+
+    def write_batch(self, rows: List[tuple]) -> None:
+        self._file.writelines(json.dumps(dict(zip(self._fields, row)), default=str) + "\n" for row in rows)
+
+    def close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+
+
+@attrs.define(frozen=False)
+class ArrowSink(DiffSink):
+    """Writes the diff to an Arrow IPC file, one record batch per batch of rows. All columns are strings.
+
+    Requires pyarrow.
+    """
+
+    path: str
+    _pa: Any = attrs.field(default=None, init=False)
+    _schema: Any = attrs.field(default=None, init=False)
+    _writer: Any = attrs.field(default=None, init=False)
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._pa = pa = import_pyarrow()
+        self._schema = pa.schema([(c, pa.string()) for c in [OP_COLUMN, *columns]])
+        self._writer = self._make_writer()
+
+    def _make_writer(self):
+        return self._pa.ipc.new_file(self.path, self._schema)
+
+    def write_batch(self, rows: List[tuple]) -> None:
+        pa = self._pa
+        arrays = [pa.array([None if v is None else str(v) for v in col], pa.string()) for col in zip(*rows)]
+        self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+@attrs.define(frozen=False)
+class ParquetSink(ArrowSink):
+    """Writes the diff to a Parquet file, one row group per batch of rows. All columns are strings.
+
+    Requires pyarrow.
+    """
+
+    def _make_writer(self):
+        return self._pa.parquet.ParquetWriter(self.path, self._schema)
+
+
+@attrs.define(frozen=False)
+class DatabaseSink(DiffSink):
+    """Writes the diff to a new table, using the database's bulk-loading path (see `Database.insert_rows_bulk()`)
+
+    All columns are created as strings. If a table exists by that name, it will be replaced.
+    """
+
+    database: Database
+    path: DbPath
+    _columns: Sequence[str] = attrs.field(default=(), init=False)
+
+    def open(self, columns: Sequence[str]) -> None:
+        self._columns = [OP_COLUMN, *columns]
+        drop_table(self.database, self.path)
+        self.database.query([table(self.path, schema={c: str for c in self._columns}).create(), commit])
+
+    def write_batch(self, rows: List[tuple]) -> None:
+        rows = [tuple(None if v is None else str(v) for v in row) for row in rows]
+        self.database.insert_rows_bulk(self.path, self._columns, rows)
+
+
+FILE_SINKS = {
+    ".csv": CsvSink,
+    ".ndjson": NdjsonSink,
+    ".jsonl": NdjsonSink,
+    ".arrow": ArrowSink,
+    ".feather": ArrowSink,
+    ".parquet": ParquetSink,
+    ".pq": ParquetSink,
+}
+
+
+def make_sink(target: str, database: Optional[Database] = None) -> DiffSink:
+    """Create a sink from a target string.
+
+    The target is either a file path, whose format is chosen by its extension,
+    or a table in the given database, written as 'table:<name>'.
+    """
+    if target.startswith(TABLE_TARGET_PREFIX):
+        if database is None:
+            raise ValueError(f"A database is required to write to '{target}'")
+        name = target[len(TABLE_TARGET_PREFIX) :]
+        return DatabaseSink(database, database.dialect.parse_table_name(name))
+
+    ext = os.path.splitext(target)[1].lower()
+    if ext not in FILE_SINKS:
+        raise ValueError(
+            f"Unsupported sink target: '{target}'. Expected a file ending with one of: {', '.join(FILE_SINKS)}, "
+            f"or a table, written as '{TABLE_TARGET_PREFIX}<name>'"
+        )
+    return FILE_SINKS[ext](target)
+
+
+@attrs.define(frozen=False, eq=False)
+class SinkWriter:
+    """Writes diff rows to a sink in batches, from a background thread.
+
+    Batches are passed to the writer thread through a bounded queue, so a slow sink slows down the diff,
+    instead of letting the pending rows pile up in memory. An error in the writer thread is raised
+    in the calling thread, by the next call to write() or close().
+
+    Parameters:
+        sink (DiffSink): Where to write the rows.
+        columns (Sequence[str]): The names of the diffed columns.
+        batch_size (int): How many rows to pass to the sink at once.
+        max_pending_batches (int): How many batches may wait for the writer thread, before write() blocks.
+    """
+
+    sink: DiffSink
+    columns: Sequence[str]
+    batch_size: int = DEFAULT_SINK_BATCH_SIZE
+    max_pending_batches: int = DEFAULT_MAX_PENDING_BATCHES
+
+    rows_written: int = attrs.field(default=0, init=False)
+    _batch: List[tuple] = attrs.field(factory=list, init=False)
+    _queue: queue.Queue = attrs.field(init=False)
+    _thread: threading.Thread = attrs.field(init=False)
+    _error: Optional[BaseException] = attrs.field(default=None, init=False)
+    _is_closed: bool = attrs.field(default=False, init=False)
+
+    def __attrs_post_init__(self) -> None:
+        if self.batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self._queue = queue.Queue(maxsize=self.max_pending_batches)
+        self._thread = threading.Thread(target=self._run, name="data-diff-sink", daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Don't mask the original error with an error from the sink
+        self.close(raise_error=exc_type is None)
+
+    def _run(self) -> None:
+        try:
+            self.sink.open(self.columns)
+            while True:
+                batch = self._queue.get()
+                if batch is None:
+                    break
+                self.sink.write_batch(batch)
+        except BaseException as e:
+            self._error = e
+            # Keep consuming, so that the producer is never stuck on a full queue
+            while self._queue.get() is not None:
+                pass
+        finally:
+            try:
+                self.sink.close()
+            except BaseException as e:
+                self._error = self._error or e
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def write(self, sign: str, row: Sequence[Any]) -> None:
+        self._batch.append((sign, *row))
+        if len(self._batch) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        self._raise_error()
+        self._queue.put(self._batch)
+        self.rows_written += len(self._batch)
+        self._batch = []
+
+    def passthrough(self, diff: Iterable[Tuple[str, tuple]]) -> Iterator[Tuple[str, tuple]]:
+        "Write every item of the diff, while yielding it unchanged"
+        for sign, row in diff:
+            self.write(sign, row)
+            yield sign, row
+
+    def close(self, raise_error: bool = True) -> None:
+        "Write the remaining rows, and wait for the writer thread to finish"
+        if self._is_closed:
+            return
+        self._is_closed = True
+
+        if self._batch and self._error is None:
+            self._queue.put(self._batch)
+            self.rows_written += len(self._batch)
+            self._batch = []
+        self._queue.put(None)
+        self._thread.join()
+        logger.info(f"Wrote {self.rows_written} diff rows ({type(self.sink).__name__})")
+
+        if raise_error:
+            self._raise_error()
+
+
+def write_diff(diff, sink: DiffSink, batch_size: int = DEFAULT_SINK_BATCH_SIZE) -> int:
+    """Consume the given diff (as returned by `diff_tables()`) and write all its rows to the sink.
+
+    Returns the number of rows written.
+    """
+    columns = diff.info_tree.info.tables[0].relevant_columns
+    with SinkWriter(sink, columns, batch_size=batch_size) as writer:
+        for sign, row in diff:
+            writer.write(sign, row)
+    return writer.rows_written
@@ -1,14 +1,22 @@
+import heapq
 import itertools
+import os
+import threading
 from queue import PriorityQueue
 from collections import deque
 from collections.abc import Iterable
-from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from concurrent.futures.thread import _WorkItem
-from time import sleep
-from typing import Any, Callable, Iterator, Optional
+from typing import Any, Callable, Iterator, List, Optional, Union
 
 import attrs
 
+# Seconds a thread of PriorityExecutor waits for work, before it exits
+DEFAULT_IDLE_TIMEOUT = 5.0
+# Priority of the tasks that another task (or the caller) is waiting for
+URGENT = 2**31
+
 
 class AutoPriorityQueue(PriorityQueue):
     """Overrides PriorityQueue to automatically get the priority from _WorkItem.kwargs
@@ -39,60 +47,256 @@ class PriorityThreadPoolExecutor(ThreadPoolExecutor):
         self._work_queue = AutoPriorityQueue()
 
 
+class _Task(Future):
+    "A future that knows how to run itself"
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict) -> None:
+        super().__init__()
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.claimed = False  # Taken by a thread of the pool, or by a waiting thread
+
+    def run(self) -> None:
+        if not self.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.fn(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.set_exception(e)
+        else:
+            self.set_result(result)
+
+
+class PriorityExecutor:
+    """A thread pool that runs its tasks by priority (higher runs first), shared by all the threading of a differ.
+
+    Tasks may submit more tasks, and wait for their results: a thread that waits for a task that didn't start yet
+    runs it itself, instead of blocking. So nested calls can't deadlock, however small the pool is, and the number
+    of threads stays within `max_workers` (plus the threads that call in from outside).
+
+    Threads are started on demand, and exit after `idle_timeout` seconds without work.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, idle_timeout: float = DEFAULT_IDLE_TIMEOUT) -> None:
+        if max_workers is None:
+            max_workers = min(32, (os.cpu_count() or 1) + 4)
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self._heap = []
+        self._counter = itertools.count().__next__
+        self._cond = threading.Condition()
+        self._threads = 0
+        self._idle = 0  # Threads waiting for work
+        self._wakeups = 0  # Notifications sent to idle threads, that no thread woke up for yet
+        self._shutdown = False
+        self._local = threading.local()  # Marks the threads of the pool
+
+    def _submit(self, fn: Callable, args: tuple, kwargs: dict, priority: int) -> _Task:
+        task = _Task(fn, args, kwargs)
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Cannot submit tasks after shutdown")
+            heapq.heappush(self._heap, (-priority, self._counter(), task))
+            if self._idle > self._wakeups:
+                self._wakeups += 1
+                self._cond.notify()
+            elif self._threads < self.max_workers:
+                self._threads += 1
+                threading.Thread(target=self._work, name="data-diff-worker", daemon=True).start()
+        return task
+
+    def submit(self, fn: Callable, *args, priority: int = 0, **kwargs) -> Future:
+        return self._submit(fn, args, kwargs, priority)
+
+    def _claim(self, task: _Task) -> bool:
+        with self._cond:
+            if task.claimed:
+                return False
+            task.claimed = True
+            return True
+
+    def result(self, future: Future) -> Any:
+        "Returns the result of a future of this executor, running its task in this thread if it didn't start yet"
+        if self._claim(future):
+            future.run()
+        return future.result()
+
+    def _in_pool(self) -> bool:
+        return getattr(self._local, "worker", False)
+
+    def _work(self) -> None:
+        self._local.worker = True
+        while True:
+            with self._cond:
+                while not self._heap:
+                    if self._shutdown:
+                        self._threads -= 1
+                        self._cond.notify_all()
+                        return
+                    self._idle += 1
+                    self._cond.wait(self.idle_timeout)
+                    self._idle -= 1
+                    # A thread that timed out may take the wakeup of a notified one. Either way, one of them works.
+                    if self._wakeups:
+                        self._wakeups -= 1
+                    elif not self._heap and not self._shutdown:
+                        self._threads -= 1
+                        return
+                _p, _c, task = heapq.heappop(self._heap)
+                if task.claimed:
+                    continue
+                task.claimed = True
+            task.run()
+
+    def map(self, fn: Callable, iterable, priority: int = URGENT) -> Iterator[Any]:
+        "Like Executor.map(), but the calling thread helps to run the tasks. All tasks are submitted right away."
+        tasks = [self._submit(fn, (item,), {}, priority) for item in iterable]
+        return (self.result(task) for task in tasks)
+
+    def as_completed(self, fn: Callable, iterable, priority: int = URGENT) -> Iterator[Any]:
+        """Returns the results of fn() for each item, in order of completion.
+
+        A thread of the pool helps to run the tasks while it waits (it can't count on the pool to run them), so its
+        results come in the order it runs them. Other threads wait for the pool.
+        """
+        tasks = [self._submit(fn, (item,), {}, priority) for item in iterable]
+        return self._as_completed(tasks)
+
+    def _as_completed(self, tasks: List[_Task]) -> Iterator[Any]:
+        pending = list(tasks)
+        while pending:
+            done = [t for t in pending if t.done()]
+            if not done:
+                task = next((t for t in pending if self._claim(t)), None) if self._in_pool() else None
+                if task is not None:
+                    task.run()
+                    done = [task]
+                else:
+                    wait(pending, return_when=FIRST_COMPLETED)
+                    continue
+            for task in done:
+                pending.remove(task)
+                yield task.result()
+
+    @contextmanager
+    def background(self, *funcs: Optional[Callable], priority: int = URGENT) -> Iterator[List[Future]]:
+        """Runs the given functions (skipping None) while the block runs, and waits for them when it exits.
+
+        The functions that didn't start by then run in the calling thread.
+        """
+        tasks = [self._submit(f, (), {}, priority) for f in funcs if f is not None]
+        yield tasks
+        for task in tasks:
+            self.result(task)
+
+    def shutdown(self, wait: bool = True) -> None:
+        "Let the threads exit once the queued tasks are done"
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+            while wait and self._threads:
+                self._cond.wait()
+
+
 @attrs.define(frozen=False, init=False)
 class ThreadedYielder(Iterable):
     """Yields results from multiple threads into a single iterator, ordered by priority.
 
     To add a source iterator, call ``submit()`` with a function that returns an iterator.
     Priority for the iterator can be provided via the keyword argument 'priority'. (higher runs first)
-    """
 
-    _pool: ThreadPoolExecutor
-    _futures: deque
-    _yield: deque
-    _exception: Optional[None]
+    The iterator blocks until results arrive, and raises the first exception of a task as soon as it happens.
+    When `max_buffered` results are waiting to be consumed, tasks that produce more results wait for room
+    (a task always adds all of its results at once, so the buffer may exceed the limit by one task's results).
+    Once the iterator is exhausted, closed, or raises, results are dropped, and tasks that didn't start are skipped.
+
+    The tasks run in `executor` when given (which is left running when the yielder closes), or else in a pool
+    of `max_workers` threads of its own.
+    """
 
-    _pool: ThreadPoolExecutor
-    _futures: deque
+    _pool: Union[ThreadPoolExecutor, PriorityExecutor]
+    _owns_pool: bool
     _yield: deque = attrs.field(alias="_yield")  # Python keyword!
-    _exception: Optional[None]
+    _exception: Optional[Exception]
+    _pending: int
+    _closed: bool
+    _cond: threading.Condition
     yield_list: bool
+    max_buffered: Optional[int]
 
-    def __init__(self, max_workers: Optional[int] = None, yield_list: bool = False) -> None:
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        yield_list: bool = False,
+        max_buffered: Optional[int] = None,
+        executor: Optional[PriorityExecutor] = None,
+    ) -> None:
         super().__init__()
-        self._pool = PriorityThreadPoolExecutor(max_workers)
-        self._futures = deque()
+        self._owns_pool = executor is None
+        self._pool = PriorityThreadPoolExecutor(max_workers) if executor is None else executor
         self._yield = deque()
         self._exception = None
+        self._pending = 0  # Tasks submitted, and not finished yet
+        self._closed = False
+        self._cond = threading.Condition()
         self.yield_list = yield_list
+        self.max_buffered = max_buffered
 
     def _worker(self, fn, *args, **kwargs) -> None:
         try:
+            if self._closed:
+                return
             res = fn(*args, **kwargs)
             if res is not None:
-                if self.yield_list:
-                    self._yield.append(res)
-                else:
-                    self._yield += res
+                res = [res] if self.yield_list else list(res)
+                with self._cond:
+                    while self.max_buffered is not None and len(self._yield) >= self.max_buffered and not self._closed:
+                        self._cond.wait()
+                    if not self._closed:
+                        self._yield.extend(res)
         except Exception as e:
-            self._exception = e
+            with self._cond:
+                if self._exception is None:
+                    self._exception = e
+        finally:
+            with self._cond:
+                self._pending -= 1
+                self._cond.notify_all()
 
     def submit(self, fn: Callable, *args, priority: int = 0, **kwargs) -> None:
-        self._futures.append(self._pool.submit(self._worker, fn, *args, priority=priority, **kwargs))
-
-    def __iter__(self) -> Iterator[Any]:
-        while True:
-            if self._exception:
-                raise self._exception
+        with self._cond:
+            if self._closed:
+                return
+            self._pending += 1
+            self._pool.submit(self._worker, fn, *args, priority=priority, **kwargs)
 
-            while self._yield:
-                yield self._yield.popleft()
+    def close(self) -> None:
+        "Stop yielding, and release the threads. Running tasks finish, but their results are dropped."
+        with self._cond:
+            self._closed = True
+            self._yield.clear()
+            self._cond.notify_all()
+            if self._owns_pool:
+                self._pool.shutdown(wait=False)
 
-            if not self._futures:
-                # No more tasks
-                return
+    def __iter__(self) -> Iterator[Any]:
+        try:
+            while True:
+                with self._cond:
+                    while not (self._yield or self._exception or self._pending == 0):
+                        self._cond.wait()
+                    if self._exception:
+                        raise self._exception
+                    if not self._yield:
+                        # No more tasks
+                        return
+                    batch = list(self._yield)
+                    self._yield.clear()
+                    self._cond.notify_all()  # Make room for waiting tasks
 
-            if self._futures[0].done():
-                self._futures.popleft()
-            else:
-                sleep(0.001)
+                yield from batch
+        finally:
+            self.close()
@@ -1,9 +1,11 @@
+import hashlib
 import json
 import logging
 import math
 import re
 import string
 from abc import abstractmethod
+from itertools import islice
 from typing import Any, Dict, Iterable, Iterator, List, MutableMapping, Optional, Sequence, TypeVar, Union
 from urllib.parse import urlparse
 import operator
@@ -35,6 +37,17 @@ def join_iter(joiner: Any, iterable: Iterable) -> Iterable:
         yield i
 
 
+def batched(iterable: Iterable, batch_size: int) -> Iterator[list]:
+    "Split the iterable into lists of up to batch_size items, consuming it lazily"
+    assert batch_size > 0
+    it = iter(iterable)
+    while True:
+        batch = list(islice(it, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
 def safezip(*args):
     "zip but makes sure all sequences are the same length"
     lens = list(map(len, args))
@@ -623,3 +636,37 @@ class Unknown(metaclass=UnknownMeta):
 
     def __new__(class_, *args, **kwargs):
         raise RuntimeError("Unknown is a singleton")
+
+
+@attrs.define(frozen=False)
+class BloomFilter:
+    """A probabilistic set of hashable items, which uses a fixed amount of memory.
+
+    Membership tests never return false negatives. False positives happen at a rate of about `error_rate`,
+    as long as the filter holds no more than `capacity` items.
+    """
+
+    capacity: int
+    error_rate: float = 0.01
+    size: int = attrs.field(init=False)
+    hash_count: int = attrs.field(init=False)
+    _bits: bytearray = attrs.field(init=False)
+
+    def __attrs_post_init__(self) -> None:
+        self.size = max(8, math.ceil(-self.capacity * math.log(self.error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item) -> Iterator[int]:
+        # Double hashing, with a stable hash (Python's hash() of strings is randomized per process)
+        digest = hashlib.blake2b(repr(item).encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hash_count))
+
+    def add(self, item) -> None:
+        for p in self._positions(item):
+            self._bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, item) -> bool:
+        return all(self._bits[p >> 3] & (1 << (p & 7)) for p in self._positions(item))
@@ -0,0 +1,138 @@
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+from data_diff.batch import BatchScheduler, BatchTask, DatabasePool
+from data_diff.config import ConfigParseError, apply_batch_config_from_files
+
+
+class TestBatchScheduler(unittest.TestCase):
+    def test_priority(self):
+        order = []
+        tasks = [BatchTask(str(p), lambda p=p: order.append(p), priority=p) for p in (1, 3, 2, 3)]
+        results = list(BatchScheduler(max_workers=1).run(tasks))
+        self.assertEqual(order, [3, 3, 2, 1])
+        self.assertEqual([r.name for r in results], ["3", "3", "2", "1"])
+
+    def test_max_per_database(self):
+        lock = threading.Lock()
+        running = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+
+        def task(db):
+            with lock:
+                running[db] += 1
+                peak[db] = max(peak[db], running[db])
+            time.sleep(0.01)
+            with lock:
+                running[db] -= 1
+
+        tasks = [BatchTask(f"{db}{i}", lambda db=db: task(db), databases=(db, db)) for i in range(6) for db in "ab"]
+        list(BatchScheduler(max_workers=8, max_per_database=2).run(tasks))
+        self.assertEqual(peak, {"a": 2, "b": 2})
+
+    def test_error(self):
+        def fail():
+            raise ValueError("bad table")
+
+        tasks = [BatchTask("ok", lambda: 42), BatchTask("bad", fail), BatchTask("exit", lambda: sys.exit(1))]
+        results = {r.name: r for r in BatchScheduler().run(tasks)}
+        self.assertEqual(results["ok"].result, 42)
+        self.assertIsNone(results["ok"].error)
+        self.assertIsInstance(results["bad"].error, ValueError)
+        self.assertIsInstance(results["exit"].error, SystemExit)
+
+    def test_cancel(self):
+        started = []
+
+        def task(i):
+            started.append(i)
+            time.sleep(0.01)
+
+        tasks = [BatchTask(str(i), lambda i=i: task(i)) for i in range(100)]
+        results = BatchScheduler(max_workers=1).run(tasks)
+        next(results)
+        results.close()
+        self.assertLess(len(started), 100)
+
+
+class TestBatchConfig(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _write(self, name, content):
+        path = os.path.join(self.tmpdir.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_conf_and_manifest(self):
+        conf = self._write(
+            "conf.toml",
+            """
+            [database.local]
+            driver = "duckdb"
+
+            [run.default]
+            key_columns = ["id"]
+
+            [run.ignored]
+            1.database = "local"
+            1.table = "x"
+            2.database = "local"
+            2.table = "y"
+            """,
+        )
+        manifest = self._write(
+            "manifest.json",
+            json.dumps(
+                {
+                    "run": {
+                        "default": {"threads": 2},
+                        "a": {"1": {"database": "local", "table": "a1"}, "2": {"database": "local", "table": "a2"}},
+                        "b": {
+                            "priority": 1,
+                            "1": {"database": "local", "table": "b1"},
+                            "2": {"database": "duckdb://:memory:", "table": "b2"},
+                        },
+                    }
+                }
+            ),
+        )
+
+        runs = apply_batch_config_from_files(conf, None, {})
+        self.assertEqual(list(runs), ["ignored"])
+
+        runs = apply_batch_config_from_files(conf, manifest, {})
+        self.assertEqual(list(runs), ["a", "b"])
+        self.assertEqual(runs["a"]["database1"], {"driver": "duckdb"})
+        self.assertEqual(runs["a"]["table2"], "a2")
+        self.assertEqual(runs["a"]["key_columns"], ("id",))
+        self.assertEqual(runs["a"]["threads"], 2)
+        self.assertEqual(runs["b"]["database2"], "duckdb://:memory:")
+        self.assertEqual(runs["b"]["priority"], 1)
+
+    def test_no_runs(self):
+        conf = self._write("conf.toml", '[run.default]\nkey_columns = ["id"]\n')
+        self.assertRaises(ConfigParseError, apply_batch_config_from_files, conf, None, {})
+
+
+class TestDatabasePool(unittest.TestCase):
+    def test_shared(self):
+        with DatabasePool() as pool:
+            db = pool.get({"driver": "duckdb", "filepath": ":memory:"})
+            self.assertIs(pool.get({"filepath": ":memory:", "driver": "duckdb"}), db)
+            self.assertIsNot(pool.get("duckdb://:memory:"), db)
+
+    def test_max_databases(self):
+        with DatabasePool(max_databases=1) as pool:
+            db = pool.get("duckdb://:memory:")
+            self.assertIs(pool.get("duckdb://:memory:"), db)
+            self.assertRaises(ValueError, pool.get, {"driver": "duckdb", "filepath": ":memory:"})
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+from data_diff.databases import DuckDB
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.table_segment import TableSegment
+
+from tests.common import table_segment
+
+
+class TestCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "diff.checkpoint")
+        self.db = DuckDB(filepath=":memory:")
+        self.db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(10000) t(i)")
+        self.db.query(
+            "CREATE TABLE b AS SELECT id, CASE WHEN id % 1000 = 7 THEN 'changed' ELSE comment END AS comment "
+            "FROM a WHERE id % 1500 <> 3"
+        )
+        self.a = table_segment(self.db, ("a",), "id", extra_columns=("comment",))
+        self.b = table_segment(self.db, ("b",), "id", extra_columns=("comment",))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _differ(self, **kw):
+        return HashDiffer(bisection_factor=4, bisection_threshold=100, threaded=False, **kw)
+
+    def test_resume(self):
+        get_values = TableSegment.get_values
+        calls = []
+        fail_after = [float("inf")]
+
+        def failing_get_values(segment):
+            calls.append(segment)
+            if len(calls) > fail_after[0]:
+                raise ConnectionError("Preempted")
+            return get_values(segment)
+
+        with patch.object(TableSegment, "get_values", failing_get_values):
+            expected = sorted(self._differ().diff_tables(self.a, self.b))
+            total_calls = len(calls)
+
+            # Interrupt the diff after a few segments were downloaded
+            calls.clear()
+            fail_after[0] = 6
+            with self.assertRaises(ConnectionError):
+                list(self._differ(checkpoint_path=self.path).diff_tables(self.a, self.b))
+            # Let the workers of the interrupted diff run out of work
+            while True:
+                n = len(calls)
+                time.sleep(0.2)
+                if len(calls) == n:
+                    break
+
+            with open(self.path) as f:
+                header, *segments = [json.loads(line) for line in f]
+            self.assertEqual(header["version"], 1)
+            self.assertEqual(sum(s["status"] == "diffed" for s in segments), 3)
+
+            # Resume. The segments that were downloaded aren't downloaded again.
+            calls.clear()
+            fail_after[0] = float("inf")
+            differ = self._differ(checkpoint_path=self.path, resume=True)
+            diff = differ.diff_tables(self.a, self.b)
+            self.assertEqual(sorted(diff), expected)
+            self.assertEqual(len(calls), total_calls - 6)
+            self.assertGreater(differ.stats["resumed_segments"], 0)
+            self.assertEqual(diff.get_stats_dict()["rows_A"], 10000)
+
+            # Resuming a finished diff replays it, without downloading anything
+            calls.clear()
+            differ = self._differ(checkpoint_path=self.path, resume=True)
+            self.assertEqual(sorted(differ.diff_tables(self.a, self.b)), expected)
+            self.assertEqual(calls, [])
+
+    def test_mismatch(self):
+        list(self._differ(checkpoint_path=self.path).diff_tables(self.a, self.b))
+        differ = self._differ(checkpoint_path=self.path, resume=True)
+        with self.assertRaisesRegex(ValueError, "different diff"):
+            list(differ.diff_tables(self.a, self.b.new(where="id < 500")))
+
+    def test_truncated_line(self):
+        list(self._differ(checkpoint_path=self.path).diff_tables(self.a, self.b))
+        with open(self.path, "rb+") as f:
+            f.truncate(os.path.getsize(self.path) - 5)
+
+        differ = self._differ(checkpoint_path=self.path, resume=True)
+        self.assertEqual(
+            len(list(differ.diff_tables(self.a, self.b))), len(list(self._differ().diff_tables(self.a, self.b)))
+        )
+
+    def test_resume_requires_checkpoint(self):
+        self.assertRaises(ValueError, self._differ, resume=True)
@@ -598,12 +598,14 @@ def _insert_to_table(conn, table_path, values, coltype):
     #     description = f"{conn.name}: {table}"
     #     values = rich.progress.track(values, total=N_SAMPLES, description=description)
 
+    is_sql = False
     if coltype == "boolean":
         values = [(i, bool(sample)) for i, sample in values]
     elif re.search(r"(time zone|tz)", coltype):
         values = [(i, sample.replace(tzinfo=timezone.utc)) for i, sample in values]
 
     if isinstance(conn, db.Clickhouse):
+        is_sql = True  # Native inserts expect Python values that match the column types exactly
         if coltype.startswith("DateTime64"):
             values = [(i, f"{sample.replace(tzinfo=None)}") for i, sample in values]
 
@@ -616,9 +618,11 @@ def _insert_to_table(conn, table_path, values, coltype):
             values = [(i, round(sample, precision)) for i, sample in values]
     elif isinstance(conn, db.BigQuery) and coltype == "datetime":
         values = [(i, Code(f"cast(timestamp '{sample}' as datetime)")) for i, sample in values]
+        is_sql = True
 
     elif isinstance(conn, db.Redshift) and coltype in ("json", "jsonb"):
         values = [(i, Code(f"JSON_PARSE({sample})")) for i, sample in values]
+        is_sql = True
     elif isinstance(conn, db.PostgreSQL) and coltype in ("json", "jsonb"):
         values = [
             (
@@ -631,12 +635,17 @@ def _insert_to_table(conn, table_path, values, coltype):
             )
             for i, sample in values
         ]
+        is_sql = True
     # mssql represents with int
     elif isinstance(conn, db.MsSQL) and coltype in ("BIT"):
         values = [(i, int(sample)) for i, sample in values]
 
-    insert_rows_in_batches(conn, tbl, values, columns=["id", "col"])
-    conn.query(commit)
+    if is_sql:
+        # Values given as SQL code can only be inserted through the query compiler
+        insert_rows_in_batches(conn, tbl, values, columns=["id", "col"])
+        conn.query(commit)
+    else:
+        conn.insert_rows_bulk(table_path, ["id", "col"], values)
 
 
 def _create_table_with_indexes(conn, table_path, type_):
@@ -183,6 +183,7 @@ class TestDbtDiffer(unittest.TestCase):
             extra_columns=ANY,
             where=where,
             skip_null_keys=True,
+            retain_diffs=True,
         )
         self.assertEqual(len(mock_diff_tables.call_args[1]["extra_columns"]), 2)
         self.assertEqual(mock_connect.call_count, 2)
@@ -234,6 +235,7 @@ class TestDbtDiffer(unittest.TestCase):
             extra_columns=ANY,
             where=where,
             skip_null_keys=True,
+            retain_diffs=True,
         )
         self.assertEqual(len(mock_diff_tables.call_args[1]["extra_columns"]), 1)
         self.assertEqual(mock_connect.call_count, 2)
@@ -279,6 +281,7 @@ class TestDbtDiffer(unittest.TestCase):
             extra_columns=ANY,
             where=where,
             skip_null_keys=True,
+            retain_diffs=True,
         )
         self.assertEqual(len(mock_diff_tables.call_args[1]["extra_columns"]), 2)
         self.assertEqual(mock_connect.call_count, 2)
@@ -513,7 +516,7 @@ class TestDbtDiffer(unittest.TestCase):
         mock_dbt_parser_inst.get_models.assert_called_once()
         mock_dbt_parser_inst.set_connection.assert_called_once()
         mock_cloud_diff.assert_not_called()
-        mock_local_diff.assert_called_once_with(diff_vars, False, None)
+        mock_local_diff.assert_called_once_with(diff_vars, False, None, json_stream=False)
         mock_print.assert_not_called()
 
     @patch("data_diff.dbt._get_diff_vars")
@@ -589,7 +592,7 @@ class TestDbtDiffer(unittest.TestCase):
         mock_dbt_parser_inst.get_models.assert_called_once()
         mock_dbt_parser_inst.set_connection.assert_called_once()
         mock_cloud_diff.assert_not_called()
-        mock_local_diff.assert_called_once_with(diff_vars, False, None)
+        mock_local_diff.assert_called_once_with(diff_vars, False, None, json_stream=False)
         mock_print.assert_not_called()
 
     @patch("data_diff.dbt._get_diff_vars")
@@ -627,7 +630,7 @@ class TestDbtDiffer(unittest.TestCase):
         mock_dbt_parser_inst.get_models.assert_called_once()
         mock_dbt_parser_inst.set_connection.assert_called_once()
         mock_cloud_diff.assert_not_called()
-        mock_local_diff.assert_called_once_with(diff_vars, False, None)
+        mock_local_diff.assert_called_once_with(diff_vars, False, None, json_stream=False)
         mock_print.assert_not_called()
 
     @patch("data_diff.dbt._initialize_api")
@@ -1,19 +1,25 @@
 from datetime import datetime, timedelta
 from typing import Callable
+import time
 import uuid
 import unittest
+from concurrent.futures import ProcessPoolExecutor
+from unittest.mock import patch
 
 import attrs
 
 from data_diff.queries.api import table, this, commit, code
 from data_diff.utils import ArithAlphanumeric, numberToAlphanum
 
-from data_diff.hashdiff_tables import HashDiffer
+from data_diff.hashdiff_tables import HashDiffer, diff_sets, diff_sets_duckdb
 from data_diff.joindiff_tables import JoinDiffer
+from data_diff.diff_tables import DiffResultWrapper, DiffStatsAccumulator
+from data_diff.info_tree import InfoTree, SegmentInfo
 from data_diff.table_segment import TableSegment, split_space, Vector
 from data_diff import databases as db
 
-from tests.common import str_to_checksum, test_each_database_in_list, DiffTestCase, table_segment
+from tests.test_query import MockDatabase
+from tests.common import BENCHMARK, str_to_checksum, test_each_database_in_list, DiffTestCase, table_segment
 
 
 TEST_DATABASES = {
@@ -40,6 +46,87 @@ class TestUtils(unittest.TestCase):
                     assert len(r) == n, f"split_space({i}, {j+n}, {n}) = {(r)}"
 
 
+class TestDiffSets(unittest.TestCase):
+    def test_duckdb_same_as_python(self):
+        columns = ("id", "id2", "a", "b")
+        # Includes duplicates, exclusive keys, NULLs, and differences in an ignored column
+        a = [("1", "1", "x", "y"), ("2", "1", "x", None), ("3", "1", "x", "y"), ("3", "1", "x", "y")]
+        a += [("5", "1", "a", "b")]
+        b = [("1", "1", "x", "z"), ("2", "1", "x", None), ("3", "1", "x", "y"), ("4", "1", "x", "y")]
+        b += [("5", "1", "a", "c"), ("2", "2", None, None), ("10", "1", "q", "q")]
+
+        for ignored in (set(), {"b"}):
+            kw = dict(
+                columns1=columns,
+                columns2=columns,
+                key_columns1=("id", "id2"),
+                key_columns2=("id", "id2"),
+                ignored_columns1=ignored,
+                ignored_columns2=ignored,
+            )
+            expected = list(diff_sets(a, b, **kw))
+            self.assertEqual(list(diff_sets_duckdb(a, b, **kw)), expected)
+            self.assertEqual(list(diff_sets_duckdb(a, [], **kw)), list(diff_sets(a, [], **kw)))
+
+        self.assertEqual(len(expected), 6)
+
+    def test_duckdb_equiv_jsons(self):
+        columns = ("id", "js")
+        a = [("1", '{"a": 1, "b": 2}'), ("2", '{"a": 1}')]
+        b = [("1", '{"b": 2, "a": 1}'), ("2", '{"a": 2}')]
+        kw = dict(
+            columns1=columns,
+            columns2=columns,
+            key_columns1=("id",),
+            key_columns2=("id",),
+            ignored_columns1=(),
+            ignored_columns2=(),
+        )
+        diff = list(diff_sets_duckdb(a, b, json_cols={0: "js"}, **kw))
+        self.assertEqual(diff, [("-", a[1]), ("+", b[1])])
+
+    def test_duckdb_special_values(self):
+        # The rows are loaded through CSV, where NULL and the empty string must stay distinct
+        columns = ("id", "v")
+        a = [("1", ""), ("2", None), ("3", 'a,"b"\nc'), ("4", "\\N"), ("5", "")]
+        b = [("1", None), ("2", ""), ("3", 'a,"b"\nc'), ("4", "\\N"), ("5", "")]
+        kw = dict(
+            columns1=columns,
+            columns2=columns,
+            key_columns1=("id",),
+            key_columns2=("id",),
+            ignored_columns1=(),
+            ignored_columns2=(),
+        )
+        diff = list(diff_sets_duckdb(a, b, **kw))
+        self.assertEqual(diff, list(diff_sets(a, b, **kw)))
+        self.assertEqual(diff, [("-", a[0]), ("+", b[0]), ("-", a[1]), ("+", b[1])])
+
+    @unittest.skipUnless(BENCHMARK, "Only when benchmarking")
+    def test_duckdb_benchmark(self):
+        columns = ("id", "name", "value")
+        kw = dict(
+            columns1=columns,
+            columns2=columns,
+            key_columns1=("id",),
+            key_columns2=("id",),
+            ignored_columns1=(),
+            ignored_columns2=(),
+        )
+        for n in (1_000, 20_000, 100_000, 500_000):
+            a = [(str(i), f"name{i}", str(i * 7)) for i in range(n)]
+            b = [(str(i), f"name{i}", str(i * 7) if i % 1000 else "changed") for i in range(n)]
+            timings = {}
+            for diff_func in (diff_sets, diff_sets_duckdb):
+                start = time.perf_counter()
+                diff = list(diff_func(a, b, **kw))
+                timings[diff_func.__name__] = time.perf_counter() - start
+                self.assertEqual(len(diff), n // 1000 * 2)
+            print(f"{n} rows: " + ", ".join(f"{name} {t:.3f}s" for name, t in timings.items()))
+            if n >= 100_000:
+                self.assertLess(timings["diff_sets_duckdb"], timings["diff_sets"])
+
+
 @test_each_database
 class TestDates(DiffTestCase):
     src_schema = {"id": int, "datetime": datetime, "text_comment": str}
@@ -911,3 +998,379 @@ class TestCompoundKeyAlphanum(DiffTestCase):
         self.assertEqual(diff, [("-", (uuid, "9", "9")), ("+", (uuid, "9000", "9"))])
 
         self.assertRaises(ValueError, list, differ.diff_tables(aa, a))
+
+
+@test_each_database_in_list({db.PostgreSQL, db.Snowflake, db.BigQuery, db.Clickhouse, db.DuckDB})
+class TestNativeChecksum(DiffTestCase):
+    src_schema = {"id": int, "comment": str}
+    dst_schema = {"id": int, "comment": str}
+
+    def setUp(self):
+        super().setUp()
+
+        rows = [(i, str(i)) for i in range(100)]
+        rows2 = list(rows)
+        rows2[42] = (42, "changed")
+        self.connection.query(
+            [
+                self.src_table.insert_rows(rows),
+                self.dst_table.insert_rows(rows2),
+                commit,
+            ]
+        )
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment",))
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment",))
+
+    def test_native_checksum(self):
+        a = self.a.with_schema()
+        native_a = a.new(native_checksum=True)
+        self.assertEqual(a.count_and_checksum()[0], native_a.count_and_checksum()[0])
+        self.assertNotEqual(a.count_and_checksum()[1], native_a.count_and_checksum()[1])
+
+        a_copy = self.a.new(table_path=self.table_src_path).with_schema().new(native_checksum=True)
+        self.assertEqual(native_a.count_and_checksum(), a_copy.count_and_checksum())
+
+    def test_diff(self):
+        expected = [("-", ("42", "42")), ("+", ("42", "changed"))]
+        for native_checksum in (True, False):
+            differ = HashDiffer(bisection_factor=2, bisection_threshold=10, native_checksum=native_checksum)
+            self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+
+    def test_duplicate_rows(self):
+        # Identical rows must not cancel each other out: {A, A} and {B, B} have the same count, but must differ
+        self.connection.query(
+            [
+                self.src_table.insert_rows([(200, "a"), (200, "a")]),
+                self.dst_table.insert_rows([(201, "b"), (201, "b")]),
+                commit,
+            ]
+        )
+        a = self.a.new(min_key=(200,), max_key=(300,), native_checksum=True).with_schema()
+        b = self.b.new(min_key=(200,), max_key=(300,), native_checksum=True).with_schema()
+        (count1, checksum1), (count2, checksum2) = a.count_and_checksum(), b.count_and_checksum()
+        self.assertEqual(count1, count2)
+        self.assertNotEqual(checksum1, checksum2)
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, native_checksum=True)
+        diff = list(differ.diff_tables(a, b))
+        self.assertEqual(diff, [("-", ("200", "a"))] * 2 + [("+", ("201", "b"))] * 2)
+
+
+@test_each_database_in_list({db.PostgreSQL, db.MySQL, db.DuckDB})
+class TestColumnChecksums(DiffTestCase):
+    src_schema = {"id": int, "comment": str, "updated": int}
+    dst_schema = {"id": int, "comment": str, "updated": int}
+
+    def setUp(self):
+        super().setUp()
+
+        # 'updated' was recomputed for every row, 'comment' changed for a single row
+        rows = [(i, str(i), 1) for i in range(100)]
+        rows2 = [(i, "changed" if i == 42 else str(i), 2) for i in range(100)]
+        self.connection.query(
+            [
+                self.src_table.insert_rows(rows),
+                self.dst_table.insert_rows(rows2),
+                commit,
+            ]
+        )
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment", "updated"))
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment", "updated"))
+
+    def test_count_and_checksum_columns(self):
+        a = self.a.with_schema()
+        b = self.b.with_schema()
+        count1, keys1, columns1 = a.count_and_checksum_columns()
+        count2, keys2, columns2 = b.count_and_checksum_columns()
+        self.assertEqual((count1, keys1), (count2, keys2))
+        self.assertEqual(list(columns1), ["comment", "updated"])
+        self.assertNotEqual(columns1["comment"], columns2["comment"])
+        self.assertNotEqual(columns1["updated"], columns2["updated"])
+
+        a = a.new(min_key=(0,), max_key=(10,))
+        b = b.new(min_key=(0,), max_key=(10,))
+        self.assertEqual(a.count_and_checksum_columns()[2]["comment"], b.count_and_checksum_columns()[2]["comment"])
+
+    def test_column_stats(self):
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, column_checksums=True)
+        diff = list(differ.diff_tables(self.a, self.b))
+        self.assertEqual(len(diff), 200)
+
+        column_stats = differ.stats["mismatched_segments_by_column"]
+        self.assertGreater(column_stats["updated"], column_stats["comment"])
+
+    def test_auto_ignore_columns(self):
+        differ = HashDiffer(
+            bisection_factor=2, bisection_threshold=10, column_checksums=True, auto_ignore_columns_after=1
+        )
+        diff = list(differ.diff_tables(self.a, self.b.new(where="id != 42")))
+        self.assertEqual(diff, [("-", ("42", "42", "1"))])
+        self.assertEqual(differ.ignored_columns1, {"updated"})
+        self.assertLess(differ.stats.get("rows_downloaded", 0), 20)
+
+        self.assertRaises(ValueError, HashDiffer, auto_ignore_columns_after=1)
+
+    def test_auto_ignore_counts_leaves(self):
+        # A single difference, found deep in the tree, must not count once per level
+        a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment",))
+        b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment",))
+        differ = HashDiffer(
+            bisection_factor=2, bisection_threshold=4, column_checksums=True, auto_ignore_columns_after=2
+        )
+        diff = list(differ.diff_tables(a, b))
+        self.assertEqual(diff, [("-", ("42", "42")), ("+", ("42", "changed"))])
+        self.assertEqual(differ.stats["mismatched_segments_by_column"], {"comment": 1})
+        self.assertEqual(differ.ignored_columns1, set())
+
+
+@test_each_database_in_list({db.PostgreSQL, db.MySQL, db.DuckDB})
+class TestKeysOnly(DiffTestCase):
+    src_schema = {"id": int, "comment": str, "updated": datetime}
+    dst_schema = {"id": int, "comment": str, "updated": datetime}
+
+    def setUp(self):
+        super().setUp()
+
+        self.time1 = datetime.fromisoformat("2022-01-01 00:00:00")
+        self.time2 = datetime.fromisoformat("2022-01-02 00:00:00")
+        rows = [(i, str(i), self.time1 if i < 50 else self.time2) for i in range(100)]
+        rows2 = [(i, "changed", self.time1 if i < 50 else self.time2) for i in range(100) if i != 42]
+        rows2.append((1000, "1000", self.time2))
+        self.connection.query(
+            [
+                self.src_table.insert_rows(rows),
+                self.dst_table.insert_rows(rows2),
+                commit,
+            ]
+        )
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", "updated", ("comment",), keys_only=True)
+        self.b = table_segment(self.connection, self.table_dst_path, "id", "updated", ("comment",), keys_only=True)
+
+    def test_keys_only(self):
+        self.assertEqual(self.a.relevant_columns, ["id"])
+        expected = [("-", ("42",)), ("+", ("1000",))]
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10)
+        self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+
+        differ = JoinDiffer()
+        self.assertEqual(sorted(differ.diff_tables(self.a, self.b)), sorted(expected))
+
+    def test_update_range(self):
+        # The update column isn't compared, but can still restrict the search space
+        a = self.a.new(min_update=self.time2)
+        b = self.b.new(min_update=self.time2)
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10)
+        self.assertEqual(list(differ.diff_tables(a, b)), [("+", ("1000",))])
+
+
+@test_each_database_in_list({db.PostgreSQL, db.MySQL, db.DuckDB})
+class TestDuckDBLeafDiff(DiffTestCase):
+    src_schema = {"id": int, "comment": str}
+    dst_schema = {"id": int, "comment": str}
+
+    def setUp(self):
+        super().setUp()
+
+        rows = [(i, str(i)) for i in range(100)]
+        rows2 = [(i, "changed" if i == 42 else str(i)) for i in range(100) if i != 7] + [(1000, "1000")]
+        self.connection.query([self.src_table.insert_rows(rows), self.dst_table.insert_rows(rows2), commit])
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment",))
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment",))
+
+    def test_duckdb_leaf_diff(self):
+        expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+        self.assertEqual(len(expected), 4)
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, duckdb_leaf_diff=True)
+        self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+
+    def test_leaf_processes(self):
+        expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, leaf_processes=2)
+        submit = ProcessPoolExecutor.submit
+        with patch.object(ProcessPoolExecutor, "submit", autospec=True, side_effect=submit) as mock_submit:
+            with patch("data_diff.hashdiff_tables.LEAF_PROCESS_MIN_ROWS", 0):
+                self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+        self.assertGreater(mock_submit.call_count, 0)
+        self.assertIsNone(differ._process_pool)  # Shut down after the diff
+
+    def test_prefetch_leaves(self):
+        expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, prefetch_leaves=0)
+        self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+        self.assertGreater(differ.stats["prefetched_leaves"], 0)
+        # Some leaves matched, so their rows weren't used
+        self.assertGreater(differ.stats["prefetched_leaves_unused"], 0)
+        self.assertEqual(differ.stats["prefetched_leaves_unused"], differ._leaf_checksums - differ._leaf_mismatches)
+
+        # Most expected leaves match, so it stops prefetching
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, prefetch_leaves=0.9)
+        self.assertEqual(list(differ.diff_tables(self.a, self.b)), expected)
+        self.assertLess(differ.stats.get("prefetched_leaves", 0), differ._leaf_checksums)
+
+    def test_one_diff_at_a_time(self):
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10)
+        diff = iter(differ.diff_tables(self.a, self.b))
+        first = next(diff)
+        self.assertRaises(RuntimeError, list, differ.diff_tables(self.a, self.b))
+
+        # Once the diff is done, the differ can run the next one
+        self.assertEqual([first] + list(diff), list(differ.diff_tables(self.a, self.b)))
+
+
+@test_each_database_in_list({db.PostgreSQL, db.MySQL, db.DuckDB})
+class TestPartitions(DiffTestCase):
+    src_schema = {"id": int, "comment": str, "region": str}
+    dst_schema = {"id": int, "comment": str, "region": str}
+
+    def setUp(self):
+        super().setUp()
+
+        regions = ["eu", "us", None]
+        rows = [(i, str(i), regions[i % 3]) for i in range(100)]
+        rows2 = [(i, "changed" if i == 42 else str(i), regions[i % 3]) for i in range(100) if i != 7]
+        rows2 += [(1000, "1000", "apac")]  # A partition that only exists in the second table
+        self.connection.query([self.src_table.insert_rows(rows), self.dst_table.insert_rows(rows2), commit])
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment",))
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment",))
+        self.expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+        self.assertEqual(len(self.expected), 4)
+
+    def test_partition_column(self):
+        a = self.a.new(partition_column="region")
+        b = self.b.new(partition_column="region")
+
+        diff_res = HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(a, b)
+        self.assertEqual(sorted(diff_res), sorted(self.expected))
+        # One first-level segment per partition: 'apac', 'eu', 'us', NULL
+        self.assertEqual(len(diff_res.info_tree.children), 4)
+        self.assertEqual(diff_res.info_tree.info.rowcounts, {1: 100, 2: 100})
+
+        self.assertEqual(sorted(JoinDiffer().diff_tables(a, b)), sorted(self.expected))
+
+    def test_too_many_partitions(self):
+        a = self.a.new(partition_column="region")
+        b = self.b.new(partition_column="region")
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, max_partitions=3)
+        self.assertEqual(list(differ.diff_tables(a, b)), self.expected)
+
+    def test_depth_first(self):
+        a = self.a.new(partition_column="region")
+        b = self.b.new(partition_column="region")
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, max_threadpool_size=1)
+        calls = []
+
+        def record(method):
+            def wrapper(self, ti, table1, *args, **kwargs):
+                calls.append((method.__name__, table1.partition_value))
+                return method(self, ti, table1, *args, **kwargs)
+
+            return wrapper
+
+        bounding_box = record(HashDiffer._bisect_and_diff_bounding_box)
+        with patch.object(HashDiffer, "_bisect_and_diff_bounding_box", bounding_box):
+            with patch.object(HashDiffer, "_diff_segments", record(HashDiffer._diff_segments)):
+                diff_res = differ.diff_tables(a, b)
+                self.assertEqual(sorted(diff_res), sorted(self.expected))
+
+        # The segments of a partition are diffed before the next partitions are started
+        self.assertLess(calls.index(("_diff_segments", "eu")), calls.index(("_bisect_and_diff_bounding_box", "us")))
+        self.assertIn("time_to_first_diff", diff_res.stats)
+
+    def test_table_partitions(self):
+        # Not partitioned in the catalog, so segmented by key as usual
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, table_partitions=True)
+        self.assertEqual(list(differ.diff_tables(self.a, self.b)), self.expected)
+
+
+@test_each_database_in_list({db.PostgreSQL, db.MySQL, db.DuckDB})
+class TestSpilledResults(DiffTestCase):
+    src_schema = {"id": int, "comment": str}
+    dst_schema = {"id": int, "comment": str}
+
+    def setUp(self):
+        super().setUp()
+
+        rows = [(i, str(i)) for i in range(100)]
+        rows2 = [(i, "changed" if i % 3 else str(i)) for i in range(100) if i != 7]
+        self.connection.query([self.src_table.insert_rows(rows), self.dst_table.insert_rows(rows2), commit])
+
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=("comment",))
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=("comment",))
+
+    def test_spilled_results(self):
+        expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+        self.assertEqual(len(expected), 131)
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, max_rows_in_memory=7)
+        diff_res = differ.diff_tables(self.a, self.b)
+        self.assertEqual(list(diff_res), expected)
+        self.assertTrue(diff_res.result_list.is_spilled)
+        self.assertEqual(list(diff_res), expected)  # Re-iterate from disk
+        self.assertEqual(diff_res.get_stats_dict()["updated"], 65)
+        self.assertEqual(len(diff_res.info_tree.info.diff), 131)
+
+    def test_no_retained_diffs(self):
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, retain_diffs=False)
+        diff_res = differ.diff_tables(self.a, self.b)
+        self.assertEqual(len(list(diff_res)), 131)
+        self.assertIsNone(diff_res.info_tree.info.diff)
+        self.assertEqual(diff_res.info_tree.info.diff_count, 131)
+        self.assertTrue(diff_res.info_tree.info.is_diff)
+
+
+class TestDiffStatsAccumulator(unittest.TestCase):
+    def setUp(self):
+        # 10 exclusive to A, then 10 exclusive to B, then 10 updates where 'b' changed
+        self.rows = [("-", (str(i), "x", "y")) for i in range(10)]
+        self.rows += [("+", (str(i), "x", "y")) for i in range(100, 110)]
+        for i in range(20, 30):
+            self.rows += [("-", (str(i), "x", "y")), ("+", (str(i), "x", "changed"))]
+
+    def test_exact(self):
+        acc = DiffStatsAccumulator(("id",), ("a", "b"))
+        for row in self.rows:
+            acc.add(*row)
+
+        self.assertEqual(acc.diff_by_sign, {"+": 10, "-": 10, "!": 10})
+        self.assertEqual(acc.extra_column_diffs, {"a": 0, "b": 10})
+        self.assertFalse(acc.is_approximate)
+        self.assertEqual(len(acc._pending), 20)
+
+    def test_approximate(self):
+        acc = DiffStatsAccumulator(("id",), ("a", "b"), max_pending_keys=5)
+        # Pairs that are far apart, so the first row is evicted before its pair arrives
+        rows = self.rows + [("+", (str(i), "x", "y")) for i in range(5)]
+        for row in rows:
+            acc.add(*row)
+
+        self.assertTrue(acc.is_approximate)
+        self.assertLessEqual(len(acc._pending), 5)
+        self.assertEqual(acc.diff_by_sign, {"+": 10, "-": 5, "!": 15})
+
+    def test_duplicate_keys(self):
+        acc = DiffStatsAccumulator(("id",), ("a", "b"))
+        for row in self.rows + [("-", ("0", "x", "y"))]:
+            acc.add(*row)
+
+        self.assertTrue(acc.has_duplicate_keys)
+        self.assertEqual(acc.diff_by_sign, {"+": 10, "-": 10, "!": 10})
+
+    def test_stats_of_duplicate_keys(self):
+        tables = [TableSegment(MockDatabase(), (name,), ("id",), extra_columns=("a", "b")) for name in "ab"]
+        info_tree = InfoTree(SegmentInfo(tables, rowcounts={1: 20, 2: 20}))
+        diff = DiffResultWrapper(iter(self.rows + [("-", ("0", "x", "y"))]), info_tree, {})
+
+        # Only the stats fail, not the diff itself
+        self.assertEqual(len(list(diff)), 41)
+        self.assertRaises(ValueError, diff.get_stats_dict)
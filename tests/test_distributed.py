@@ -0,0 +1,97 @@
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from data_diff.databases import DuckDB
+from data_diff.distributed import DistributedDiffer, WorkQueue, WorkQueueError, run_worker
+from data_diff.hashdiff_tables import HashDiffer
+
+from tests.common import table_segment
+
+
+class TestDistributed(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "diff.queue")
+        self.db = DuckDB(filepath=":memory:")
+        self.db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(10000) t(i)")
+        self.db.query(
+            "CREATE TABLE b AS SELECT id, CASE WHEN id % 1000 = 7 THEN 'changed' ELSE comment END AS comment "
+            "FROM a WHERE id % 1500 <> 3 UNION ALL SELECT 20000, 'extra'"
+        )
+        self.a = table_segment(self.db, ("a",), "id", extra_columns=("comment",))
+        self.b = table_segment(self.db, ("b",), "id", extra_columns=("comment",))
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _prepare(self, config):
+        differ = HashDiffer(bisection_factor=4, bisection_threshold=config["bisection_threshold"], threaded=False)
+        return differ, [self.a, self.b]
+
+    def _start_workers(self, queue, count):
+        workers = [
+            threading.Thread(target=run_worker, args=(queue, self._prepare, f"worker{i}", 0.01)) for i in range(count)
+        ]
+        for w in workers:
+            w.start()
+        return workers
+
+    def test_diff(self):
+        expected = HashDiffer(bisection_factor=4, bisection_threshold=100).diff_tables(self.a, self.b)
+        queue = WorkQueue(self.path)
+        differ = DistributedDiffer(queue=queue, config={"bisection_threshold": 100}, work_units=5, poll_interval=0.01)
+
+        # Workers wait for the queue to be created
+        workers = self._start_workers(queue, 3)
+        diff = differ.diff_tables(self.a, self.b)
+        self.assertEqual(sorted(diff), sorted(expected))
+        for w in workers:
+            w.join()
+
+        self.assertEqual(queue.counts(), {"done": 5})
+        self.assertEqual(len(diff.info_tree.children), 5)
+        self.assertEqual(diff.info_tree.info.rowcounts, {1: 10000, 2: 9994})
+        self.assertEqual(diff.info_tree.info.diff_count, len(list(expected)))
+        self.assertEqual(diff.get_stats_dict()["updated"], expected.get_stats_dict()["updated"])
+        self.assertGreater(differ.stats["rows_downloaded"], 0)
+
+    def test_expired_lease(self):
+        queue = WorkQueue(self.path, lease_seconds=0)
+        queue.create({}, [([0], [10]), ([10], [20])])
+        unit = queue.claim("dead")
+        self.assertEqual((unit.id, unit.attempts), (1, 1))
+
+        # Claimed again by another worker, and the first worker's result is discarded
+        unit2 = queue.claim("alive")
+        self.assertEqual((unit2.id, unit2.attempts), (1, 2))
+        self.assertFalse(queue.complete(unit, "dead", [("-", ("1",))], {}))
+        self.assertTrue(queue.complete(unit2, "alive", [("+", ("2",))], {"rowcounts": [0, 1]}))
+        self.assertEqual(queue.completed(), [(1, {"rowcounts": [0, 1]}, [("+", ("2",))])])
+        self.assertEqual(queue.counts(), {"done": 1, "pending": 1})
+
+    def test_failed_unit(self):
+        queue = WorkQueue(self.path, max_attempts=2)
+        differ = DistributedDiffer(queue=queue, config={"bisection_threshold": 100}, work_units=2, poll_interval=0.01)
+        with patch.object(HashDiffer, "_diff_segments", side_effect=ConnectionError("Preempted")):
+            workers = self._start_workers(queue, 1)
+            with self.assertRaisesRegex(WorkQueueError, "Work unit 1 failed .*Preempted"):
+                list(differ.diff_tables(self.a, self.b))
+            for w in workers:
+                w.join()
+        # The second unit is small enough to be downloaded right away
+        self.assertEqual(queue.failures(), [(1, "ConnectionError('Preempted')")])
+
+    def test_local_workers_exit(self):
+        differ = DistributedDiffer(
+            queue=WorkQueue(self.path),
+            local_workers=2,
+            worker_command=[sys.executable, "-c", "pass"],
+            poll_interval=0.01,
+        )
+        with self.assertRaisesRegex(WorkQueueError, "local workers exited"):
+            list(differ.diff_tables(self.a, self.b))
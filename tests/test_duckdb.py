@@ -1,5 +1,6 @@
 import unittest
 from data_diff.databases import duckdb as duckdb_differ
+from data_diff.databases.base import CsvRowsReader, Database, _placeholder, csv_row
 import os
 import uuid
 
@@ -40,3 +41,52 @@ class TestDuckDBTableSchemaMethods(unittest.TestCase):
         db_path = ("custom_db", "custom_schema", "test_table")
         expected_sql = "SELECT column_name, data_type, datetime_precision, numeric_precision, numeric_scale FROM custom_db.information_schema.columns WHERE table_name = 'test_table' AND table_schema = 'custom_schema' and table_catalog = 'custom_db'"
         self.assertEqual(self.duckdb_conn.select_table_schema(db_path), expected_sql)
+
+
+class TestDuckDBBulkInsert(unittest.TestCase):
+    def setUp(self):
+        self.conn = duckdb_differ.DuckDB(filepath=":memory:")
+        self.conn.query("CREATE TABLE t (id INT, name VARCHAR, flag BOOLEAN)")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _rows(self, n):
+        # A generator, so that the rows are never materialized
+        for i in range(n):
+            yield i, None if i % 3 == 0 else "" if i % 3 == 1 else f'say "{i}",\nok', i % 2 == 0
+
+    def test_insert_rows_bulk(self):
+        self.conn.insert_rows_bulk(("t",), ["id", "name", "flag"], self._rows(1000))
+        rows = self.conn.query("SELECT id, name, flag FROM t ORDER BY id", list)
+        self.assertEqual(rows, list(self._rows(1000)))
+
+    def test_insert_rows_bulk_empty(self):
+        self.conn.insert_rows_bulk(("t",), ["id", "name", "flag"], iter([]))
+        self.assertEqual(self.conn.query("SELECT count(*) FROM t", int), 0)
+
+    def test_insert_rows_in_batches(self):
+        # The generic path, with multi-row INSERTs
+        Database.insert_rows_bulk(self.conn, ("t",), ["id", "name", "flag"], self._rows(100), batch_size=7)
+        rows = self.conn.query("SELECT id, name, flag FROM t ORDER BY id", list)
+        self.assertEqual(rows, list(self._rows(100)))
+
+
+class TestCsvRowsReader(unittest.TestCase):
+    def test_read(self):
+        rows = [(1, "a"), (2, None), (3, 'q"q')]
+        expected = "".join(map(csv_row, rows))
+        self.assertEqual(CsvRowsReader(rows).read(), expected)
+
+        reader = CsvRowsReader(rows)
+        chunks = iter(lambda: reader.read(5), "")
+        self.assertEqual("".join(chunks), expected)
+
+        reader = CsvRowsReader(rows)
+        self.assertEqual("".join(iter(reader.readline, "")), expected)
+
+    def test_placeholder(self):
+        self.assertEqual(_placeholder("qmark", 0), "?")
+        self.assertEqual(_placeholder("format", 1), "%s")
+        self.assertEqual(_placeholder("numeric", 1), ":2")
+        self.assertRaises(ValueError, _placeholder, "named", 0)
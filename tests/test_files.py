@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from data_diff.databases import Files, connect
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.joindiff_tables import JoinDiffer
+
+from tests.common import table_segment
+
+
+class TestFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.directory = self.tmpdir.name
+        self.db = connect(f"file://{self.directory}", shared=False)
+
+        rows = "SELECT i AS id, 'row' || i AS comment, i / 2 AS rating FROM range(100) t(i)"
+        changed = "SELECT id, CASE WHEN id = 42 THEN 'changed' ELSE comment END AS comment, rating FROM ({rows}) WHERE id <> 7"
+        self._write(f"COPY ({rows}) TO '{self.directory}/a.parquet' (FORMAT PARQUET)")
+        self._write(f"COPY ({changed.format(rows=rows)}) TO '{self.directory}/b.csv' (HEADER)")
+        self._write(f"COPY ({changed.format(rows=rows)}) TO '{self.directory}/c.parquet' (FORMAT PARQUET)")
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _write(self, sql):
+        self.db.query(sql)
+
+    def _table(self, name):
+        return table_segment(self.db, self.db.dialect.parse_table_name(name), "id", extra_columns=("comment",))
+
+    def test_connect(self):
+        self.assertIsInstance(self.db, Files)
+        self.assertEqual(self.db.directory, self.directory)
+        self.assertEqual(self.db.dialect.parse_table_name("sub.dir/a.parquet"), ("sub.dir/a.parquet",))
+
+    def test_hashdiff_parquet_csv(self):
+        a = self._table("a.parquet")
+        b = self._table(os.path.join(self.directory, "b.csv"))  # Absolute paths work too
+        diff = set(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(a, b))
+        self.assertEqual(diff, {("-", ("7", "row7")), ("-", ("42", "row42")), ("+", ("42", "changed"))})
+
+    def test_joindiff_parquet(self):
+        a = self._table("a.parquet")
+        b = self._table("c.parquet")
+        diff = set(JoinDiffer().diff_tables(a, b))
+        self.assertEqual(diff, {("-", ("7", "row7")), ("-", ("42", "row42")), ("+", ("42", "changed"))})
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            self.db.query_table_schema(("a.xlsx",))
@@ -1,6 +1,8 @@
+import io
+import json
 import unittest
 from data_diff.diff_tables import DiffResultWrapper, InfoTree, SegmentInfo, TableSegment
-from data_diff.format import jsonify
+from data_diff.format import jsonify, stream_jsonify
 from data_diff.abcs.database_types import Integer
 from tests.test_query import MockDatabase
 
@@ -349,3 +351,78 @@ class TestFormat(unittest.TestCase):
                 },
             },
         )
+
+    def _stream(self, diff_rows, **kw):
+        diff = DiffResultWrapper(
+            info_tree=InfoTree(
+                info=SegmentInfo(
+                    tables=[
+                        TableSegment(
+                            table_path=("db", "schema", "table1"),
+                            key_columns=("id",),
+                            extra_columns=("value",),
+                            database=MockDatabase(),
+                        ),
+                        TableSegment(
+                            table_path=("db", "schema", "table2"),
+                            key_columns=("id",),
+                            extra_columns=("value",),
+                            database=MockDatabase(),
+                        ),
+                    ],
+                )
+            ),
+            diff=iter(diff_rows),
+            stats={},
+        )
+        out = io.StringIO()
+        stream_jsonify(
+            diff,
+            out,
+            dbt_model="my_model",
+            dataset1_columns=[("id", "NUMBER", Integer()), ("value", "NUMBER", Integer())],
+            dataset2_columns=[("id", "NUMBER", Integer()), ("value", "NUMBER", Integer())],
+            columns_diff={"added": [], "removed": [], "changed": []},
+            **kw,
+        )
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def test_stream_jsonify(self):
+        lines = self._stream([("-", ("1", "3")), ("+", ("1", "201")), ("-", ("2", "4")), ("+", ("3", "202"))])
+
+        header, *rows, result = lines
+        self.assertEqual(header["type"], "header")
+        self.assertEqual(header["model"], "my_model")
+        self.assertEqual(header["dataset1"], ["db", "schema", "table1"])
+        self.assertEqual(header["columns"]["primaryKey"], ["id"])
+        self.assertEqual(
+            rows,
+            [
+                {
+                    "type": "diff",
+                    "row": {
+                        "id": {"dataset1": "1", "dataset2": "1", "isDiff": False, "isPK": True},
+                        "value": {"dataset1": "3", "dataset2": "201", "isDiff": True, "isPK": False},
+                    },
+                },
+                {
+                    "type": "exclusive",
+                    "dataset": "dataset1",
+                    "row": {"id": {"isPK": True, "value": "2"}, "value": {"isPK": False, "value": "4"}},
+                },
+                {
+                    "type": "exclusive",
+                    "dataset": "dataset2",
+                    "row": {"id": {"isPK": True, "value": "3"}, "value": {"isPK": False, "value": "202"}},
+                },
+            ],
+        )
+        self.assertEqual(result, {"type": "result", "result": "different", "summary": None})
+
+    def test_stream_jsonify_stats_only(self):
+        lines = self._stream([("-", ("2", "4"))], stats_only=True)
+        self.assertEqual([line["type"] for line in lines], ["header", "result"])
+        self.assertEqual(lines[-1]["result"], "different")
+
+        lines = self._stream([])
+        self.assertEqual(lines[-1]["result"], "identical")
@@ -0,0 +1,83 @@
+from datetime import datetime
+from unittest.mock import patch
+
+from data_diff.queries.api import commit
+from data_diff import databases as db
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.hybriddiff_tables import HybridDiffer
+from data_diff.table_segment import TableSegment
+
+from tests.common import DiffTestCase, table_segment, test_each_database_in_list
+
+
+TEST_DATABASES = {
+    db.PostgreSQL,
+    db.MySQL,
+    db.DuckDB,
+}
+
+test_each_database = test_each_database_in_list(TEST_DATABASES)
+
+
+@test_each_database
+class TestHybridDiff(DiffTestCase):
+    src_schema = {"id": int, "comment": str, "rating": float, "timestamp": datetime}
+    dst_schema = {"id": int, "comment": str, "rating": float, "timestamp": datetime}
+
+    def setUp(self):
+        super().setUp()
+
+        time_obj = datetime.fromisoformat("2022-01-01 00:00:00")
+        rows = [(i, str(i), i / 2, time_obj) for i in range(200)]
+        rows2 = [(i, str(i), i / 2, time_obj) for i in range(200) if i % 50] + [(1000, None, 1.5, time_obj)]
+        rows2[10] = (11, "changed", 5.5, time_obj)
+        self.connection.query([self.src_table.insert_rows(rows), self.dst_table.insert_rows(rows2), commit])
+
+        columns = ("comment", "rating", "timestamp")
+        self.a = table_segment(self.connection, self.table_src_path, "id", extra_columns=columns, case_sensitive=False)
+        self.b = table_segment(self.connection, self.table_dst_path, "id", extra_columns=columns, case_sensitive=False)
+
+        self.expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b))
+        assert len(self.expected) == 7
+
+    def test_local_join(self):
+        differ = HybridDiffer(bisection_factor=2, bisection_threshold=10, download_chunk_size=30)
+        diff_res = differ.diff_tables(self.a, self.b)
+        self.assertEqual(sorted(diff_res), sorted(self.expected))
+        self.assertEqual(differ.stats["hybrid_strategy"], "local_join")
+        self.assertEqual(differ.stats["rows_downloaded"], 200 + 197)
+        self.assertEqual(diff_res.info_tree.info.rowcounts, {1: 200, 2: 197})
+
+    def test_bisection(self):
+        differ = HybridDiffer(bisection_factor=2, bisection_threshold=10, max_local_rows=100)
+        with patch.object(TableSegment, "count", autospec=True, side_effect=TableSegment.count) as count:
+            self.assertEqual(list(differ.diff_tables(self.a, self.b)), self.expected)
+        self.assertEqual(differ.stats["hybrid_strategy"], "bisection")
+        if self.connection.SUPPORTS_TABLE_STATISTICS:
+            # Decided from the catalog, without scanning the tables
+            count.assert_not_called()
+
+    def test_divergence(self):
+        a = self.a.new(where="id < 60")
+        b = self.b.new(where="id < 20")
+
+        differ = HybridDiffer(bisection_factor=2, bisection_threshold=10, max_local_rows=30, download_chunk_size=10)
+        diff_res = differ.diff_tables(a, b)
+        diff = list(diff_res)
+        self.assertEqual(differ.stats["hybrid_strategy"], "chunked_join")
+        expected = list(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(a, b))
+        self.assertEqual(sorted(diff), sorted(expected))
+        self.assertEqual(len(diff), 60 - 19 + 2)
+        self.assertEqual(differ.stats["rows_downloaded"], 60 + 19)
+        self.assertEqual(diff_res.info_tree.info.rowcounts, {1: 60, 2: 19})
+        self.assertGreater(len(diff_res.info_tree.children), 1)
+
+    def test_divergence_too_big(self):
+        # The smaller side is too big to join locally as well, so it's bisected
+        a = self.a.new(where="id < 60")
+        b = self.b.new(where="id < 20")
+
+        differ = HybridDiffer(bisection_factor=2, bisection_threshold=10, max_local_rows=10)
+        diff = list(differ.diff_tables(a, b))
+        self.assertEqual(differ.stats["hybrid_strategy"], "bisection")
+        self.assertEqual(len(diff), 60 - 19 + 2)
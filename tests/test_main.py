@@ -2,7 +2,14 @@ import unittest
 
 from data_diff import Database, JoinDiffer, HashDiffer
 from data_diff import databases as db
-from data_diff.__main__ import _get_dbs, _set_age, _get_table_differ, _get_expanded_columns, _get_threads
+from data_diff.__main__ import (
+    _get_batch_thread_counts,
+    _get_dbs,
+    _set_age,
+    _get_table_differ,
+    _get_expanded_columns,
+    _get_threads,
+)
 from data_diff.databases.mysql import MySQL
 from data_diff.diff_tables import TableDiffer
 from tests.common import CONN_STRINGS, get_conn, DiffTestCase
@@ -247,3 +254,13 @@ class TestGetThreads(unittest.TestCase):
         with self.assertRaises(ValueError) as value_error:
             _get_threads(-1, None, None)
         assert str(value_error.exception) == "Error: threads must be >= 1"
+
+    def test__get_batch_thread_counts(self):
+        runs = {
+            "a": {"database1": "duckdb://a", "database2": "duckdb://b", "threads": 8, "threads1": None, "threads2": 2},
+            "b": {"database1": "duckdb://a", "database2": "duckdb://c", "threads": "serial"},
+            "c": {"database1": "duckdb://c", "database2": "duckdb://c", "threads": 3},
+        }
+        # Each database is sized for its most demanding run, not for the most demanding run overall
+        thread_counts = _get_batch_thread_counts(runs)
+        assert thread_counts == {"duckdb://a": 8, "duckdb://b": 2, "duckdb://c": 3}
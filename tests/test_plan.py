@@ -0,0 +1,53 @@
+import unittest
+
+from data_diff.databases import DuckDB
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.joindiff_tables import JoinDiffer
+from data_diff.plan import TablePlan, estimate_bisection, plan_diff
+from data_diff.progress import DiffProgress
+
+from tests.common import table_segment
+
+
+class TestPlan(unittest.TestCase):
+    def setUp(self):
+        self.db = DuckDB(filepath=":memory:")
+        self.db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(10000) t(i)")
+        self.db.query("CREATE TABLE b AS SELECT * FROM a")
+        self.a = table_segment(self.db, ("a",), "id", extra_columns=("comment",))
+        self.b = table_segment(self.db, ("b",), "id", extra_columns=("comment",))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_estimate_bisection(self):
+        self.assertEqual(estimate_bisection(1000, 1000, 32, 16384), (0, 1000))
+        self.assertEqual(estimate_bisection(10**6, 10**6, 32, 16384), (2, 976))
+        self.assertEqual(estimate_bisection(10**9, 10**9, 32, 16384), (4, 953))
+        # Sparse keys: the first split is decided by the key-space
+        self.assertEqual(estimate_bisection(1000, 10**9, 32, 16384), (1, 31))
+
+    def test_plan_matches_run(self):
+        differ = HashDiffer(bisection_factor=4, bisection_threshold=100)
+        plan = plan_diff(differ, self.a, self.b)
+        self.assertEqual([t.row_count for t in plan.tables], [10000, 10000])
+        self.assertEqual(plan.tables[0].row_count_source, "catalog")
+        self.assertEqual(plan.tables[0].min_key, (0,))
+        self.assertEqual((plan.levels, plan.leaf_rows), (4, 39))
+        self.assertEqual(plan.checksum_queries["min"], 8)
+        self.assertIsNone(plan.scanned_bytes["min"])  # DuckDB doesn't estimate it
+
+        # Identical tables only checksum the first level
+        progress = DiffProgress()
+        list(HashDiffer(bisection_factor=4, bisection_threshold=100, progress=progress).diff_tables(self.a, self.b))
+        queries = sum(db["queries"] for db in progress.snapshot()["databases"].values())
+        self.assertEqual(queries, plan.checksum_queries["min"])
+
+    def test_scan_bytes_at_level(self):
+        pruned = TablePlan("db", ("t",), 1000, "catalog", (0,), (1000,), 6400, 200, "estimate")
+        self.assertEqual(pruned.scan_bytes_at_level(2, 32), 6400 / 32**2)
+        unpruned = TablePlan("db", ("t",), 1000, "catalog", (0,), (1000,), 6400, 6400, "estimate")
+        self.assertEqual(unpruned.scan_bytes_at_level(2, 32), 6400)
+
+    def test_joindiff(self):
+        self.assertRaises(ValueError, plan_diff, JoinDiffer(), self.a, self.b)
@@ -1,5 +1,6 @@
 import unittest
 from copy import deepcopy
+from unittest.mock import patch
 from urllib.parse import quote
 
 from data_diff import TableSegment, HashDiffer, Database
@@ -118,6 +119,50 @@ class Test100Fields(unittest.TestCase):
         self.assertEqual(diff, [("-", result)])
 
 
+class TestPartitionedTable(unittest.TestCase):
+    def setUp(self) -> None:
+        self.connection = get_conn(db.PostgreSQL)
+
+        table_suffix = random_table_suffix()
+        self.table_src = table(f"src{table_suffix}")
+        self.table_dst = table(f"dst{table_suffix}")
+
+    def tearDown(self):
+        self.connection.query([self.table_src.drop(True), self.table_dst.drop(True), commit], None)
+
+    def test_table_partitions(self):
+        for t in [self.table_src, self.table_dst]:
+            name = t.path[0]
+            self.connection.query(
+                [
+                    t.drop(True),
+                    f"CREATE TABLE {name} (id int, comment VARCHAR, region VARCHAR) PARTITION BY LIST (region)",
+                    f"CREATE TABLE {name}_eu PARTITION OF {name} FOR VALUES IN ('eu')",
+                    f"CREATE TABLE {name}_us PARTITION OF {name} FOR VALUES IN ('us')",
+                    commit,
+                ],
+                None,
+            )
+
+        self.connection.query(
+            [
+                self.table_src.insert_rows([(i, str(i), "eu" if i % 2 else "us") for i in range(100)]),
+                self.table_dst.insert_rows([(i, str(i), "eu" if i % 2 else "us") for i in range(100) if i != 42]),
+                commit,
+            ]
+        )
+
+        self.assertEqual(self.connection.query_table_partition_column(self.table_src.path), "region")
+
+        a = TableSegment(self.connection, self.table_src.path, ("id",), extra_columns=("comment",))
+        b = TableSegment(self.connection, self.table_dst.path, ("id",), extra_columns=("comment",))
+
+        differ = HashDiffer(bisection_factor=2, bisection_threshold=10, table_partitions=True)
+        diff_res = differ.diff_tables(a, b)
+        self.assertEqual(list(diff_res), [("-", ("42", "42"))])
+        self.assertEqual(len(diff_res.info_tree.children), 2)
+
+
 class TestSpecialCharacterPassword(unittest.TestCase):
     username: str = "test"
     password: str = "passw!!!@rd"
@@ -156,3 +201,17 @@ class TestSpecialCharacterPassword(unittest.TestCase):
 
         with connect(db_url) as connection_verified:
             assert connection_verified._args.get("password") == self.password
+
+
+class TestNativeChecksum(unittest.TestCase):
+    @patch("data_diff.databases.postgresql.import_postgresql")
+    def test_server_version(self, import_postgresql):
+        # hashtextextended() only exists since PostgreSQL 11
+        for server_version, supported in [(100023, False), (110000, True), (160002, True)]:
+            import_postgresql.return_value.connect.return_value.server_version = server_version
+            conn = db.PostgreSQL(thread_count=1, host="localhost", password="")
+            try:
+                conn.create_connection()
+                self.assertEqual(conn.dialect.SUPPORTS_NATIVE_CHECKSUM, supported)
+            finally:
+                conn.close()
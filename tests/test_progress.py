@@ -0,0 +1,72 @@
+import io
+import json
+import unittest
+
+from data_diff.databases import DuckDB
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.hybriddiff_tables import HybridDiffer
+from data_diff.joindiff_tables import JoinDiffer
+from data_diff.progress import DiffProgress, ProgressReporter, format_progress, progress_event_printer
+
+from tests.common import table_segment
+
+
+class TestProgress(unittest.TestCase):
+    def setUp(self):
+        self.db = DuckDB(filepath=":memory:")
+        self.db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(1000) t(i)")
+        self.db.query(
+            "CREATE TABLE b AS SELECT id, CASE WHEN id = 42 THEN 'changed' ELSE comment END AS comment FROM a "
+            "WHERE id <> 7 UNION ALL SELECT 2000, 'extra'"
+        )
+        self.a = table_segment(self.db, ("a",), "id", extra_columns=("comment",))
+        self.b = table_segment(self.db, ("b",), "id", extra_columns=("comment",))
+
+    def tearDown(self):
+        self.db.close()
+
+    def test_hashdiff(self):
+        progress = DiffProgress()
+        differ = HashDiffer(bisection_factor=4, bisection_threshold=50, progress=progress)
+        self.assertEqual(len(list(differ.diff_tables(self.a, self.b))), 4)
+
+        snapshot = progress.snapshot()
+        self.assertEqual(snapshot["keyspace_fraction"], 1.0)
+        self.assertEqual(snapshot["eta_seconds"], 0.0)
+        self.assertGreater(snapshot["rows_checksummed"], 0)
+        self.assertGreater(snapshot["rows_downloaded"], 0)
+        self.assertLess(snapshot["rows_downloaded"], 2000)
+        for db in snapshot["databases"].values():
+            self.assertEqual(db["database"], "DuckDB")
+            self.assertGreater(db["queries"], 0)
+            self.assertEqual(db["in_flight"], 0)
+        self.assertIn("100.0%", format_progress(snapshot))
+        self.assertLessEqual(snapshot["first_diff_seconds"], snapshot["elapsed_seconds"])
+        self.assertIn("first diff at 0:00", format_progress(snapshot))
+        self.assertIn("time_to_first_diff", differ.stats)
+
+    def test_hybrid_local_join(self):
+        progress = DiffProgress()
+        differ = HybridDiffer(bisection_factor=4, bisection_threshold=50, download_chunk_size=300, progress=progress)
+        self.assertEqual(len(list(differ.diff_tables(self.a, self.b))), 4)
+
+        snapshot = progress.snapshot()
+        self.assertEqual(snapshot["keyspace_fraction"], 1.0)
+        self.assertEqual(snapshot["rows_downloaded"], 1000 + 1000)
+        self.assertGreater(snapshot["segments_done"], 2)
+
+    def test_joindiff(self):
+        progress = DiffProgress()
+        self.assertEqual(len(list(JoinDiffer(progress=progress).diff_tables(self.a, self.b))), 4)
+        self.assertEqual(progress.snapshot()["keyspace_fraction"], 1.0)
+
+    def test_reporter(self):
+        progress = DiffProgress()
+        out = io.StringIO()
+        with ProgressReporter(progress, progress_event_printer(out), interval=0.001):
+            list(HashDiffer(bisection_factor=4, bisection_threshold=50, progress=progress).diff_tables(self.a, self.b))
+
+        events = [json.loads(line)["progress"] for line in out.getvalue().splitlines()]
+        self.assertTrue(events[-1]["finished"])
+        self.assertFalse(any(e["finished"] for e in events[:-1]))
+        self.assertEqual(events[-1]["keyspace_fraction"], 1.0)
@@ -347,3 +347,26 @@ class TestQuery(unittest.TestCase):
 
         q = c.compile(tablesample(nonzero, 10))
         self.assertEqual(q, "SELECT * FROM points WHERE (x > 0) AND (y > 0) TABLESAMPLE BERNOULLI (10)")
+
+    def test_native_checksum(self):
+        from data_diff.databases.bigquery import Dialect as BigQueryDialect
+        from data_diff.databases.snowflake import Dialect as SnowflakeDialect
+        from data_diff.queries.extras import Checksum
+
+        class SnowflakeMockDatabase(MockDatabase):
+            dialect = SnowflakeDialect()
+
+        class BigQueryMockDatabase(MockDatabase):
+            dialect = BigQueryDialect()
+
+        t = table("a")
+
+        q = Compiler(SnowflakeMockDatabase()).compile(t.select(Checksum([this.x], native=True)))
+        self.assertEqual(q, 'SELECT HASH_AGG("x") FROM "a"')
+
+        q = Compiler(BigQueryMockDatabase()).compile(t.select(Checksum([this.x], native=True)))
+        self.assertEqual(q, "SELECT SUM(CAST(FARM_FINGERPRINT(`x`) AS NUMERIC)) FROM `a`")
+
+        # md5 is still used by default, so checksums are comparable across databases
+        q = Compiler(SnowflakeMockDatabase()).compile(t.select(Checksum([this.x])))
+        self.assertNotIn("HASH_AGG", q)
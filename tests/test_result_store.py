@@ -0,0 +1,43 @@
+import gc
+import os
+import unittest
+
+from data_diff.result_store import ResultStore
+
+
+class TestResultStore(unittest.TestCase):
+    def test_in_memory(self):
+        store = ResultStore(max_rows_in_memory=None)
+        store.extend(("-", (str(i),)) for i in range(100))
+        self.assertFalse(store.is_spilled)
+        self.assertEqual(len(store), 100)
+        self.assertEqual(list(store), [("-", (str(i),)) for i in range(100)])
+
+    def test_spill(self):
+        store = ResultStore(max_rows_in_memory=10)
+        rows = [("+", (str(i), None)) for i in range(95)]
+        store.extend(rows)
+        self.assertTrue(store.is_spilled)
+        self.assertEqual(len(store), 95)
+        self.assertEqual(list(store), rows)
+        self.assertEqual(list(store), rows)  # Re-iterable
+
+    def test_append_while_iterating(self):
+        store = ResultStore(max_rows_in_memory=3)
+        store.extend(range(5))
+        res = []
+        for i in store:
+            res.append(i)
+            if i < 20:
+                store.append(i + 5)
+        self.assertEqual(res, list(range(25)))
+
+    def test_spill_file_removed(self):
+        store = ResultStore(max_rows_in_memory=2)
+        store.extend(range(5))
+        (path,) = [path for _, _, path in store._conn.execute("PRAGMA database_list")]
+        self.assertTrue(os.path.exists(path))
+
+        del store
+        gc.collect()
+        self.assertFalse(os.path.exists(path))
@@ -0,0 +1,109 @@
+import json
+import threading
+import unittest
+from http.client import HTTPConnection
+
+from data_diff.__main__ import _server_diff, main
+from data_diff.batch import DatabasePool
+from data_diff.server import BadRequest, DiffServer, parse_address
+
+
+def _diff_func(request):
+    if "bad" in request:
+        raise BadRequest("bad request")
+    if "broken" in request:
+        raise RuntimeError("broken database")
+
+    def lines():
+        for i in range(request.get("count", 3)):
+            yield ["+", [str(i)]]
+        if "fail" in request:
+            raise RuntimeError("failed mid-diff")
+        yield {"stats": {"total": request.get("count", 3)}}
+
+    return lines()
+
+
+class TestDiffServer(unittest.TestCase):
+    def setUp(self):
+        self.server = DiffServer(("127.0.0.1", 0), _diff_func)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _request(self, method, path, body=None):
+        conn = HTTPConnection(*self.server.server_address)
+        conn.request(method, path, body=json.dumps(body) if body is not None else None)
+        resp = conn.getresponse()
+        data = resp.read().decode()
+        conn.close()
+        return resp.status, data
+
+    def test_diff(self):
+        status, data = self._request("POST", "/diff", {"count": 2})
+        self.assertEqual(status, 200)
+        lines = [json.loads(line) for line in data.splitlines()]
+        self.assertEqual(lines, [["+", ["0"]], ["+", ["1"]], {"stats": {"total": 2}}])
+
+    def test_errors(self):
+        self.assertEqual(self._request("POST", "/diff", {"bad": 1}), (400, '{"error": "bad request"}'))
+        self.assertEqual(self._request("POST", "/diff", [1])[0], 400)
+        self.assertEqual(self._request("POST", "/diff", {"broken": 1})[0], 500)
+        self.assertEqual(self._request("GET", "/diff")[0], 404)
+
+        status, data = self._request("POST", "/diff", {"count": 1, "fail": 1})
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(data.splitlines()[-1]), {"error": "failed mid-diff"})
+
+    def test_health(self):
+        self.assertEqual(self._request("GET", "/health"), (200, '{"status": "ok"}'))
+
+    def test_parse_address(self):
+        self.assertEqual(parse_address("0.0.0.0:9000"), ("0.0.0.0", 9000))
+        self.assertEqual(parse_address("9000"), ("127.0.0.1", 9000))
+        self.assertEqual(parse_address("localhost"), ("localhost", 8087))
+        self.assertRaises(ValueError, parse_address, "localhost:http")
+
+
+class TestServerDiff(unittest.TestCase):
+    def setUp(self):
+        self.pool = DatabasePool(schema_ttl=60)
+        self.db_conf = {"driver": "duckdb", "filepath": ":memory:"}
+        db = self.pool.get(self.db_conf)
+        db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(100) t(i)")
+        db.query("CREATE TABLE b AS SELECT * FROM a WHERE id <> 7")
+        self.config = {"database": {"local": self.db_conf}}
+        self.defaults = main.make_context("data-diff", ["--serve", "0"]).params
+
+    def tearDown(self):
+        self.pool.close()
+
+    def _diff(self, **request):
+        return list(_server_diff(self.pool, self.config, self.defaults, request))
+
+    def test_diff(self):
+        lines = self._diff(database1="local", table1="a", table2="b", columns=["comment"])
+        self.assertEqual(lines[:-1], [["-", ["7", "row7"]]])
+        self.assertEqual(lines[-1]["stats"]["exclusive_A"], 1)
+
+        # The schemas are cached, so a new column is only seen once they expire
+        self.pool.get(self.db_conf).query("ALTER TABLE a ADD COLUMN extra INT")
+        self.assertRaises(ValueError, self._diff, database1="local", table1="a", table2="b", columns=["extra"])
+
+    def test_stats(self):
+        (line,) = self._diff(database1="local", table1="a", table2="b", stats=True)
+        self.assertEqual(line["stats"]["rows_A"], 100)
+
+    def test_bad_request(self):
+        self.assertRaises(BadRequest, self._diff, database1="local", table1="a", table2="b", interactive=True)
+        self.assertRaises(ValueError, self._diff, database1="local", table1="a")
+        self.assertRaises(BadRequest, self._diff, database1="local", table1="a", table2="b", stats=True, limit=1)
+
+    def test_unknown_database(self):
+        # Only the databases of the configuration can be used, and the results can't be written to them
+        self.assertRaises(BadRequest, self._diff, database1="duckdb://:memory:", table1="a", table2="b")
+        self.assertRaises(BadRequest, self._diff, database1="local", table1="a", database2="other", table2="b")
+        self.assertRaises(BadRequest, self._diff, database1="local", table1="a", table2="b", materialize_to_table="c")
@@ -0,0 +1,89 @@
+import csv
+import json
+import os
+import tempfile
+import unittest
+
+from data_diff.databases import DuckDB
+from data_diff.hashdiff_tables import HashDiffer
+from data_diff.joindiff_tables import JoinDiffer
+from data_diff.queries.api import commit, table
+from data_diff.sinks import CsvSink, DatabaseSink, DiffSink, NdjsonSink, SinkWriter, make_sink, write_diff
+
+from tests.common import table_segment
+
+
+class _FailingSink(DiffSink):
+    def open(self, columns):
+        pass
+
+    def write_batch(self, rows):
+        raise RuntimeError("disk full")
+
+
+class TestSinks(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db = DuckDB(filepath=":memory:")
+        self.db.query("CREATE TABLE a AS SELECT i AS id, 'row' || i AS comment FROM range(100) t(i)")
+        self.db.query(
+            "CREATE TABLE b AS SELECT id, CASE WHEN id = 42 THEN 'changed' ELSE comment END AS comment FROM a WHERE id <> 7"
+        )
+        self.a = table_segment(self.db, ("a",), "id", extra_columns=("comment",))
+        self.b = table_segment(self.db, ("b",), "id", extra_columns=("comment",))
+        self.expected = {("-", "7", "row7"), ("-", "42", "row42"), ("+", "42", "changed")}
+
+    def tearDown(self):
+        self.db.close()
+        self.tmpdir.cleanup()
+
+    def _path(self, name):
+        return os.path.join(self.tmpdir.name, name)
+
+    def test_csv(self):
+        path = self._path("diff.csv")
+        diff = HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b)
+        self.assertEqual(write_diff(diff, make_sink(path), batch_size=2), 3)
+
+        with open(path, newline="") as f:
+            header, *rows = list(csv.reader(f))
+        self.assertEqual(header, ["op", "id", "comment"])
+        self.assertEqual({tuple(r) for r in rows}, self.expected)
+
+    def test_ndjson(self):
+        path = self._path("diff.ndjson")
+        self.assertIsInstance(make_sink(path), NdjsonSink)
+        write_diff(JoinDiffer().diff_tables(self.a, self.b), make_sink(path))
+
+        with open(path) as f:
+            rows = [json.loads(line) for line in f]
+        self.assertEqual({(r["op"], r["id"], r["comment"]) for r in rows}, self.expected)
+
+    def test_database(self):
+        sink = make_sink("table:diff_result", self.db)
+        self.assertIsInstance(sink, DatabaseSink)
+
+        self.db.query([table("diff_result", schema={"x": int}).create(), commit])  # Replaced
+        write_diff(HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b), sink)
+        rows = self.db.query("SELECT op, id, comment FROM diff_result", list)
+        self.assertEqual(set(rows), self.expected)
+
+    def test_passthrough(self):
+        path = self._path("diff.csv")
+        diff = HashDiffer(bisection_factor=2, bisection_threshold=10).diff_tables(self.a, self.b)
+        with SinkWriter(CsvSink(path), ["id", "comment"], batch_size=1) as writer:
+            yielded = list(writer.passthrough(diff))
+        self.assertEqual(len(yielded), 3)
+        self.assertEqual(writer.rows_written, 3)
+
+    def test_error(self):
+        with self.assertRaisesRegex(RuntimeError, "disk full"):
+            with SinkWriter(_FailingSink(), ["id"], batch_size=1, max_pending_batches=1) as writer:
+                # Never blocks, even though the queue is full and the writer thread failed
+                for i in range(100):
+                    writer.write("-", (str(i),))
+
+    def test_unknown_target(self):
+        self.assertRaises(ValueError, make_sink, self._path("diff.txt"))
+        self.assertRaises(ValueError, make_sink, self._path("diff.json"))  # Not a JSON document, so use .ndjson
+        self.assertRaises(ValueError, make_sink, "table:diff_result")
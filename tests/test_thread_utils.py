@@ -0,0 +1,186 @@
+import threading
+import time
+import unittest
+
+from data_diff.thread_utils import PriorityExecutor, ThreadedYielder
+
+
+class TestThreadedYielder(unittest.TestCase):
+    def test_results(self):
+        ti = ThreadedYielder(4)
+
+        def task(i):
+            if i < 10:
+                ti.submit(task, i + 10)  # Tasks may submit more tasks
+            return [i, -i]
+
+        for i in range(10):
+            ti.submit(task, i)
+        self.assertEqual(sorted(ti), sorted([i for i in range(20)] + [-i for i in range(20)]))
+
+    def test_yield_list(self):
+        ti = ThreadedYielder(2, yield_list=True)
+        ti.submit(lambda: [1, 2])
+        ti.submit(lambda: None)
+        self.assertEqual(list(ti), [[1, 2]])
+
+    def test_exception_raised_immediately(self):
+        ti = ThreadedYielder(2)
+        release = threading.Event()
+
+        def fail():
+            raise ValueError("boom")
+
+        ti.submit(release.wait)  # Still running when the exception is raised
+        ti.submit(fail)
+        start = time.monotonic()
+        with self.assertRaisesRegex(ValueError, "boom"):
+            list(ti)
+        self.assertLess(time.monotonic() - start, 5)
+        release.set()
+
+    def test_backpressure(self):
+        ti = ThreadedYielder(4, max_buffered=10)
+        produced = []
+        lock = threading.Lock()
+
+        def task(i):
+            with lock:
+                produced.append(i)
+            return range(5)
+
+        for i in range(100):
+            ti.submit(task, i)
+
+        it = iter(ti)
+        self.assertEqual(next(it), 0)
+        time.sleep(0.2)
+        # Only the tasks of the consumed batch, of the full buffer, and those waiting for room (one per thread)
+        self.assertLess(len(produced), 20)
+        self.assertEqual(sum(1 for _ in it), 100 * 5 - 1)
+        self.assertEqual(len(produced), 100)
+
+    def test_close(self):
+        ti = ThreadedYielder(1, max_buffered=1)
+        calls = []
+        for i in range(10):
+            ti.submit(lambda i=i: calls.append(i) or [i])
+
+        it = iter(ti)
+        next(it)
+        it.close()  # Unblocks the waiting task, and skips the queued ones
+        time.sleep(0.2)
+        self.assertLess(len(calls), 10)
+
+
+class TestPriorityExecutor(unittest.TestCase):
+    def test_nested_map(self):
+        executor = PriorityExecutor(1)
+        threads = set()
+
+        def inner(i):
+            threads.add(threading.current_thread())
+            return i * 2
+
+        def outer(i):
+            # Waits for its own tasks, which the single thread can't run for it
+            return sum(executor.map(inner, range(i)))
+
+        self.assertEqual(list(executor.map(outer, range(5))), [0, 0, 2, 6, 12])
+        self.assertLessEqual(len(threads - {threading.current_thread()}), 1)
+        executor.shutdown()
+
+    def test_priority(self):
+        executor = PriorityExecutor(1)
+        started = threading.Event()
+        release = threading.Event()
+        order = []
+
+        executor.submit(lambda: started.set() or release.wait())
+        started.wait()
+        futures = [executor.submit(order.append, p, priority=p) for p in (1, 3, 2)]
+        release.set()
+        for f in futures:
+            f.result()
+        self.assertEqual(order, [3, 2, 1])
+        executor.shutdown()
+
+    def test_as_completed(self):
+        executor = PriorityExecutor(2)
+        release = threading.Event()
+
+        def task(i):
+            if i == 0:
+                release.wait()
+            return i
+
+        results = executor.as_completed(task, range(3))
+        first = [next(results), next(results)]
+        release.set()
+        self.assertEqual(sorted(first), [1, 2])
+        self.assertEqual(list(results), [0])
+        executor.shutdown()
+
+    def test_nested_as_completed(self):
+        executor = PriorityExecutor(1)
+
+        def outer(i):
+            # The single thread runs the inner tasks itself
+            return sorted(executor.as_completed(lambda j: i * j, range(3)))
+
+        self.assertEqual(sorted(executor.as_completed(outer, range(3))), [[0, 0, 0], [0, 1, 2], [0, 2, 4]])
+        executor.shutdown()
+
+    def test_background(self):
+        executor = PriorityExecutor(1)
+        calls = []
+
+        def fail():
+            raise ValueError("boom")
+
+        with executor.background(lambda: calls.append(1), None, lambda: calls.append(2)) as futures:
+            self.assertEqual(len(futures), 2)
+        # Both are done when the block exits
+        self.assertEqual(sorted(calls), [1, 2])
+        with self.assertRaisesRegex(ValueError, "boom"):
+            with executor.background(fail):
+                pass
+        executor.shutdown()
+
+    def test_idle_threads_exit(self):
+        executor = PriorityExecutor(4, idle_timeout=0.05)
+        self.assertEqual(sum(executor.map(lambda i: i, range(20))), 190)
+        deadline = time.monotonic() + 5
+        while executor._threads and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(executor._threads, 0)
+        # New threads start on demand
+        self.assertEqual(executor.submit(lambda: 1).result(), 1)
+        executor.shutdown()
+
+    def test_yielder_shares_executor(self):
+        executor = PriorityExecutor(2)
+        ti = ThreadedYielder(yield_list=True, executor=executor)
+        for i in range(10):
+            ti.submit(lambda i=i: sum(executor.map(abs, [i, -i])))
+        self.assertEqual(sorted(ti), [i * 2 for i in range(10)])
+        # Left running for its other users
+        self.assertEqual(executor.submit(lambda: 1).result(), 1)
+        executor.shutdown()
+
+    def test_result(self):
+        executor = PriorityExecutor(1)
+        started = threading.Event()
+        release = threading.Event()
+        executor.submit(lambda: started.set() or release.wait())
+        started.wait()
+
+        # The only thread is busy, so the waiting thread runs the task itself
+        future = executor.submit(threading.current_thread)
+        self.assertIs(executor.result(future), threading.current_thread())
+
+        cancelled = executor.submit(lambda: 1)
+        self.assertTrue(cancelled.cancel())
+        release.set()
+        executor.shutdown()
+        self.assertTrue(cancelled.cancelled())
@@ -11,6 +11,8 @@ from data_diff.utils import (
     columns_removed_template,
     columns_added_template,
     columns_type_changed_template,
+    BloomFilter,
+    batched,
 )
 
 from data_diff.__main__ import _remove_passwords_in_dict
@@ -137,6 +139,36 @@ class TestUtils(unittest.TestCase):
         assert number_to_human(-1000000000) == "-1b"
 
 
+class TestBatched(unittest.TestCase):
+    def test_batched(self):
+        self.assertEqual(list(batched(range(7), 3)), [[0, 1, 2], [3, 4, 5], [6]])
+        self.assertEqual(list(batched(iter(range(6)), 3)), [[0, 1, 2], [3, 4, 5]])
+        self.assertEqual(list(batched([], 3)), [])
+
+    def test_batched_is_lazy(self):
+        consumed = []
+
+        def rows():
+            for i in range(10):
+                consumed.append(i)
+                yield i
+
+        batches = batched(rows(), 4)
+        self.assertEqual(next(batches), [0, 1, 2, 3])
+        self.assertEqual(len(consumed), 4)
+
+
+class TestBloomFilter(unittest.TestCase):
+    def test_bloom_filter(self):
+        bf = BloomFilter(1000)
+        for i in range(1000):
+            bf.add((str(i),))
+
+        self.assertTrue(all((str(i),) in bf for i in range(1000)))  # No false negatives
+        false_positives = sum((str(i),) in bf for i in range(1000, 11000))
+        self.assertLess(false_positives, 300)  # ~1% expected
+
+
 class TestDiffIntDynamicColorTemplate(unittest.TestCase):
     def test_string_input(self):
         self.assertEqual(diff_int_dynamic_color_template("test_string"), "test_string")